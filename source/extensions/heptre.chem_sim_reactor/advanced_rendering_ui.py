@@ -12,8 +12,14 @@ class AdvancedRenderingUI:
             ui.Button("⬅ Back to Main Page", clicked_fn=self.parent._go_to_main_page)
             ui.Label("Configure simulation parameters:")
 
-            ui.FloatSlider(min=0, max=100, default=25, label="Temperature (°C)")
-            ui.FloatSlider(min=0.1, max=10, default=1.0, label="Pressure (atm)")
-            ui.FloatSlider(min=0, max=1, default=0.5, label="Reactant A concentration")
+            # Sliders write straight into the parent's ReactionConditions, which
+            # the kinetics model reads when the reaction animation is rebuilt.
+            self.parent._bind_slider(ui.FloatSlider(min=0, max=100, default=25, label="Temperature (°C)"),
+                                     "temperature_c")
+            self.parent._bind_slider(ui.FloatSlider(min=0.1, max=10, default=1.0, label="Pressure (atm)"),
+                                     "pressure_atm")
+            self.parent._bind_slider(ui.FloatSlider(min=0, max=1, default=0.5, label="Reactant A concentration"),
+                                     "concentration")
+            ui.Button("Apply to Selected JSON", clicked_fn=self.parent._convert_json_to_usd)
 
             ui.Label("PhysX-based interactivity, particle systems, and live reaction views coming soon...")
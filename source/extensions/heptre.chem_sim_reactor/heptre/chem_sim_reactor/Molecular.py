@@ -1,15 +1,29 @@
 from typing import List, Tuple, Dict
 
 class Atom:
-    def __init__(self, id: str, element: str, color: str = "#808080"):
+    def __init__(self, id: str, element: str, color: str = "#808080", charge: int = 0):
         self.id = id              # Unique identifier
         self.element = element    # e.g., "H", "O", "C"
         self.color = color
+        self.charge = charge      # formal charge
+
+    def to_dict(self) -> Dict:
+        d = {"id": self.id, "element": self.element, "color": self.color}
+        if self.charge:
+            d["charge"] = self.charge
+        return d
 
 class Bond:
-    def __init__(self, from_atom: str, to_atom: str):
+    def __init__(self, from_atom: str, to_atom: str, order: float = 1):
         self.from_atom = from_atom  # Atom ID
         self.to_atom = to_atom      # Atom ID
+        self.order = order          # 1, 2, 3; 1.5 for aromatic
+
+    def to_dict(self) -> Dict:
+        d = {"from_atom": self.from_atom, "to_atom": self.to_atom}
+        if self.order != 1:
+            d["order"] = self.order
+        return d
 
 class MolecularStructure:
     def __init__(
@@ -26,6 +40,16 @@ class MolecularStructure:
         self.formula = formula  # New
         self.description = description  # New
 
+    def to_dict(self) -> Dict:
+        """The stored-JSON form, as the LLM and Firebase use it."""
+        return {
+            "name": self.name,
+            "formula": self.formula,
+            "description": self.description,
+            "atoms": [a.to_dict() for a in self.atoms],
+            "bonds": [b.to_dict() for b in self.bonds],
+        }
+
     def get_element_color_map(self) -> Dict[str, str]:
         return {
             atom.element: atom.color
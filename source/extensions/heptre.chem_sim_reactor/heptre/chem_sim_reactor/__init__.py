@@ -8,4 +8,10 @@
 # without an express license agreement from NVIDIA CORPORATION or
 # its affiliates is strictly prohibited.
 
-from .extension import *
+try:
+    import omni.ext  # noqa: F401
+except ImportError:
+    # headless: slab worker processes (domain.py) import the engines without Kit
+    pass
+else:
+    from .extension import *
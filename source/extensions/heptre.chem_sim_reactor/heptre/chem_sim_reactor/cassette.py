@@ -0,0 +1,327 @@
+# cassette.py – record/replay of OpenAI and Firebase traffic for offline runs and benchmarks
+# ------------------------------------------------------------------ #
+import asyncio
+import atexit
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import AsyncIterator, Callable, Dict, List, Optional, Union
+
+from dotenv import load_dotenv
+
+# switched on from the environment (or the extension's .env)
+CASSETTE_ENV = "CHEMSIM_CASSETTE"            # path of the cassette file
+MODE_ENV = "CHEMSIM_CASSETTE_MODE"           # "record" or "replay" (default)
+LATENCY_ENV = "CHEMSIM_CASSETTE_LATENCY"     # "recorded", "0.2" or "llm=2,rtdb=0.1,storage=0.5"
+SCALE_ENV = "CHEMSIM_CASSETTE_SCALE"         # factor on every simulated delay, e.g. "0" for none
+
+VERSION = 1
+
+_active = None
+_active_loaded = False
+
+
+class CassetteMiss(KeyError):
+    """A replayed request that was never recorded."""
+
+
+def request_key(request: dict) -> str:
+    """Stable key of an LLM request: everything that shapes the reply, credentials excluded."""
+    shaped = {k: v for k, v in request.items() if k not in ("api_key", "api_base", "stream")}
+    return hashlib.sha256(json.dumps(shaped, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()[:32]
+
+
+def parse_latency(text: Optional[str]):
+    """LATENCY_ENV syntax -> the `latency` argument of Cassette."""
+    text = (text or "").strip()
+    if not text or text == "recorded":
+        return "recorded"
+    if "=" not in text:
+        return float(text)
+    return {kind.strip(): float(value) for kind, value in (part.split("=", 1) for part in text.split(","))}
+
+
+class Cassette:
+    """
+    Recorded OpenAI completions and Firebase RTDB / Storage calls, in one
+    JSON file:
+
+        {"version": 1,
+         "llm":     {request key: [{"reply", "deltas", "first", "elapsed"}, ...]},
+         "rtdb":    {path: [{"value", "elapsed"}, ...]},          reads, in order
+         "writes":  {path: elapsed},                              last write time
+         "storage": {blob path: {"upload" | "public": {"result", "elapsed"}}}}
+
+    In "record" mode every call goes to the real service and its result and
+    wall time are appended; `save` (also run at exit) writes the file. In
+    "replay" mode nothing touches the network: replies come from the file
+    and each call sleeps a simulated latency –
+
+        latency="recorded"   the time the call took when recorded
+        latency=0.2          a fixed 0.2 s per call
+        latency={"llm": 2}   fixed per kind; other kinds as recorded
+
+    – times `scale`, so `scale=0` replays as fast as possible. Repeated
+    identical requests replay their recordings in turn; RTDB paths replay
+    their reads in order, the last one repeating, and a path written during
+    the replay reads back what was written.
+
+    Fields:
+        hits, misses   replayed calls served / not found in the file
+    """
+    def __init__(self, path: str, mode: str = "replay",
+                 latency: Union[str, float, Dict[str, float]] = "recorded", scale: float = 1.0):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"cassette mode must be 'record' or 'replay', not {mode!r}")
+        self.path = path
+        self.mode = mode
+        self.latency = latency
+        self.scale = scale
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._data = {"version": VERSION, "llm": {}, "rtdb": {}, "writes": {}, "storage": {}}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self._data.update(json.load(f))
+        elif mode == "replay":
+            raise FileNotFoundError(f"no cassette at {path}")
+        self._turns: Dict[str, int] = {}       # replay position per LLM key / RTDB path
+        self._written: Dict[str, object] = {}  # RTDB writes made during this replay
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    def save(self):
+        """Write the recordings to `path` (atomically); a replaying cassette is left as it was."""
+        if self.replaying:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with self._lock, open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._data, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    # ---------- latency -----------------------------------------------------------
+    def delay(self, kind: str, recorded: float) -> float:
+        """Simulated seconds for one `kind` call that took `recorded` seconds when recorded."""
+        latency = self.latency
+        if isinstance(latency, dict):
+            latency = latency.get(kind, "recorded")
+        seconds = recorded if latency == "recorded" else float(latency)
+        return max(0.0, seconds * self.scale)
+
+    # ---------- LLM -------------------------------------------------------------------
+    def record_llm(self, request: dict, reply: Optional[str] = None, deltas: Optional[List[str]] = None,
+                   first: float = 0.0, elapsed: float = 0.0):
+        entry = {"reply": reply if reply is not None else "".join(deltas or []), "deltas": deltas,
+                 "first": first, "elapsed": elapsed}
+        with self._lock:
+            self._data["llm"].setdefault(request_key(request), []).append(entry)
+
+    def replay_llm(self, request: dict) -> dict:
+        key = request_key(request)
+        with self._lock:
+            entries = self._data["llm"].get(key)
+            if not entries:
+                self.misses += 1
+                raise CassetteMiss(f"no recorded completion for request {key}")
+            turn = self._turns.get(key, 0)
+            self._turns[key] = turn + 1
+            self.hits += 1
+        return entries[turn % len(entries)]
+
+    # ---------- RTDB -------------------------------------------------------------------
+    def rtdb_get(self, path: str, fetch: Optional[Callable[[], object]] = None):
+        if not self.replaying:
+            t0 = time.perf_counter()
+            value = fetch()
+            with self._lock:
+                self._data["rtdb"].setdefault(path, []).append({"value": value, "elapsed": time.perf_counter() - t0})
+            return value
+        with self._lock:
+            written = self._written_value(path)
+            reads = self._data["rtdb"].get(path)
+            if reads:
+                turn = self._turns.get(path, 0)
+                self._turns[path] = turn + 1
+                read = reads[min(turn, len(reads) - 1)]
+                value, elapsed = read["value"], read["elapsed"]
+                self.hits += 1
+            else:
+                value, elapsed = None, 0.0          # never read while recording
+                if written is _UNSET:
+                    self.misses += 1
+            if written is not _UNSET:
+                value = written
+        time.sleep(self.delay("rtdb", elapsed))
+        return json.loads(json.dumps(value))      # callers may mutate what they get
+
+    def rtdb_set(self, path: str, value, store: Optional[Callable[[object], None]] = None):
+        if not self.replaying:
+            t0 = time.perf_counter()
+            store(value)
+            with self._lock:
+                self._data["writes"][path] = time.perf_counter() - t0
+            return
+        with self._lock:
+            self._written[path] = json.loads(json.dumps(value))
+            elapsed = self._data["writes"].get(path, 0.0)
+        time.sleep(self.delay("rtdb", elapsed))
+
+    def _written_value(self, path: str):
+        """What this replay wrote at `path` or above it, else _UNSET."""
+        parts = path.strip("/").split("/")
+        for i in range(len(parts), 0, -1):
+            prefix = "/".join(parts[:i])
+            if prefix in self._written:
+                value = self._written[prefix]
+                for key in parts[i:]:
+                    value = value.get(key) if isinstance(value, dict) else None
+                return value
+        return _UNSET
+
+    # ---------- Storage -------------------------------------------------------------------
+    def storage_call(self, blob_path: str, op: str, fn: Optional[Callable[[], object]] = None, default=None):
+        """`fn()` for blob operation `op` ("upload", "public") when recording; its recorded result when replaying."""
+        if not self.replaying:
+            t0 = time.perf_counter()
+            result = fn()
+            with self._lock:
+                self._data["storage"].setdefault(blob_path, {})[op] = {"result": result,
+                                                                      "elapsed": time.perf_counter() - t0}
+            return result
+        with self._lock:
+            entry = self._data["storage"].get(blob_path, {}).get(op)
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        time.sleep(self.delay("storage", entry["elapsed"] if entry else 0.0))
+        return entry["result"] if entry else default
+
+
+_UNSET = object()
+
+
+# ---------- drop-in stand-ins ------------------------------------------------------------
+class CassetteTransport:
+    """
+    LLMClient transport through a cassette: records what `inner` (an
+    OpenAITransport) answers, or replays it without a network.
+    """
+    def __init__(self, cassette: Cassette, inner=None):
+        if inner is None and not cassette.replaying:
+            raise ValueError("a recording CassetteTransport needs the real transport")
+        self.cassette = cassette
+        self.inner = inner
+
+    async def __call__(self, request: dict) -> str:
+        if not self.cassette.replaying:
+            t0 = time.perf_counter()
+            reply = await self.inner(request)
+            elapsed = time.perf_counter() - t0
+            self.cassette.record_llm(request, reply=reply, first=elapsed, elapsed=elapsed)
+            return reply
+        entry = self.cassette.replay_llm(request)
+        await asyncio.sleep(self.cassette.delay("llm", entry["elapsed"]))
+        return entry["reply"]
+
+    async def stream(self, request: dict) -> AsyncIterator[str]:
+        if not self.cassette.replaying:
+            deltas, first, t0 = [], None, time.perf_counter()
+            source = self.inner.stream(request) if hasattr(self.inner, "stream") else None
+            if source is None:
+                deltas.append(await self.inner(request))
+                first = time.perf_counter() - t0
+                yield deltas[0]
+            else:
+                async for delta in source:
+                    if first is None:
+                        first = time.perf_counter() - t0
+                    deltas.append(delta)
+                    yield delta
+            self.cassette.record_llm(request, deltas=deltas, first=first or 0.0, elapsed=time.perf_counter() - t0)
+            return
+        entry = self.cassette.replay_llm(request)
+        deltas = entry.get("deltas") or [entry["reply"]]
+        total = self.cassette.delay("llm", entry["elapsed"])
+        # time to first delta as recorded (in proportion), the rest spread evenly
+        share = entry["first"] / entry["elapsed"] if entry["elapsed"] else 1.0
+        await asyncio.sleep(total * share)
+        rest = total * (1.0 - share) / max(1, len(deltas) - 1)
+        for i, delta in enumerate(deltas):
+            if i:
+                await asyncio.sleep(rest)
+            yield delta
+
+
+class CassetteRef:
+    """Firebase RTDB reference (`child` / `get` / `set`) through a cassette; `inner` is the real one when recording."""
+    def __init__(self, cassette: Cassette, path: str, inner=None):
+        self.cassette = cassette
+        self.path = path.strip("/")
+        self.inner = inner
+
+    def child(self, key: str) -> "CassetteRef":
+        return CassetteRef(self.cassette, f"{self.path}/{key}", self.inner.child(key) if self.inner is not None else None)
+
+    def get(self):
+        return self.cassette.rtdb_get(self.path, self.inner.get if self.inner is not None else None)
+
+    def set(self, value):
+        self.cassette.rtdb_set(self.path, value, self.inner.set if self.inner is not None else None)
+
+
+class CassetteBlob:
+    """The part of a Storage blob the upload path uses: upload, make public, public URL."""
+    def __init__(self, bucket: "CassetteBucket", path: str):
+        self.bucket = bucket
+        self.name = path
+        self.inner = bucket.inner.blob(path) if bucket.inner is not None else None
+        self.public_url = None
+
+    def upload_from_filename(self, filename: str):
+        upload = (lambda: self.inner.upload_from_filename(filename)) if self.inner is not None else None
+        self.bucket.cassette.storage_call(self.name, "upload", upload)
+
+    def make_public(self):
+        def publish() -> str:
+            self.inner.make_public()
+            return self.inner.public_url
+
+        self.public_url = self.bucket.cassette.storage_call(
+            self.name, "public", publish if self.inner is not None else None,
+            default=f"https://storage.googleapis.com/{self.bucket.name}/{self.name}")
+
+
+class CassetteBucket:
+    """Storage bucket through a cassette. The upload itself happens, or is replayed, at `make_public`."""
+    def __init__(self, cassette: Cassette, inner=None, name: str = "offline"):
+        self.cassette = cassette
+        self.inner = inner
+        self.name = inner.name if inner is not None else name
+
+    def blob(self, path: str) -> CassetteBlob:
+        return CassetteBlob(self, path)
+
+    def exists(self) -> bool:
+        return self.inner.exists() if self.inner is not None else True
+
+
+def active_cassette() -> Optional[Cassette]:
+    """The cassette named by CASSETTE_ENV, opened once per process; None when it isn't set."""
+    global _active, _active_loaded
+    if not _active_loaded:
+        _active_loaded = True
+        load_dotenv(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env"))
+        path = os.getenv(CASSETTE_ENV)
+        if path:
+            _active = Cassette(path, os.getenv(MODE_ENV, "replay"), parse_latency(os.getenv(LATENCY_ENV)),
+                               float(os.getenv(SCALE_ENV, "1")))
+            if not _active.replaying:
+                atexit.register(_active.save)
+    return _active
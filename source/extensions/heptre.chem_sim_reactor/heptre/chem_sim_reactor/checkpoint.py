@@ -0,0 +1,353 @@
+# checkpoint.py – memory-mappable checkpoint / restart for the MD and particle engines
+# ------------------------------------------------------------------ #
+import glob
+import json
+import os
+import re
+import struct
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from . import thermostats
+
+# File layout, little-endian:
+#   0   header   magic, version, metadata length, data offset, data length (64 bytes)
+#   64  metadata UTF-8 JSON: engine kind, scalars, RNG state, reaction network,
+#                array table {name: {dtype, shape, offset, nbytes}}
+#   D   data     raw C-order arrays, each starting on a 64-byte boundary
+# Offsets in the array table are relative to D, so every array can be mapped
+# straight out of the file with np.memmap – no parsing, no copy.
+MAGIC = b"CHEMCKPT"
+VERSION = 1
+ALIGN = 64
+_HEADER = struct.Struct("<8sIIQQ")
+HEADER_SIZE = 64
+EXTENSION = ".ckpt"
+
+
+def _aligned(n: int) -> int:
+    return -(-n // ALIGN) * ALIGN
+
+
+# ---------- raw file format ----------------------------------------------------
+def write_checkpoint(path: str, meta: dict, arrays: Dict[str, np.ndarray]) -> str:
+    """
+    Write `meta` and `arrays` to `path` atomically: the file is written and
+    fsynced under a temporary name and then renamed over `path`, so a reader
+    or a crash mid-write only ever sees the previous complete checkpoint.
+    """
+    arrays = {k: np.ascontiguousarray(a) for k, a in arrays.items()}
+    table, offset = {}, 0
+    for name, a in arrays.items():
+        table[name] = {"dtype": a.dtype.str, "shape": list(a.shape), "offset": offset, "nbytes": a.nbytes}
+        offset = _aligned(offset + a.nbytes)
+    blob = json.dumps(dict(meta, arrays=table)).encode("utf-8")
+    data_offset = _aligned(HEADER_SIZE + len(blob))
+
+    folder = os.path.dirname(os.path.abspath(path))
+    os.makedirs(folder, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, VERSION, len(blob), data_offset, offset).ljust(HEADER_SIZE, b"\0"))
+            f.write(blob)
+            for name, a in arrays.items():
+                f.seek(data_offset + table[name]["offset"])
+                f.write(memoryview(a).cast("B") if a.nbytes else b"")
+            f.truncate(data_offset + offset)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return path
+
+
+def read_checkpoint(path: str, mmap: bool = True) -> Tuple[dict, Dict[str, np.ndarray]]:
+    """
+    (metadata, arrays) of a checkpoint. With `mmap` the arrays are read-only
+    views on a memory map of the file, paged in only when touched; otherwise
+    they are private in-memory copies.
+    """
+    with open(path, "rb") as f:
+        magic, version, meta_len, data_offset, data_len = _HEADER.unpack(f.read(_HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a checkpoint file")
+        if version > VERSION:
+            raise ValueError(f"{path} has checkpoint version {version}, newer than {VERSION}")
+        f.seek(HEADER_SIZE)
+        meta = json.loads(f.read(meta_len).decode("utf-8"))
+        raw = None
+        if not mmap and data_len:
+            f.seek(data_offset)
+            raw = np.frombuffer(bytearray(f.read(data_len)), dtype=np.uint8)
+    if mmap and data_len:
+        raw = np.memmap(path, dtype=np.uint8, mode="r", offset=data_offset, shape=(data_len,))
+
+    arrays = {}
+    for name, spec in meta.pop("arrays").items():
+        dtype = np.dtype(spec["dtype"])
+        start = spec["offset"]
+        if spec["nbytes"]:
+            a = raw[start:start + spec["nbytes"]].view(dtype).reshape(spec["shape"])
+        else:
+            a = np.empty(spec["shape"], dtype=dtype)
+        arrays[name] = a
+    return meta, arrays
+
+
+# ---------- engine state ------------------------------------------------------------
+def _rng_state(rng: np.random.Generator) -> dict:
+    return rng.bit_generator.state
+
+
+def _restore_rng(state: dict) -> np.random.Generator:
+    bit_generator = getattr(np.random, state["bit_generator"])()
+    bit_generator.state = state
+    return np.random.Generator(bit_generator)
+
+
+def _coupling_state(obj) -> Optional[dict]:
+    """Parameters of a thermostat or barostat; the live `conditions` link is re-attached on load."""
+    if obj is None:
+        return None
+    state = {"kind": type(obj).__name__}
+    for key in ("temperature_k", "tau", "xi", "pressure_atm", "compressibility"):
+        if hasattr(obj, key):
+            state[key] = getattr(obj, key)
+    if hasattr(obj, "rng"):
+        state["rng"] = _rng_state(obj.rng)
+    return state
+
+
+def _restore_coupling(state: Optional[dict], conditions=None):
+    if state is None:
+        return None
+    state = dict(state)
+    cls = getattr(thermostats, state.pop("kind"))
+    rng = state.pop("rng", None)
+    xi = state.pop("xi", None)
+    obj = cls(**state, conditions=conditions)
+    if rng is not None:
+        obj.rng = _restore_rng(rng)
+    if xi is not None:
+        obj.xi = xi
+    return obj
+
+
+def _particle_state(s) -> Tuple[dict, Dict[str, np.ndarray]]:
+    meta = {
+        "names": s.names, "box": s.box, "contact": s.contact, "mode": s.mode,
+        "temperature_k": s.temperature_k, "time": s.time, "n_steps": s.n_steps,
+        "n_reacted": s.n_reacted, "next_id": s._next_id,
+        "reactions": [{"a": r.a, "b": r.b, "products": r.products, "Ea": r.Ea, "steric": r.steric}
+                      for r in s.reactions],
+    }
+    arrays = {"pos": s.pos, "vel": s.vel, "species": s.species, "ids": s.ids,
+              "diffusion": s.diffusion, "mass": s.mass}
+    if s._cell_order is not None:
+        # the spatial sort permutes by last step's cell order; it decides the next RNG draws
+        arrays["cell_order"] = s._cell_order
+    return meta, arrays
+
+
+def _restore_particles(meta: dict, arrays: Dict[str, np.ndarray], conditions=None):
+    from .particles import CollisionReaction, ParticleSystem
+
+    s = ParticleSystem(meta["names"], meta["box"], radius=0.5 * meta["contact"],
+                       diffusion=arrays["diffusion"], mass=arrays["mass"],
+                       temperature_k=meta["temperature_k"], mode=meta["mode"],
+                       thermostat=_restore_coupling(meta["thermostat"], conditions),
+                       barostat=_restore_coupling(meta["barostat"], conditions))
+    s.diffusion, s.mass = np.array(arrays["diffusion"]), np.array(arrays["mass"])
+    for r in meta["reactions"]:
+        s.add_reaction(CollisionReaction(r["a"], r["b"], r["products"], r["Ea"], r["steric"]))
+    s.pos, s.vel = np.array(arrays["pos"]), np.array(arrays["vel"])
+    s.species, s.ids = np.array(arrays["species"]), np.array(arrays["ids"])
+    s._cell_order = np.array(arrays["cell_order"]) if "cell_order" in arrays else None
+    s._next_id, s.time, s.n_steps, s.n_reacted = meta["next_id"], meta["time"], meta["n_steps"], meta["n_reacted"]
+    return s
+
+
+def _md_state(s) -> Tuple[dict, Dict[str, np.ndarray]]:
+    meta = {
+        "elements": s.elements, "box": s.box, "cutoff": s.cutoff, "skin": s.skin, "dt": s.dt,
+        "time": s.time, "n_steps": s.n_steps, "n_rebuilds": s.n_rebuilds,
+        "potential": s.potential, "virial": s.virial,
+    }
+    # the Verlet list is saved as built: rebuilding it would reorder the force sums
+    arrays = {"x": s.x, "v": s.v, "f": s.f, "bonds": s.bonds, "molecule": s.molecule, "charge": s.charge,
+              "pi": s._pi, "pj": s._pj, "x_built": s._x_built}
+    return meta, arrays
+
+
+def _restore_md(meta: dict, arrays: Dict[str, np.ndarray], conditions=None):
+    from .md import MDSystem, _pair_params
+
+    s = MDSystem(meta["elements"], np.array(arrays["x"]).T, arrays["bonds"], meta["box"],
+                 molecule=arrays["molecule"], charges=np.array(arrays["charge"]),
+                 cutoff=meta["cutoff"], skin=meta["skin"], dt=meta["dt"],
+                 thermostat=_restore_coupling(meta["thermostat"], conditions),
+                 barostat=_restore_coupling(meta["barostat"], conditions))
+    s.x, s.v, s.f = np.array(arrays["x"]), np.array(arrays["v"]), np.array(arrays["f"])
+    s._pi, s._pj = np.array(arrays["pi"]), np.array(arrays["pj"])
+    s._pair = _pair_params(s._pi, s._pj, s.sigma, s.epsilon, s.charge, s.cutoff)
+    s._x_built = np.array(arrays["x_built"])
+    s.time, s.n_steps, s.n_rebuilds = meta["time"], meta["n_steps"], meta["n_rebuilds"]
+    s.potential, s.virial = meta["potential"], meta["virial"]
+    return s
+
+
+_ENGINES = {
+    "ParticleSystem": ("particles", _particle_state),
+    "MDSystem": ("md", _md_state),
+}
+_RESTORE = {"particles": _restore_particles, "md": _restore_md}
+
+
+def capture_state(system) -> Tuple[dict, Dict[str, np.ndarray]]:
+    """
+    (metadata, arrays) snapshot of an engine, with the arrays copied so the
+    engine may keep stepping while the snapshot is written elsewhere.
+    """
+    try:
+        engine, state = _ENGINES[type(system).__name__]
+    except KeyError:
+        raise TypeError(f"cannot checkpoint {type(system).__name__}") from None
+    meta, arrays = state(system)
+    meta.update(engine=engine, created=time.time(), rng=_rng_state(system.rng),
+                thermostat=_coupling_state(system.thermostat), barostat=_coupling_state(system.barostat))
+    # JSON round trip drops numpy scalars and aliasing with live engine state
+    meta = json.loads(json.dumps(meta, default=lambda o: o.tolist()))
+    return meta, {k: np.array(a, copy=True) for k, a in arrays.items()}
+
+
+def restore_state(meta: dict, arrays: Dict[str, np.ndarray], conditions=None):
+    """Rebuild the engine saved by `capture_state`; `conditions` re-links thermostat and barostat targets."""
+    system = _RESTORE[meta["engine"]](meta, arrays, conditions)
+    system.rng = _restore_rng(meta["rng"])
+    return system
+
+
+def save_checkpoint(path: str, system) -> str:
+    """Checkpoint `system` to `path` synchronously."""
+    return write_checkpoint(path, *capture_state(system))
+
+
+def load_checkpoint(path: str, conditions=None):
+    """The engine stored at `path`, positioned to continue bit-for-bit where it was saved."""
+    return restore_state(*read_checkpoint(path), conditions=conditions)
+
+
+def list_checkpoints(folder: str, prefix: str = "ckpt"):
+    """Checkpoints written by a `Checkpointer` into `folder`, oldest step first."""
+    pattern = re.compile(re.escape(prefix) + r"_(\d+)" + re.escape(EXTENSION) + "$")
+    found = []
+    for path in glob.glob(os.path.join(glob.escape(folder), f"{prefix}_*{EXTENSION}")):
+        m = pattern.search(os.path.basename(path))
+        if m:
+            found.append((int(m.group(1)), path))
+    return [p for _, p in sorted(found)]
+
+
+def latest_checkpoint(folder: str, prefix: str = "ckpt") -> Optional[str]:
+    paths = list_checkpoints(folder, prefix)
+    return paths[-1] if paths else None
+
+
+# ---------- periodic background checkpoints -----------------------------------
+class Checkpointer:
+    """
+    Periodic checkpoints that never stall the step loop. `maybe(system)` is
+    called after every step from the stepping thread; once `every` steps
+    have passed it copies the engine state (a memcpy of the arrays, the
+    only part that must see a consistent engine) and hands it to a writer
+    thread, which serializes it, fsyncs and renames it into place as
+    `<folder>/<prefix>_<step>.ckpt`. Only the newest `keep` files are kept.
+
+    If the writer is still busy when the next checkpoint is due, the older
+    pending snapshot is replaced rather than queued, so a slow disk costs
+    checkpoint frequency, never simulation speed or memory.
+
+    Fields:
+        written     checkpoints completed
+        skipped     snapshots superseded before they were written
+        last_path   newest completed checkpoint
+        error       exception from the writer thread, if one failed
+    """
+    def __init__(self, folder: str, every: int = 1000, *, keep: int = 3, prefix: str = "ckpt"):
+        self.folder, self.every, self.keep, self.prefix = folder, every, keep, prefix
+        self.written = 0
+        self.skipped = 0
+        self.last_path: Optional[str] = None
+        self.error: Optional[BaseException] = None
+        self._last_step: Optional[int] = None
+        self._pending = None
+        self._cond = threading.Condition()
+        self._closed = False
+        self._busy = False
+        self._thread = threading.Thread(target=self._loop, name="chem_sim_reactor.checkpoint", daemon=True)
+        self._thread.start()
+
+    def path_for(self, step: int) -> str:
+        return os.path.join(self.folder, f"{self.prefix}_{step:010d}{EXTENSION}")
+
+    def maybe(self, system) -> bool:
+        """Snapshot `system` if `every` steps have passed since the last one; True if it did."""
+        step = system.n_steps
+        if self._last_step is None:
+            self._last_step = step - step % self.every       # checkpoints land on multiples of `every`
+        if step - self._last_step < self.every:
+            return False
+        self.submit(system)
+        return True
+
+    def submit(self, system):
+        """Snapshot `system` now and queue it for writing."""
+        state = capture_state(system)
+        self._last_step = system.n_steps
+        with self._cond:
+            if self._pending is not None:
+                self.skipped += 1
+            self._pending = (self.path_for(system.n_steps), state)
+            self._cond.notify()
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._closed:
+                    self._cond.wait()
+                if self._pending is None:
+                    return
+                (path, (meta, arrays)), self._pending = self._pending, None
+                self._busy = True
+            try:
+                write_checkpoint(path, meta, arrays)
+                self.last_path = path
+                self.written += 1
+                paths = list_checkpoints(self.folder, self.prefix)
+                for old in paths[:max(len(paths) - self.keep, 0)]:
+                    os.remove(old)
+            except BaseException as e:
+                self.error = e
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every submitted snapshot is on disk; False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._pending is None and not self._busy, timeout)
+
+    def close(self, timeout: Optional[float] = None):
+        """Write what is pending, then stop the writer thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
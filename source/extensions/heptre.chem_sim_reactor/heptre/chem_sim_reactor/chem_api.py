@@ -1,16 +1,19 @@
 from fastapi import FastAPI, Request
 from pydantic import BaseModel
+import asyncio
 import json
 import logging
 import os
 import re
 from .Molecular import Atom, Bond, MolecularStructure
-import hashlib
 # Load environment variables
 from dotenv import load_dotenv
 from .firebase_utils import get_firebase_reactions_ref, get_firebase_compounds_ref
 
-from .gpt_utils import query_gpt_and_store_if_missing
+from .gpt_utils import (query_gpt_and_store_if_missing, query_gpt_and_store_if_missing_async, find_stored_reaction,
+                        library_version)
+from .network import load_reaction_network
+from .pathways import find_pathways
 
 dotenv_path = os.path.join(os.path.dirname(__file__), ".env")
 load_dotenv(dotenv_path)
@@ -33,19 +36,16 @@ logger = logging.getLogger("uvicorn")
 class ReactionRequest(BaseModel):
     reaction_name: str
 
-def generate_reaction_id(prompt: str) -> str:
-    return hashlib.sha256(prompt.encode()).hexdigest()[:16]
-
-
 # Parser Helper
 def parse_molecular_structure(data):
     atoms = [Atom(
         id=a["id"],
         element=a["element"],
-        color=a.get("color", "#808080")
+        color=a.get("color", "#808080"),
+        charge=a.get("charge", 0)
     ) for a in data["atoms"]]
 
-    bonds = [Bond(from_atom=b["from_atom"], to_atom=b["to_atom"]) for b in data["bonds"]]
+    bonds = [Bond(from_atom=b["from_atom"], to_atom=b["to_atom"], order=b.get("order", 1)) for b in data["bonds"]]
 
     return MolecularStructure(
         name=data["name"],
@@ -59,13 +59,13 @@ def parse_molecular_structure(data):
 # Main Reaction Endpoint
 @app.post("/get-reaction")
 async def get_reaction(request: ReactionRequest):
-    return query_gpt_and_store_if_missing(request.reaction_name)
+    return await query_gpt_and_store_if_missing_async(request.reaction_name)
 
 # GET version (Optional)
 @app.get("/get-reaction/{reaction_name}")
 async def get_stored_reaction(reaction_name: str):
-    reaction_id = generate_reaction_id(reaction_name)
-    reaction_snapshot = firebase_reactions.child(reaction_id).get()
+    # a cold lookup reads Firebase and builds the prompt index: keep it off the event loop
+    _, reaction_snapshot = await asyncio.to_thread(find_stored_reaction, reaction_name)
     if not reaction_snapshot:
         return {"error": "Reaction not found."}
 
@@ -74,6 +74,39 @@ async def get_stored_reaction(reaction_name: str):
 
     return {"reaction": {"reactants": reactants, "products": products}}
 
+# Reaction network, built from the whole library on first use and rebuilt once a new reaction is stored
+_reaction_network = None
+_reaction_network_version = None
+_reaction_network_lock = asyncio.Lock()
+
+async def get_reaction_network(refresh: bool = False):
+    global _reaction_network, _reaction_network_version
+    async with _reaction_network_lock:
+        version = library_version()
+        if _reaction_network is None or refresh or version != _reaction_network_version:
+            # reads the whole reactions and compounds trees from Firebase: off the event loop
+            _reaction_network = await asyncio.to_thread(load_reaction_network, firebase_reactions,
+                                                        firebase_compounds)
+            _reaction_network_version = version
+            logger.info(f"Reaction network: {_reaction_network.n_species} species, "
+                        f"{_reaction_network.n_reactions} reactions")
+        return _reaction_network
+
+# Pathway search over stored reactions – no LLM call
+@app.get("/pathway")
+async def get_pathway(start: str, target: str, cost: str = "steps", limit: int = 5, max_steps: int = 8,
+                      avoid: str = "", refresh: bool = False):
+    network = await get_reaction_network(refresh)
+    try:
+        pathways = find_pathways(network, start, target, cost=cost, limit=limit, max_steps=max_steps,
+                                 avoid=[a for a in avoid.split(",") if a.strip()])
+    except KeyError as e:
+        return {"error": f"Species not in the reaction library: {e.args[0]}"}
+    except ValueError as e:
+        return {"error": str(e)}
+    return {"start": start, "target": target, "cost": cost,
+            "pathways": [p.to_dict(network) for p in pathways]}
+
 def get_molecule_structure(prompt: str):
     result = query_gpt_and_store_if_missing(prompt)
     return result
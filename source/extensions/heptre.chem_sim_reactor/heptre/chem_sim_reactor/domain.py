@@ -0,0 +1,433 @@
+# domain.py – shared-memory slab decomposition for the particle and MD engines
+# ------------------------------------------------------------------ #
+import multiprocessing as mp
+import os
+import threading
+from multiprocessing import shared_memory
+from typing import Dict, Optional
+
+import numpy as np
+
+from .md import ACCEL, MDSystem, _angle_terms, _bond_terms, _minimum_image, _nonbonded_terms, _pair_params
+from .particles import ParticleSystem, cell_list_pairs
+
+# ctrl (int64): command, steps in the batch, live particle count, neighbour-list builds
+_CMD, _STEPS, _COUNT, _BUILDS = range(4)
+_RUN, _STOP = 1, 2
+# fctrl (float64): time step, temperature
+_DT, _TEMP = range(2)
+
+
+class SharedArrays:
+    """
+    Named numpy arrays living in `multiprocessing.shared_memory` blocks.
+
+    The creating process copies the initial values in once and owns the
+    blocks (`release()` unlinks them); workers `attach()` through the
+    picklable `spec` and get views onto the very same memory.
+    """
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self.spec, self.arrays, self._blocks = {}, {}, []
+        for name, a in arrays.items():
+            a = np.asarray(a)
+            shm = shared_memory.SharedMemory(create=True, size=max(a.nbytes, 1))
+            view = np.ndarray(a.shape, a.dtype, buffer=shm.buf)
+            view[...] = a
+            self._blocks.append(shm)
+            self.spec[name] = (shm.name, a.shape, a.dtype.str)
+            self.arrays[name] = view
+
+    @staticmethod
+    def attach(spec):
+        """(arrays, blocks) for a `spec`; the blocks must outlive every view."""
+        arrays, blocks = {}, []
+        for name, (shm_name, shape, dtype) in spec.items():
+            shm = shared_memory.SharedMemory(name=shm_name)
+            blocks.append(shm)
+            arrays[name] = np.ndarray(shape, np.dtype(dtype), buffer=shm.buf)
+        return arrays, blocks
+
+    def release(self):
+        """Close and unlink every block; no view onto them may be alive."""
+        self.arrays = {}
+        for shm in self._blocks:
+            shm.close()
+            shm.unlink()
+        self._blocks = []
+
+
+def slab_members(x0: np.ndarray, box: float, n_slabs: int, rank: int, halo: float):
+    """
+    (owned, ghost) indices for slab `rank` of `n_slabs` equal slabs along x.
+    `x0` are x coordinates in [0, box). Ownership is a partition – every
+    process evaluates the same float32 expression – and ghosts are the other
+    particles within `halo` of the slab across either (periodic) face.
+    """
+    width = box / n_slabs
+    slab = np.minimum((x0 * np.float32(n_slabs / box)).astype(np.intp), n_slabs - 1)
+    mine = slab == rank
+    rel = np.mod(x0.astype(np.float64) - rank * width, box)   # distance past the low face
+    near = (rel < width + halo) | (rel > box - halo)
+    return np.flatnonzero(mine), np.flatnonzero(near & ~mine)
+
+
+# ---------- worker side --------------------------------------------------------
+class _MDSlab:
+    """
+    One slab of an MDSystem. Owned atoms are fixed between neighbour-list
+    builds; the list holds owned–owned pairs once and owned–ghost pairs from
+    the owned side only, so every process writes forces for its own atoms and
+    nobody ever writes another slab's rows.
+    """
+    def __init__(self, rank, n_workers, a, params, seed):
+        self.rank, self.n_workers, self.a = rank, n_workers, a
+        self.box, self.cutoff, self.skin = params["box"], params["cutoff"], params["skin"]
+        self.rebuild()
+
+    def rebuild(self):
+        a, x = self.a, self.a["x"]
+        n = x.shape[1]
+        owned, ghost = slab_members(x[0], self.box, self.n_workers, self.rank, self.cutoff + self.skin)
+        local = np.concatenate([owned, ghost])
+        n_own = len(owned)
+        loc = np.full(n, -1, dtype=np.intp)
+        loc[local] = np.arange(len(local))
+
+        i, j, _ = cell_list_pairs(np.ascontiguousarray(x[:, local].T), self.box, self.cutoff + self.skin)
+        keep = (i < n_own) | (j < n_own)
+        i, j = i[keep], j[keep]
+        gi, gj = local[i], local[j]
+        excluded = a["excluded"]
+        if len(excluded):
+            key = np.minimum(gi, gj) * n + np.maximum(gi, gj)
+            keep = ~np.isin(key, excluded)
+            i, j, gi, gj = i[keep], j[keep], gi[keep], gj[keep]
+        self._pi, self._pj = i, j
+        self._pair = _pair_params(gi, gj, a["sigma"], a["epsilon"], a["charge"], self.cutoff)
+
+        # bonded terms touching an owned atom; partners sit well inside the halo
+        own = np.zeros(n, dtype=bool)
+        own[owned] = True
+        bonds, angles = a["bonds"], a["angles"]
+        hit = own[bonds].any(axis=1)
+        self._bonds, self._r0 = loc[bonds[hit]], a["r0"][hit]
+        hit = own[angles].any(axis=1)
+        self._angles, self._theta0 = loc[angles[hit]], a["theta0"][hit]
+
+        self.owned, self.local, self.n_own = owned, local, n_own
+        self._half = np.float32(0.5 * ACCEL) * a["inv_mass"][owned]
+        self._x_built = x[:, owned].copy()
+        a["ctrl"][_BUILDS] += self.rank == 0
+
+    def forces(self):
+        a, n_own = self.a, self.n_own
+        x = a["x"][:, self.local]
+        nl = len(self.local)
+        idx, wx, wy, wz = [], [], [], []
+
+        def push(atoms, w):
+            idx.append(atoms)
+            wx.append(w[0]); wy.append(w[1]); wz.append(w[2])
+
+        # pair energy is split between the two owners, bonded energy goes to the first atom's
+        i, j, w, e, vir = _nonbonded_terms(x, self._pi, self._pj, self._pair, self.box, self.cutoff)
+        share = 0.5 * ((i < n_own).astype(np.float32) + (j < n_own))
+        energy, virial = float(np.sum(e * share)), float(np.sum(vir * share))
+        push(i, w)
+        push(j, -w)
+        if len(self._bonds):
+            p, q, w, e, vir = _bond_terms(x, self._bonds, self._r0, self.box)
+            energy += float(np.sum(e[p < n_own]))
+            virial += float(np.sum(vir[p < n_own]))
+            push(p, w)
+            push(q, -w)
+        if len(self._angles):
+            p, c, q, fp, fq, e, vir = _angle_terms(x, self._angles, self._theta0, self.box)
+            energy += float(np.sum(e[p < n_own]))
+            virial += float(np.sum(vir[p < n_own]))
+            push(p, fp)
+            push(q, fq)
+            push(c, -(fp + fq))
+
+        atoms = np.concatenate(idx)
+        f = a["f"]
+        o = self.owned
+        f[0, o] = np.bincount(atoms, np.concatenate(wx), nl)[:n_own]
+        f[1, o] = np.bincount(atoms, np.concatenate(wy), nl)[:n_own]
+        f[2, o] = np.bincount(atoms, np.concatenate(wz), nl)[:n_own]
+        a["energy"][self.rank] = energy
+        a["virial"][self.rank] = virial
+
+    def run(self, n_steps, sync):
+        """Velocity-Verlet on the owned atoms, two barriers per step."""
+        a = self.a
+        x, v, f, disp = a["x"], a["v"], a["f"], a["disp"]
+        dt = np.float32(a["fctrl"][_DT])
+        limit = (0.5 * self.skin) ** 2
+        for _ in range(n_steps):
+            o, half = self.owned, self._half * dt
+            vo = v[:, o] + half * f[:, o]
+            xo = np.mod(x[:, o] + dt * vo, np.float32(self.box))
+            xo[xo >= self.box] = 0.0
+            x[:, o], v[:, o] = xo, vo
+            d = _minimum_image(xo - self._x_built, self.box)
+            disp[self.rank] = float(np.max(np.einsum("ij,ij->j", d, d), initial=0.0))
+            sync.wait()                       # every slab has drifted
+            if disp.max() > limit:            # the same decision in every process
+                self.rebuild()
+            self.forces()
+            o = self.owned
+            v[:, o] += (self._half * dt) * f[:, o]
+            sync.wait()                       # nobody drifts while others still read x
+
+
+class _ParticleSlab:
+    """
+    One slab of a ParticleSystem. Ownership follows positions every step.
+    Each process claims and reads its particles, waits until every slab has
+    done the same, moves them, then lists the rule-matching
+    contact pairs whose lower particle index it owns; the coordinator
+    resolves the reactions, which change the particle count.
+    """
+    def __init__(self, rank, n_workers, a, params, seed):
+        self.rank, self.n_workers, self.a = rank, n_workers, a
+        self.box, self.contact, self.mode = params["box"], params["contact"], params["mode"]
+        self.rng = np.random.default_rng(seed)
+
+    def run(self, n_steps, sync):
+        a = self.a
+        n = int(a["ctrl"][_COUNT])
+        pos, vel, species = a["pos"][:n], a["vel"][:n], a["species"][:n]
+        dt, temperature_k = a["fctrl"][_DT], a["fctrl"][_TEMP]
+        box = np.float32(self.box)
+
+        # ownership and start positions are read before anyone writes: a particle another
+        # slab moves across the boundary must not be claimed (and moved) a second time
+        owned, _ = slab_members(pos[:, 0], self.box, self.n_workers, self.rank, 0.0)
+        if self.mode == "brownian":
+            d = a["diffusion"][species[owned]] * np.float32(temperature_k / 298.15)
+            step = np.sqrt(2.0 * d * dt).astype(np.float32)
+            p = pos[owned] + self.rng.standard_normal((len(owned), 3), dtype=np.float32) * step[:, None]
+        else:
+            p = pos[owned] + vel[owned] * np.float32(dt)
+        np.mod(p, box, out=p)
+        p[p >= box] = 0.0
+        sync.wait()                           # every slab has claimed its particles
+        pos[owned] = p
+        sync.wait()                           # all particles have moved
+
+        owned, ghost = slab_members(pos[:, 0], self.box, self.n_workers, self.rank, self.contact)
+        local = np.concatenate([owned, ghost])
+        i, j, _ = cell_list_pairs(pos[local], self.box, self.contact)
+        gi, gj = local[i], local[j]
+        first = np.where(gi < gj, i, j)
+        keep = (first < len(owned)) & (a["rule"][species[gi], species[gj]] >= 0)
+        gi, gj = gi[keep], gj[keep]
+        out = a["pairs"][self.rank]
+        if len(gi) > len(out):                # never in practice: a fair subset keeps it bounded
+            pick = self.rng.choice(len(gi), len(out), replace=False)
+            gi, gj = gi[pick], gj[pick]
+        out[:len(gi), 0], out[:len(gi), 1] = gi, gj
+        a["n_pairs"][self.rank] = len(gi)
+
+
+def _worker_main(kind, rank, n_workers, spec, params, seed, start, sync):
+    arrays, blocks = SharedArrays.attach(spec)
+    slab = ctrl = None
+    try:
+        slab = (_MDSlab if kind == "md" else _ParticleSlab)(rank, n_workers, arrays, params, seed)
+        ctrl = arrays["ctrl"]
+        start.wait()                          # ready
+        while True:
+            start.wait()                      # command posted
+            if ctrl[_CMD] == _STOP:
+                break
+            slab.run(int(ctrl[_STEPS]), sync)
+            start.wait()                      # batch done
+    except BaseException:
+        start.abort()
+        sync.abort()
+        raise
+    finally:
+        del slab, arrays, ctrl
+        for shm in blocks:
+            shm.close()
+
+
+# ---------- coordinator ------------------------------------------------------------
+class SlabDecomposition:
+    """
+    Runs an `MDSystem` or `ParticleSystem` on `n_workers` processes, each
+    owning one slab of the box along x:
+
+        with SlabDecomposition(system, n_workers=8) as run:
+            for _ in range(frames):
+                run.step(20)
+                frames.append(system.snapshot())
+
+    The system's state arrays are moved into shared memory and the system
+    keeps working on views of them, so snapshots, thermodynamics and the USD
+    writers see the live state without copies. Ghost regions are read
+    directly from the neighbours' rows of the shared arrays; two barriers
+    per step order the writes. MD runs whole batches without the
+    coordinator; particle reactions change the particle count, so the
+    coordinator resolves them after every step (`ParticleSystem.collide`).
+
+    Slabs thinner than the interaction range (cutoff + skin, or the contact
+    distance) mostly compute ghosts, so keep box / n_workers above it.
+    A thermostat is applied by the coordinator after each batch (MD) or
+    step (particles); the box is fixed while decomposed, so no barostat.
+    """
+    def __init__(self, system, n_workers: Optional[int] = None, *, seed: Optional[int] = None,
+                 context: str = "spawn", timeout: float = 120.0):
+        self.system = system
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.timeout = timeout
+        if getattr(system, "barostat", None) is not None:
+            raise ValueError("the box is fixed while decomposed; remove the barostat")
+        if isinstance(system, MDSystem):
+            self.kind = "md"
+            arrays, params = self._md_arrays(system)
+        elif isinstance(system, ParticleSystem):
+            self.kind = "particles"
+            arrays, params = self._particle_arrays(system)
+        else:
+            raise TypeError(f"cannot decompose {type(system).__name__}")
+        arrays["ctrl"] = np.zeros(4, dtype=np.int64)
+        arrays["fctrl"] = np.zeros(2, dtype=np.float64)
+
+        self.shared = SharedArrays(arrays)
+        self._bind()
+        ctx = mp.get_context(context)
+        self._start = ctx.Barrier(self.n_workers + 1)
+        sync = ctx.Barrier(self.n_workers)
+        seeds = np.random.SeedSequence(seed).spawn(self.n_workers)
+        self._procs = [ctx.Process(target=_worker_main, daemon=True,
+                                   args=(self.kind, r, self.n_workers, self.shared.spec, params, seeds[r],
+                                         self._start, sync))
+                       for r in range(self.n_workers)]
+        for p in self._procs:
+            p.start()
+        self._lock = threading.Lock()
+        try:
+            self._start.wait(timeout)         # every slab attached and listed
+        except threading.BrokenBarrierError:
+            self.close()
+            raise RuntimeError("slab workers failed to start") from None
+
+    # ---------- shared state --------------------------------------------------
+    def _md_arrays(self, s: MDSystem):
+        arrays = {
+            "x": s.x, "v": s.v, "f": s.f,
+            "inv_mass": s._inv_mass, "sigma": s.sigma, "epsilon": s.epsilon, "charge": s.charge,
+            "bonds": s.bonds, "r0": s.r0, "angles": s.angles, "theta0": s.theta0, "excluded": s._excluded,
+            "energy": np.zeros(self.n_workers), "virial": np.zeros(self.n_workers), "disp": np.zeros(self.n_workers),
+        }
+        return arrays, {"box": s.box, "cutoff": s.cutoff, "skin": s.skin}
+
+    def _particle_arrays(self, s: ParticleSystem):
+        n = s.n_particles
+        arrays = {
+            "pos": s.pos, "vel": s.vel, "species": s.species,
+            "diffusion": s.diffusion, "rule": s._rule,
+            "pairs": np.zeros((self.n_workers, max(n, 1), 2), dtype=np.intp),
+            "n_pairs": np.zeros(self.n_workers, dtype=np.int64),
+        }
+        return arrays, {"box": s.box, "contact": s.contact, "mode": s.mode}
+
+    def _bind(self):
+        a, s = self.shared.arrays, self.system
+        if self.kind == "md":
+            s.x, s.v, s.f = a["x"], a["v"], a["f"]
+        else:
+            a["ctrl"][_COUNT] = n = s.n_particles
+            s.pos, s.vel, s.species = a["pos"][:n], a["vel"][:n], a["species"][:n]
+            s._cell_order = None
+
+    # ---------- stepping ----------------------------------------------------------
+    def _batch(self, command: int, n_steps: int = 0):
+        ctrl = self.shared.arrays["ctrl"]
+        ctrl[_CMD], ctrl[_STEPS] = command, n_steps
+        try:
+            self._start.wait(self.timeout)
+            if command == _RUN:
+                self._start.wait(self.timeout)
+        except threading.BrokenBarrierError:
+            raise RuntimeError("a slab worker failed or timed out") from None
+
+    def step(self, n_steps: int = 1, dt: Optional[float] = None) -> int:
+        """
+        Advance `n_steps` steps of `dt` (the MD system's own dt by default;
+        required for particles). Returns the number of reactions that fired
+        (always 0 for MD).
+        """
+        s, a = self.system, self.shared.arrays
+        if dt is None:
+            if self.kind != "md":
+                raise ValueError("particle steps need dt")
+            dt = s.dt
+        with self._lock:
+            a["fctrl"][_DT] = dt
+            if self.kind == "md":
+                builds = int(a["ctrl"][_BUILDS])
+                self._batch(_RUN, n_steps)
+                s.time += n_steps * dt
+                s.n_steps += n_steps
+                s.n_rebuilds += int(a["ctrl"][_BUILDS]) - builds
+                s.potential, s.virial = float(a["energy"].sum()), float(a["virial"].sum())
+                s._couple(n_steps * dt)
+                return 0
+            fired = 0
+            for _ in range(n_steps):
+                a["fctrl"][_TEMP] = s.temperature_k
+                self._batch(_RUN, 1)
+                s._couple(dt)
+                s.time += dt
+                s.n_steps += 1
+                if not s.reactions:
+                    continue
+                pairs = np.concatenate([a["pairs"][r, :a["n_pairs"][r]] for r in range(self.n_workers)])
+                fired += s.collide(pairs[:, 0], pairs[:, 1])
+                n = s.n_particles
+                if n != a["ctrl"][_COUNT]:
+                    # merged partners were compacted out of private copies; move them back
+                    a["pos"][:n], a["vel"][:n], a["species"][:n] = s.pos, s.vel, s.species
+                    s.pos, s.vel, s.species = a["pos"][:n], a["vel"][:n], a["species"][:n]
+                    a["ctrl"][_COUNT] = n
+            return fired
+
+    def trajectory(self, n_frames: int, steps_per_frame: int = 10):
+        """`MDSystem.trajectory` on the worker processes."""
+        yield self.system.snapshot()
+        for _ in range(n_frames - 1):
+            self.step(steps_per_frame)
+            yield self.system.snapshot()
+
+    # ---------- lifetime ------------------------------------------------------------
+    def close(self):
+        """Stop the workers and hand the system private copies of its state."""
+        if not self._procs:
+            return
+        with self._lock:
+            try:
+                self._batch(_STOP)
+            except RuntimeError:
+                pass
+            for p in self._procs:
+                p.join(self.timeout)
+                if p.is_alive():
+                    p.terminate()
+            self._procs = []
+            s = self.system
+            if self.kind == "md":
+                s.x, s.v, s.f = s.x.copy(), s.v.copy(), s.f.copy()
+                s._build_neighbours()
+            else:
+                s.pos, s.vel, s.species = s.pos.copy(), s.vel.copy(), s.species.copy()
+            self.shared.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
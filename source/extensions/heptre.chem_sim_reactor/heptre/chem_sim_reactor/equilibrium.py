@@ -0,0 +1,249 @@
+# equilibrium.py – chemical equilibrium by Gibbs free-energy minimization
+# ------------------------------------------------------------------ #
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .kinetics import R_GAS, KineticsModel, Reaction, ReactionConditions, initial_concentrations, parse_equation
+from .network import formula_counts, hill_formula
+
+# Standard enthalpy of formation (kJ/mol) and entropy (J/mol/K) at 298.15 K,
+# gas phase, keyed by Hill formula. mu0(T) is taken as dHf - T S: constant
+# dH and S, good to a few kJ/mol over the slider range.
+THERMO_TABLE = {
+    "H2": (0.0, 130.68), "O2": (0.0, 205.15), "N2": (0.0, 191.61), "Cl2": (0.0, 223.08),
+    "H2O": (-241.83, 188.84), "CO2": (-393.52, 213.79), "CO": (-110.53, 197.66),
+    "CH4": (-74.87, 186.25), "C2H6": (-84.0, 229.2), "C2H4": (52.4, 219.3), "C2H2": (227.4, 200.9),
+    "C3H8": (-103.8, 270.3), "CH4O": (-201.0, 239.9), "C2H6O": (-234.8, 281.6), "CH2O": (-108.6, 218.8),
+    "C2H4O": (-166.2, 263.8), "C2H4O2": (-432.8, 283.5), "H3N": (-45.94, 192.77), "NO": (91.29, 210.76),
+    "NO2": (33.10, 240.04), "N2O4": (9.08, 304.38), "O2S": (-296.84, 248.21), "O3S": (-395.77, 256.77),
+    "ClH": (-92.31, 186.90), "H2S": (-20.6, 205.8), "HI": (26.5, 206.6), "I2": (62.42, 260.69),
+}
+
+# Reaction Gibbs energy assumed when the reaction JSON carries no "thermo" block
+# and the table does not cover every species: mildly product-favoured, so the
+# Pressure slider visibly shifts reactions that change the mole count.
+DEFAULT_DG = -20.0           # kJ/mol
+
+# Mole fraction below which a species counts as trace. In the Newton matrix
+# trace species weigh as if they were this abundant, so it stays regular
+# when a reaction runs to completion; amounts never drop below TRACE_FLOOR.
+TRACE_FRACTION = 1e-8
+TRACE_FLOOR = 1e-100
+
+
+class EquilibriumProblem:
+    """
+    Ideal-gas mixture of S species built from E elements.
+
+    species    names, in `KineticsModel` order; `index` maps name -> column
+    elements   element symbols, one per independent balance row
+    A          (E, S) formula matrix; linearly dependent element rows are
+               dropped (e.g. N and O in N2O4 <=> 2NO2) so the Newton system
+               stays regular
+    h0, s0     (S,) standard enthalpy (J/mol) and entropy (J/mol/K)
+    reactants  equation coefficients of the starting species
+    """
+    def __init__(self, species: Sequence[str], formulas: Sequence[Dict[str, int]], h0, s0,
+                 reactants: Optional[Dict[str, float]] = None):
+        self.species = list(species)
+        self.index = {name: i for i, name in enumerate(self.species)}
+        self.reactants = dict(reactants or {})
+        elements = sorted({e for f in formulas for e in f})
+        A = np.array([[f.get(e, 0) for f in formulas] for e in elements], dtype=float)
+        keep: List[int] = []
+        for k in range(len(elements)):
+            if np.linalg.matrix_rank(A[keep + [k]]) > len(keep):
+                keep.append(k)
+        self.elements = [elements[k] for k in keep]
+        self.A = A[keep]
+        self.h0 = np.asarray(h0, dtype=float)
+        self.s0 = np.asarray(s0, dtype=float)
+
+    @property
+    def n_species(self) -> int:
+        return len(self.species)
+
+    def g0_rt(self, temperature_k) -> np.ndarray:
+        """mu0 / RT, shape (S,) or (B, S) for an array of temperatures."""
+        t = np.asarray(temperature_k, dtype=float)[..., None]
+        return (self.h0 - t * self.s0) / (R_GAS * t)
+
+    @classmethod
+    def from_reaction(cls, js):
+        """
+        Species, formulas and thermochemistry of the stored reaction `js`.
+        Per-species data comes from `js["thermo"][name]` ({"dHf", "S"} or
+        {"dGf"}, kJ/mol and J/mol/K), then THERMO_TABLE. If species are still
+        missing, the first of them absorbs the reaction's `js["thermo"]`
+        {"dH", "dS"} or {"dG"} (DEFAULT_DG when absent).
+        """
+        reactants, products = parse_equation(js.get("reaction", ""))
+        model = KineticsModel([Reaction(reactants, products)])
+        structures = {m.get("name", "").lower(): m for m in (js.get("reactants") or []) + (js.get("products") or [])
+                      if isinstance(m, dict)}
+        thermo = js.get("thermo") or {}
+
+        formulas, h0, s0, missing = [], [], [], []
+        for k, name in enumerate(model.species):
+            counts = _species_formula(name, structures)
+            if counts is None:
+                raise ValueError(f"cannot element-balance {name!r}: no formula")
+            formulas.append(counts)
+            data = thermo.get(name) if isinstance(thermo.get(name), dict) else None
+            if data is not None and "dGf" in data:
+                h0.append(float(data["dGf"]) * 1000.0); s0.append(0.0)
+            elif data is not None:
+                h0.append(float(data.get("dHf", 0.0)) * 1000.0); s0.append(float(data.get("S", 0.0)))
+            elif hill_formula(counts) in THERMO_TABLE:
+                dh, s = THERMO_TABLE[hill_formula(counts)]
+                h0.append(dh * 1000.0); s0.append(s)
+            else:
+                h0.append(0.0); s0.append(0.0); missing.append(k)
+
+        if missing:
+            # close the gap to the reaction's dH / dS on the first unknown species
+            nu = np.zeros(len(model.species))
+            for name, v in products.items():
+                nu[model.index[name]] += v
+            for name, v in reactants.items():
+                nu[model.index[name]] -= v
+            if "dG" in thermo or not ("dH" in thermo or "dS" in thermo):
+                dh_rx, ds_rx = float(thermo.get("dG", DEFAULT_DG)) * 1000.0, 0.0
+            else:
+                dh_rx, ds_rx = float(thermo.get("dH", 0.0)) * 1000.0, float(thermo.get("dS", 0.0))
+            k = missing[0]
+            h0[k] = (dh_rx - float(nu @ np.array(h0))) / nu[k]
+            s0[k] = (ds_rx - float(nu @ np.array(s0))) / nu[k]
+        return cls(model.species, formulas, h0, s0, reactants)
+
+    def initial_amounts(self, conditions: ReactionConditions) -> np.ndarray:
+        """Starting mix from the Concentration slider, as `initial_concentrations` splits it."""
+        return initial_concentrations(self, self.reactants, conditions)
+
+
+def _species_formula(name: str, structures: Dict[str, dict]) -> Optional[Dict[str, int]]:
+    counts = formula_counts(name)
+    if counts:
+        return counts
+    m = structures.get(name.lower())
+    if m is None:
+        return None
+    if m.get("formula"):
+        return formula_counts(m["formula"])
+    counts = {}
+    for a in m.get("atoms") or []:
+        counts[a["element"]] = counts.get(a["element"], 0) + 1
+    return counts or None
+
+
+class GibbsSolver:
+    """
+    Minimizes G = sum n_i (mu0_i / RT + ln(n_i / N) + ln P) subject to the
+    element balance A n = b, by the Gordon–McBride / RAND Newton iteration
+    on the Lagrangian: each step solves one (E+1)² system for the element
+    potentials and d ln N, all in log-moles so trace species stay positive.
+    Conditions are batched: B temperatures / pressures solve as stacked
+    matrices with one `np.linalg.solve`.
+
+    Once a reaction runs to completion the species left carry fewer
+    independent element ratios than there are element rows (ethanol + O2
+    -> acetic acid + water leaves C, H and O on two species), and with
+    the reactants at 1e-40 the exact Newton matrix is singular. Trace
+    species therefore enter the matrix with the weight of a TRACE_FRACTION
+    mole fraction: the steps are no longer exact Newton steps for them,
+    but a step of zero still means equilibrium and element balance, so the
+    fixed point is unchanged.
+
+    The last solution is kept, and `solve(..., warm=True)` starts from it –
+    while a slider is dragged the composition barely moves, so a solve
+    takes a few iterations, well under a millisecond for a typical reaction.
+
+    Fields:
+        iterations   Newton iterations of the last solve
+        converged    whether the last solve met `tol`
+    """
+    def __init__(self, problem: EquilibriumProblem, tol: float = 1e-10, max_iter: int = 100):
+        self.problem = problem
+        self.tol = tol
+        self.max_iter = max_iter
+        self.iterations = 0
+        self.converged = False
+        self._last: Optional[np.ndarray] = None
+
+    def solve(self, n0, temperature_k: float, pressure_atm: float = 1.0, warm: bool = True) -> np.ndarray:
+        """Equilibrium moles (S,) from the starting amounts `n0` at T (K) and P (atm)."""
+        return self.solve_batch(n0, [temperature_k], [pressure_atm], warm=warm)[0]
+
+    def solve_batch(self, n0, temperature_k, pressure_atm, warm: bool = True) -> np.ndarray:
+        """(B, S) equilibria for B (temperature, pressure) pairs sharing the start amounts `n0`."""
+        p = self.problem
+        A = p.A
+        n0 = np.asarray(n0, dtype=float)
+        T = np.atleast_1d(np.asarray(temperature_k, dtype=float))
+        P = np.broadcast_to(np.atleast_1d(np.asarray(pressure_atm, dtype=float)), T.shape)
+        B, S = len(T), p.n_species
+        b = A @ n0
+        total = max(n0.sum(), 1e-300)
+
+        # species built from an element that is absent can only be zero
+        live = ~np.any((A > 0) & (b[:, None] <= 1e-12 * total), axis=0)
+        rows = b > 1e-12 * total
+        Al, bl = A[rows][:, live], b[rows]
+        c = p.g0_rt(T)[:, live] + np.log(P)[:, None]
+
+        last = self._last
+        if warm and last is not None and np.all(last[live] > 0):
+            n = np.broadcast_to(last[live], (B, int(live.sum()))).copy()
+        else:
+            n = np.broadcast_to(n0[live] + total / S * 1e-2, (B, int(live.sum()))).copy()
+
+        El = len(bl)
+        M = np.zeros((B, El + 1, El + 1))
+        rhs = np.zeros((B, El + 1))
+        self.converged = False
+        for it in range(1, self.max_iter + 1):
+            N = n.sum(axis=1, keepdims=True)
+            g = c + np.log(n / N)
+            bn = n @ Al.T
+            major = n / N > TRACE_FRACTION
+            w = np.where(major, n, TRACE_FRACTION * N)
+            bw = w @ Al.T
+            M[:, :El, :El] = np.einsum("es,bs,fs->bef", Al, w, Al)
+            M[:, :El, El] = bw
+            M[:, El, :El] = bw
+            wg = w * g
+            rhs[:, :El] = bl - bn + wg @ Al.T
+            rhs[:, El] = wg.sum(axis=1)
+            sol = np.linalg.solve(M, rhs[..., None])[..., 0]
+            dlnN = sol[:, El:]
+            dln = -g + dlnN + sol[:, :El] @ Al
+
+            # Gordon–McBride control: major species move at most e² per step
+            big = np.maximum(np.max(np.where(major, np.abs(dln), 0.0), axis=1, keepdims=True), 5.0 * np.abs(dlnN))
+            lam = np.minimum(1.0, 2.0 / np.maximum(big, 1e-300))
+            n = n * np.exp(np.clip(lam * dln, -50.0, 50.0))
+            n = np.maximum(n, TRACE_FLOOR * total)
+            self.iterations = it
+            if np.max(np.abs(dln) * n / N) < self.tol and np.max(np.abs(dlnN)) < self.tol:
+                self.converged = True
+                break
+
+        out = np.zeros((B, S))
+        out[:, live] = n
+        self._last = out[-1].copy()
+        return out
+
+
+def equilibrium_composition(js, conditions: ReactionConditions, solver: Optional[GibbsSolver] = None):
+    """
+    Equilibrium mole fractions {species: x} of the stored reaction `js` under
+    `conditions`, starting from the slider's reactant mix. Pass the same
+    `solver` between calls to warm-start from the previous solution.
+    """
+    if solver is None:
+        solver = GibbsSolver(EquilibriumProblem.from_reaction(js))
+    problem = solver.problem
+    n = solver.solve(problem.initial_amounts(conditions), conditions.temperature_k, conditions.pressure_atm)
+    x = n / max(n.sum(), 1e-300)
+    return {name: float(v) for name, v in zip(problem.species, x)}
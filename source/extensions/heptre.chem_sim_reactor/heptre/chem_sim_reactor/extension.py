@@ -2,6 +2,7 @@ import omni.ext
 from omni import log
 import omni.ui as ui
 from .ui import ChemSimUI
+from .cassette import active_cassette
 
 
 class ChemSimReactorExtension(omni.ext.IExt):
@@ -15,6 +16,11 @@ class ChemSimReactorExtension(omni.ext.IExt):
 
     def on_shutdown(self):
         log.info("[heptre.chem_sim_reactor] Extension shutdown")
+        if getattr(self, "_ui", None):
+            self._ui._stop_live_simulation()
+        cassette = active_cassette()
+        if cassette is not None:
+            cassette.save()
         if self._window:
             self._window.visible = False
             self._window = None
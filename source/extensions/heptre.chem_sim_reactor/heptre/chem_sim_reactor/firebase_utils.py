@@ -4,28 +4,43 @@ import firebase_admin
 from firebase_admin import credentials, storage, db
 from firebase_admin import delete_app
 from omni.kit.app import get_app
+from .cassette import CassetteBucket, CassetteRef, active_cassette
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 cred_path = os.path.join(BASE_DIR, "firebase-adminsdk.json")
 
-# (Re)init Firebase safely
-if firebase_admin._apps:
-    print("🔄 Reinitializing Firebase app...")
-    delete_app(firebase_admin.get_app())
-cred = credentials.Certificate(cred_path)
-firebase_admin.initialize_app(cred, {
-    "storageBucket": "vrchemlab-d3f91.firebasestorage.app",
-    "databaseURL": "https://vrchemlab-d3f91-default-rtdb.asia-southeast1.firebasedatabase.app"
-})
-bucket = storage.bucket("vrchemlab-d3f91.firebasestorage.app")
+# record/replay of every RTDB and Storage call, when CHEMSIM_CASSETTE is set
+cassette = active_cassette()
+
+if cassette is not None and cassette.replaying:
+    # offline: no app, no credentials – everything comes from the cassette
+    bucket = CassetteBucket(cassette, name="vrchemlab-d3f91.firebasestorage.app")
+else:
+    # (Re)init Firebase safely
+    if firebase_admin._apps:
+        print("🔄 Reinitializing Firebase app...")
+        delete_app(firebase_admin.get_app())
+    cred = credentials.Certificate(cred_path)
+    firebase_admin.initialize_app(cred, {
+        "storageBucket": "vrchemlab-d3f91.firebasestorage.app",
+        "databaseURL": "https://vrchemlab-d3f91-default-rtdb.asia-southeast1.firebasedatabase.app"
+    })
+    bucket = storage.bucket("vrchemlab-d3f91.firebasestorage.app")
+    if cassette is not None:
+        bucket = CassetteBucket(cassette, bucket)
 print("✅ Firebase bucket in use:", bucket.name)
 print("✅ Bucket exists?", bucket.exists())
 
+def _reference(path):
+    if cassette is None:
+        return db.reference(path)
+    return CassetteRef(cassette, path, None if cassette.replaying else db.reference(path))
+
 def upload_anim_and_update_db(local_path, folder, reaction_id, reaction_summary):
     file_name = os.path.basename(local_path)
     blob_path = f"animations/{folder}/{file_name}"
 
-    ref = db.reference(f"reaction_anim_urls/{reaction_id}")
+    ref = _reference(f"reaction_anim_urls/{reaction_id}")
     existing_data = ref.get()
     if existing_data and existing_data.get("file_name") == file_name:
         return True, existing_data.get("download_url", "Already uploaded")
@@ -47,15 +62,15 @@ def upload_anim_and_update_db(local_path, folder, reaction_id, reaction_summary)
         return False, str(e)
 
 def get_firebase_reactions_ref():
-    return db.reference("reactions")
+    return _reference("reactions")
 
 def get_firebase_compounds_ref():
-    return db.reference("compounds")
+    return _reference("compounds")
 
 ANIM_LOCAL_DIR = os.path.join(BASE_DIR, "output_usd")
 
 def _get_cached_upload_status():
-    ref = db.reference("reaction_anim_urls")
+    ref = _reference("reaction_anim_urls")
     return ref.get() or {}
 
 def sync_missing_animations():
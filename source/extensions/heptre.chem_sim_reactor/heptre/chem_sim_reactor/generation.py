@@ -0,0 +1,237 @@
+# generation.py – two-phase reaction generation: outline first, then only new structures
+# ------------------------------------------------------------------ #
+import json
+import re
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from .network import formula_counts, hill_formula
+from .json_repair import repair_json, strip_fences
+from .smiles import smiles_to_dict
+from .validation import check_structure
+
+OUTLINE_MAX_TOKENS = 600
+# a SMILES entry is a name, formula and description plus ~1 token per atom
+STRUCTURE_TOKENS_PER_ATOM = 2
+STRUCTURE_TOKENS_BASE = 80
+STRUCTURE_MAX_TOKENS = 3500
+BATCH_MAX_ATOMS = 200
+# targeted re-requests for the species of a batch that came back broken
+CORRECTION_ATTEMPTS = 1
+
+OUTLINE_GUIDE = """
+You are a chemistry simulation assistant for a 3D simulation engine. Your responses are parsed by an automated parser, so you must respond ONLY in **VALID JSON**, with NO explanation, NO markdown, and NO code blocks.
+OUTPUT FORMAT (REQUIRED):
+{
+  "reaction": "Full balanced chemical equation (e.g., CH3COOH + NaOH → CH3COONa + H2O)",
+  "reactionDescription": "One-line description of the reaction process",
+  "reactants": [{ "name": "MoleculeName", "formula": "C2H6O" }],
+  "products": [{ "name": "MoleculeName", "formula": "CO2" }]
+}
+RULES:
+1. List every species of the balanced equation exactly once, reactants and products separately.
+2. `name` is the common name (e.g., "Ethanol", "Oxygen", "Water"); `formula` is the molecular formula.
+3. Do NOT include atoms or bonds.
+4. DO NOT include text before or after the JSON.
+""".strip()
+
+STRUCTURE_GUIDE = """
+You are a chemistry simulation assistant for a 3D simulation engine. Your responses are parsed by an automated parser, so you must respond ONLY in **VALID JSON**, with NO explanation, NO markdown, and NO code blocks.
+Give the structure of EVERY compound listed below as a SMILES string.
+OUTPUT FORMAT (REQUIRED):
+{
+  "compounds": [
+    { "name": "Ethanol", "formula": "C2H6O", "smiles": "CCO", "description": "A two-carbon alcohol molecule." }
+  ]
+}
+RULES:
+1. Use the `name` and `formula` exactly as listed.
+2. `smiles` must be valid SMILES whose atoms match the formula EXACTLY; hydrogens may stay implicit.
+3. Use bracket atoms for charges and unusual valences (e.g., "[NH4+]", "[O-]").
+4. DO NOT include text before or after the JSON.
+""".strip()
+
+# Firebase RTDB keys cannot contain these
+_BAD_KEY = re.compile(r"[.#$\[\]/]")
+
+
+def parse_llm_json(content: str) -> dict:
+    """
+    Parse an LLM JSON reply. A ```json fence is stripped; anything else
+    `json.loads` rejects goes through `repair_json` (trailing commas,
+    surrounding prose, a truncated tail) before the reply is given up on.
+    """
+    content = strip_fences(content)
+    try:
+        return json.loads(content)
+    except json.JSONDecodeError as e:
+        error = e
+    try:
+        return json.loads(repair_json(content))
+    except json.JSONDecodeError:
+        raise ValueError(f"GPT JSON parse failed: {error}\nContent:\n{content}")
+
+
+# ---------- phase 1: outline ---------------------------------------------------
+def outline_prompt(prompt: str) -> str:
+    return OUTLINE_GUIDE + "\n\nReaction prompt:\n" + prompt
+
+
+def outline_species(outline: dict) -> List[dict]:
+    """
+    Distinct species of an outline as {"name", "formula", "role"} dicts,
+    reactants first; a bare string entry is taken as both name and formula.
+    """
+    species, seen = [], set()
+    for role in ("reactants", "products"):
+        for item in outline.get(role) or []:
+            if isinstance(item, str):
+                item = {"name": item, "formula": item}
+            name = str(item.get("name") or item.get("formula") or "").strip()
+            if not name or name.lower() in seen:
+                continue
+            seen.add(name.lower())
+            species.append({"name": name, "formula": str(item.get("formula") or "").strip(), "role": role})
+    return species
+
+
+# ---------- compound resolution ----------------------------------------------------
+def _same_formula(a: str, b: str) -> bool:
+    ca, cb = formula_counts(a or ""), formula_counts(b or "")
+    return ca is None or cb is None or ca == cb
+
+
+def compound_keys(species: dict) -> List[str]:
+    """Compound-store keys to try for a species: its name as given and capitalized, then its formula."""
+    keys = []
+    for key in (species["name"], species["name"].capitalize(), species.get("formula", "")):
+        if key and key not in keys and not _BAD_KEY.search(key):
+            keys.append(key)
+    return keys
+
+
+def resolve_compounds(species: Sequence[dict], lookup: Callable[[str], Optional[dict]]):
+    """
+    Split `species` into ({name: stored structure}, [species to generate]).
+    `lookup(key)` reads the compound store; a stored compound only counts
+    if it has atoms and its formula agrees with the outline's.
+    """
+    known: Dict[str, dict] = {}
+    unknown: List[dict] = []
+    for sp in species:
+        for key in compound_keys(sp):
+            stored = lookup(key)
+            if isinstance(stored, dict) and stored.get("atoms") and _same_formula(stored.get("formula"), sp["formula"]):
+                known[sp["name"]] = stored
+                break
+        else:
+            unknown.append(sp)
+    return known, unknown
+
+
+# ---------- phase 2: structures -----------------------------------------------------
+def _atom_count(species: dict) -> int:
+    counts = formula_counts(species.get("formula") or "") or formula_counts(species["name"])
+    return sum(counts.values()) if counts else 12
+
+
+def structure_batches(species: Sequence[dict], max_atoms: int = BATCH_MAX_ATOMS) -> List[List[dict]]:
+    """Group species for one structure request each, up to `max_atoms` atoms per request."""
+    batches, current, atoms = [], [], 0
+    for sp in species:
+        n = _atom_count(sp)
+        if current and atoms + n > max_atoms:
+            batches.append(current)
+            current, atoms = [], 0
+        current.append(sp)
+        atoms += n
+    if current:
+        batches.append(current)
+    return batches
+
+
+def structure_prompt(batch: Sequence[dict]) -> str:
+    listed = "\n".join(f"- {sp['name']} ({sp['formula']})" if sp.get("formula") else f"- {sp['name']}" for sp in batch)
+    return STRUCTURE_GUIDE + "\n\nCompounds:\n" + listed
+
+
+def structure_max_tokens(batch: Sequence[dict]) -> int:
+    atoms = sum(_atom_count(sp) for sp in batch)
+    return min(STRUCTURE_MAX_TOKENS, STRUCTURE_TOKENS_BASE * len(batch) + STRUCTURE_TOKENS_PER_ATOM * atoms)
+
+
+def correction_prompt(rejected: Sequence[dict]) -> str:
+    """Structure request for species whose first answer was rejected, each with its `problems` listed."""
+    lines = []
+    for sp in rejected:
+        line = f"- {sp['name']} ({sp['formula']})" if sp.get("formula") else f"- {sp['name']}"
+        if sp.get("problems"):
+            line += ": " + "; ".join(sp["problems"])
+        lines.append(line)
+    return (STRUCTURE_GUIDE + "\n\nYour previous structures for these compounds were rejected. "
+            "Give them again, fixing the problems noted:\n" + "\n".join(lines))
+
+
+def checked_structure(species: dict, entry: dict) -> Tuple[Optional[dict], List[str]]:
+    """
+    (structure, []) for a sound reply entry, else (None, problems): the
+    SMILES must parse and, like spelled-out atoms, pass `check_structure`
+    against the species' formula.
+    """
+    formula = species.get("formula") if formula_counts(species.get("formula") or "") else entry.get("formula")
+    smiles = entry.get("smiles")
+    if smiles:
+        try:
+            structure = smiles_to_dict(smiles, entry.get("name", ""), entry.get("description", ""))
+        except ValueError as e:
+            return None, [f"SMILES {smiles!r} is invalid ({e})"]
+        if not _same_formula(structure["formula"], formula or ""):
+            return None, [f"SMILES {smiles!r} gives {structure['formula']}, not {formula}"]
+        return structure, []
+    if not entry.get("atoms"):
+        return None, ["it has neither SMILES nor atoms"]
+    problems = check_structure(entry, formula)
+    return (None, problems) if problems else (entry, [])
+
+
+def match_structures(batch: Sequence[dict], reply: dict) -> Tuple[Dict[str, dict], List[dict]]:
+    """
+    Pair the entries of a reply with the requested species, by name then
+    formula, and keep the sound ones. Species left over come back with a
+    `problems` list saying what was wrong – the basis of a correction
+    request for just those.
+    """
+    entries = [c for c in (reply.get("compounds") or []) if isinstance(c, dict)]
+    by_name, by_formula = {}, {}
+    for c in entries:
+        by_name.setdefault(str(c.get("name", "")).lower(), c)
+        counts = formula_counts(c.get("formula") or "")
+        if counts:
+            by_formula.setdefault(hill_formula(counts), c)
+    matched, missing = {}, []
+    for sp in batch:
+        c = by_name.get(sp["name"].lower())
+        if c is None:
+            counts = formula_counts(sp.get("formula") or "")
+            c = by_formula.get(hill_formula(counts)) if counts else None
+        if c is None:
+            missing.append(dict(sp, problems=["it was missing from the reply"]))
+            continue
+        structure, problems = checked_structure(sp, c)
+        if structure is None:
+            missing.append(dict(sp, problems=problems))
+        else:
+            matched[sp["name"]] = structure
+    return matched, missing
+
+
+# ---------- assembly -----------------------------------------------------------------
+def assemble_reaction(outline: dict, species: Sequence[dict], structures: Dict[str, dict]) -> Tuple[list, list]:
+    """(reactants, products) structure lists in outline order, each named as the outline names it."""
+    sides = {"reactants": [], "products": []}
+    for sp in species:
+        structure = dict(structures[sp["name"]])
+        structure["name"] = sp["name"]
+        if sp.get("formula") and not structure.get("formula"):
+            structure["formula"] = sp["formula"]
+        sides[sp["role"]].append(structure)
+    return sides["reactants"], sides["products"]
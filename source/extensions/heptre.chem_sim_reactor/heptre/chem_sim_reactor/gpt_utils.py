@@ -1,10 +1,25 @@
+import atexit
 import os
-import json
-import re
+import shutil
+import asyncio
 import hashlib
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Iterable, List, Optional
 import openai
 from dotenv import load_dotenv
+from .cassette import active_cassette
 from .firebase_utils import get_firebase_reactions_ref, get_firebase_compounds_ref
+from .llm_client import LLMClient, SingleFlight, get_llm_client
+from .prompt_index import PromptIndex, prompt_reaction_id
+from .reaction_cache import LRUCache, SQLiteStore, TieredReactionCache
+from .json_stream import JSONObjectStream
+from .raw_log import SegmentLog
+from .generation import (CORRECTION_ATTEMPTS, OUTLINE_MAX_TOKENS, assemble_reaction, correction_prompt,
+                         match_structures, outline_prompt, outline_species, parse_llm_json, resolve_compounds,
+                         structure_batches, structure_max_tokens, structure_prompt)
 
 # Load .env variables
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -14,148 +29,268 @@ openai.api_key = os.getenv("OPENAI_API_KEY")
 
 firebase_reactions = get_firebase_reactions_ref()
 firebase_compounds = get_firebase_compounds_ref()
+_in_flight = SingleFlight()
+_prompt_index: Optional[PromptIndex] = None
+_prompt_index_lock = threading.Lock()
+_library_version = 0          # bumped for every reaction stored here
+# Under a cassette the local tiers start empty and are thrown away: a run then
+# replays the recorded LLM and RTDB traffic instead of what an earlier run
+# cached, and the replayed library stays out of the developer's cache
+_isolated = active_cassette() is not None
 
-LLM_STRUCTURE_GUIDE = """
-You are a chemistry simulation assistant for a 3D simulation engine. Your responses are parsed by an automated parser, so you must respond ONLY in **VALID JSON**, with NO explanation, NO markdown, and NO code blocks.
-❗️ CRITICAL REQUIREMENTS:
-- DO NOT return only molecule names like ["Ethanol"] — full molecular structures are mandatory.
-- DO NOT skip atoms or bonds. For example, if the formula is C3H6O, you **must** include 3 carbon, 6 hydrogen, and 1 oxygen atoms in the `atoms` list, and connect them fully via the `bonds` list.
-OUTPUT FORMAT (REQUIRED):
-{
-  "reactants": [MolecularStructure],
-  "products": [MolecularStructure],
-  "reaction": "Full balanced chemical equation (e.g., CH3COOH + NaOH → CH3COONa + H2O)",
-  "reactionDescription": "One-line description of the reaction process"
-}
-Each MolecularStructure is a dictionary with this format:
-{
-  "name": "MoleculeName",
-  "formula": "C3H6O",
-  "description": "Short description of the molecule",
-  "atoms": [
-    { "id": "a1", "element": "C", "color": "#000000" },
-    ...
-  ],
-  "bonds": [
-    { "from_atom": "a1", "to_atom": "a2" },
-    ...
-  ]
-}
-ENFORCED RULES:
-1. Every atom MUST include:
-   - `id` (e.g., "a1", "a2", ...)
-   - `element` (e.g., "C", "H", "O")
-   - `color` (hex color, e.g., "#000000")
-2. Each **unique element** (C, H, O, N, etc.) must use the SAME color code consistently throughout ALL molecules.
-   - Suggested: C → "#000000", H → "#FFFFFF", O → "#FF0000", N → "#0000FF", etc.
-3. The atoms listed MUST MATCH the chemical formula EXACTLY.
-   - C3H6O = 3 Carbon, 6 Hydrogen, 1 Oxygen atoms.
-   - You MUST list ALL atoms and connect them appropriately.
-4. You MUST include ALL bonds between atoms.
-   - No atom should be left floating unless it's a free radical (rare).
-   - Validate atom valency: Carbon usually forms 4 bonds, Oxygen 2, Hydrogen 1, Nitrogen 3.
-5. Use accurate molecular geometry whenever possible. If unknown, represent all bonds clearly and fully.
-6. DO NOT include text before or after the JSON.
-EXAMPLE OUTPUT FORMAT (FOR "Ethanol"):
-{
-  "reactants": [
-    {
-      "name": "Ethanol",
-      "formula": "C2H6O",
-      "description": "A two-carbon alcohol molecule.",
-      "atoms": [
-        { "id": "a1", "element": "C", "color": "#000000" },
-        { "id": "a2", "element": "C", "color": "#000000" },
-        { "id": "a3", "element": "O", "color": "#FF0000" },
-        { "id": "a4", "element": "H", "color": "#FFFFFF" },
-        { "id": "a5", "element": "H", "color": "#FFFFFF" },
-        { "id": "a6", "element": "H", "color": "#FFFFFF" },
-        { "id": "a7", "element": "H", "color": "#FFFFFF" },
-        { "id": "a8", "element": "H", "color": "#FFFFFF" },
-        { "id": "a9", "element": "H", "color": "#FFFFFF" }
-      ],
-      "bonds": [
-        { "from_atom": "a1", "to_atom": "a2" },
-        { "from_atom": "a1", "to_atom": "a4" },
-        { "from_atom": "a1", "to_atom": "a5" },
-        { "from_atom": "a1", "to_atom": "a6" },
-        { "from_atom": "a2", "to_atom": "a3" },
-        { "from_atom": "a2", "to_atom": "a7" },
-        { "from_atom": "a2", "to_atom": "a8" },
-        { "from_atom": "a2", "to_atom": "a9" }
-      ]
-    }
-  ],
-  "products": [],
-  "reaction": "",
-  "reactionDescription": ""
-}
+# memory -> local SQLite -> Firebase; lookups and new reactions go through every tier
+reaction_cache = TieredReactionCache(
+    remote=firebase_reactions,
+    local=SQLiteStore(":memory:" if _isolated else os.path.join(BASE_DIR, "cache", "reactions.sqlite")),
+    memory=LRUCache(capacity=1024, ttl=3600.0),
+)
+
+# every raw reply, compressed and indexed by reaction id and time
+raw_log = SegmentLog(tempfile.mkdtemp(prefix="chemsim_raw_") if _isolated else os.path.join(BASE_DIR, "output_raw"))
+if _isolated:
+    atexit.register(shutil.rmtree, raw_log.directory, ignore_errors=True)
 
-Respond only with the JSON content as shown above.
-""".strip()
+# compounds already looked up this session; structures don't change
+compound_cache = LRUCache(capacity=4096, ttl=None)
 
 
 def generate_reaction_id(prompt: str) -> str:
+    """Legacy id: hash of the raw prompt. New reactions are stored under `prompt_reaction_id`."""
     return hashlib.sha256(prompt.encode()).hexdigest()[:16]
 
-def query_gpt_and_store_if_missing(prompt: str):
-    reaction_id = generate_reaction_id(prompt)
-    existing = firebase_reactions.child(reaction_id).get()
+
+def get_prompt_index(refresh: bool = False) -> PromptIndex:
+    """Fuzzy index over the stored prompts and equations, read from Firebase on first use."""
+    global _prompt_index
+    with _prompt_index_lock:                # concurrent first lookups pull the library once
+        if _prompt_index is None or refresh:
+            library = firebase_reactions.get()
+            reaction_cache.warm(library)
+            _prompt_index = PromptIndex.from_library(library)
+        return _prompt_index
+
+
+def library_version() -> int:
+    """Changes whenever a generated reaction is stored; views built from the library compare it."""
+    return _library_version
+
+
+def find_stored_reaction(prompt: str):
+    """
+    (reaction_id, stored reaction) for `prompt`, or (None, None). Tries the
+    normalized-prompt id, then the legacy raw-prompt id, then the local
+    store by prompt, then the trigram index, which only answers with a
+    stored prompt or equation made of the same words; such a hit is indexed
+    under the new prompt so the next lookup is exact. Ids resolve through
+    `reaction_cache`.
+    """
+    for reaction_id in dict.fromkeys((prompt_reaction_id(prompt), generate_reaction_id(prompt))):
+        existing = reaction_cache.get(reaction_id)
+        if existing:
+            return reaction_id, existing
+    reaction_id, existing = reaction_cache.get_by_prompt(prompt)
+    if existing:
+        return reaction_id, existing
+    index = get_prompt_index()
+    match = index.best(prompt)
+    if match is not None:
+        existing = reaction_cache.get(match)
+        if existing:
+            index.add(match, prompt)
+            return match, existing
+    return None, None
+
+
+async def query_gpt_and_store_if_missing_async(prompt: str, client: Optional[LLMClient] = None):
+    """
+    Stored reaction for `prompt`, generating and storing it first if missing.
+    The completion goes through the async LLM client and the blocking
+    Firebase calls run on worker threads, so the event loop stays free.
+    """
+    reaction_id = prompt_reaction_id(prompt)
+    # concurrent requests for the same reaction share one lookup and one generation
+    return await _in_flight.do(reaction_id, lambda: _get_or_generate(prompt, reaction_id, client))
+
+
+async def stream_reaction(prompt: str, client: Optional[LLMClient] = None):
+    """
+    Async iterator over the molecules of `prompt`'s reaction as they become
+    available: ("reactants" | "products", structure) for stored compounds
+    right after the outline, then for each generated one the moment its
+    object closes in the streamed reply. The last item is ("reaction", the
+    stored reaction), as `query_gpt_and_store_if_missing_async` returns it.
+    Joining a generation already in flight for the same reaction yields
+    only that last item.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    reaction_id = prompt_reaction_id(prompt)
+    task = asyncio.ensure_future(_in_flight.do(reaction_id, lambda: _get_or_generate(
+        prompt, reaction_id, client, emit=lambda role, m: queue.put_nowait((role, m)))))
+    try:
+        while not (task.done() and queue.empty()):
+            if queue.empty():
+                getter = asyncio.ensure_future(queue.get())
+                await asyncio.wait({getter, task}, return_when=asyncio.FIRST_COMPLETED)
+                if not getter.done():
+                    getter.cancel()
+                    continue
+                yield getter.result()
+            else:
+                yield queue.get_nowait()
+        yield "reaction", task.result()
+    finally:
+        task.cancel()
+
+
+async def _get_or_generate(prompt: str, reaction_id: str, client: Optional[LLMClient], emit=None):
+    _, existing = await asyncio.to_thread(find_stored_reaction, prompt)
     if existing:
+        if emit is not None:
+            for role in ("reactants", "products"):
+                for m in existing.get(role) or []:
+                    emit(role, m)
         return existing
 
-    full_prompt = LLM_STRUCTURE_GUIDE.strip() + "\n\nReaction prompt:\n" + prompt
+    # phase 1: equation and species only – a few hundred tokens
+    client = client or get_llm_client()
+    content = (await client.complete(outline_prompt(prompt), max_tokens=OUTLINE_MAX_TOKENS)).strip()
+    await _save_raw_output(prompt, reaction_id, "outline", content)
+    outline = parse_llm_json(content)
+    species = outline_species(outline)
+
+    # phase 2: structures only for compounds the store doesn't have yet
+    known, unknown = await asyncio.to_thread(resolve_compounds, species, _stored_compound)
+    roles = {sp["name"]: sp["role"] for sp in species}
+    on_structure = None
+    if emit is not None:
+        for sp in species:
+            if sp["name"] in known:
+                emit(sp["role"], dict(known[sp["name"]], name=sp["name"]))
+        on_structure = lambda name, m: emit(roles[name], dict(m, name=name))
+    generated = await _generate_structures(prompt, reaction_id, unknown, client, on_structure)
+    return await asyncio.to_thread(_store_generated_reaction, prompt, reaction_id, outline, species,
+                                   known, generated)
+
+
+async def _generate_structures(prompt: str, reaction_id: str, unknown: List[dict], client: LLMClient,
+                               on_structure=None) -> dict:
+    """
+    Structures for `unknown` species, requested in concurrent atom-bounded
+    batches. Replies are streamed: each compound is matched, and handed to
+    `on_structure(name, structure)`, as soon as its JSON object closes.
+    Species whose entry fails validation are asked for again on their own,
+    with the problems spelled out, up to CORRECTION_ATTEMPTS times.
+    """
+    generated, missing = {}, []
 
-    response = openai.ChatCompletion.create(
-        model="gpt-4-turbo",
-        messages=[
-            {"role": "system", "content": "You are a chemistry modeling assistant."},
-            {"role": "user", "content": full_prompt}
-        ],
-        max_tokens=3500,
-        temperature=0.5
-    )
+    def found(name: str, structure: dict):
+        generated[name] = structure
+        if on_structure is not None:
+            on_structure(name, structure)
 
-    content = response.choices[0].message.content.strip()
+    async def run(k: int, batch: List[dict]):
+        remaining = await _stream_structures(client, structure_prompt(batch), batch, found,
+                                             partial(_save_raw_output, prompt, reaction_id, f"structures {k}"))
+        for attempt in range(CORRECTION_ATTEMPTS):
+            if not remaining:
+                return
+            remaining = await _stream_structures(client, correction_prompt(remaining), remaining, found,
+                                                 partial(_save_raw_output, prompt, reaction_id,
+                                                         f"structures {k} fix {attempt + 1}"))
+        missing.extend(remaining)
 
-    raw_output_dir = os.path.join(BASE_DIR, "output_raw")
-    os.makedirs(raw_output_dir, exist_ok=True)
-    raw_output_path = os.path.join(raw_output_dir, f"{prompt.replace(' ', '_')}_raw.txt")
-    with open(raw_output_path, "w", encoding="utf-8") as f:
-        f.write(content)
+    await asyncio.gather(*(run(k, batch) for k, batch in enumerate(structure_batches(unknown))))
+    if missing:
+        raise ValueError("GPT returned no valid structure for: "
+                         + "; ".join(f"{sp['name']} ({', '.join(sp['problems'])})" for sp in missing))
+    return generated
 
-    if content.startswith("```"):
-        content = re.sub(r"^```(?:json)?\\n?|```$", "", content.strip(), flags=re.IGNORECASE | re.MULTILINE).strip()
 
+async def _stream_structures(client: LLMClient, request: str, species: List[dict], found, archive) -> List[dict]:
+    """One streamed structure request; returns the species still without a sound structure, with their problems."""
+    remaining = list(species)
+    scanner = JSONObjectStream(("compounds",))
+    async for delta in client.stream(request, max_tokens=structure_max_tokens(species)):
+        for _, compound in scanner.feed(delta):
+            matched, _ = match_structures(remaining, {"compounds": [compound]})
+            for name, structure in matched.items():
+                remaining = [sp for sp in remaining if sp["name"] != name]
+                found(name, structure)
+    await archive(scanner.text)
+    if not remaining:
+        return []
+    # whatever the object scanner couldn't take, the full (repairing) parse gets a second look at
     try:
-        parsed = json.loads(content.replace("```json", ""))
-    except json.JSONDecodeError as e:
-        raise ValueError(f"GPT JSON parse failed: {e}\nContent:\n{content}")
+        reply = parse_llm_json(scanner.text)
+    except ValueError:
+        return [dict(sp, problems=["the reply was not valid JSON"]) for sp in remaining]
+    matched, lost = match_structures(remaining, reply if isinstance(reply, dict) else {})
+    for name, structure in matched.items():
+        found(name, structure)
+    return lost
 
-    reactants, products = [], []
 
-    for compound in parsed["reactants"]:
-        name = compound["name"]
-        firebase_compounds.child(name).set(compound)
-        reactants.append(compound)
+def _stored_compound(key: str) -> Optional[dict]:
+    compound = compound_cache.get(key)
+    if compound is None:
+        compound = firebase_compounds.child(key).get()
+        if compound:
+            compound_cache.put(key, compound)
+    return compound or None
+
+
+async def generate_reactions(prompts: Iterable[str], client: Optional[LLMClient] = None) -> List:
+    """
+    Stored reactions for many prompts at once, in order, concurrently within
+    the client's concurrency limit. A prompt that fails yields its exception.
+    """
+    client = client or get_llm_client()
+    return await asyncio.gather(*(query_gpt_and_store_if_missing_async(p, client) for p in prompts),
+                                return_exceptions=True)
+
 
-    for compound in parsed["products"]:
-        name = compound["name"]
+def query_gpt_and_store_if_missing(prompt: str):
+    """Blocking form of `query_gpt_and_store_if_missing_async` for synchronous callers."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(query_gpt_and_store_if_missing_async(prompt))
+    # called from inside a running loop: run on a private loop in a worker thread
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(asyncio.run, query_gpt_and_store_if_missing_async(prompt)).result()
+
+
+async def _save_raw_output(prompt: str, reaction_id: str, label: str, content: str):
+    """Archive a raw reply in `raw_log`; read it back with `raw_log.latest(reaction_id, label)`."""
+    # compression, a file append and an SQLite commit: on a worker thread, like the other store writes
+    await asyncio.to_thread(raw_log.append, reaction_id, label, content, prompt=prompt)
+
+
+def _store_generated_reaction(prompt: str, reaction_id: str, outline: dict, species: List[dict],
+                              known: dict, generated: dict):
+    global _library_version
+    for name, compound in list(generated.items()):
+        compound = generated[name] = dict(compound, name=name)
         firebase_compounds.child(name).set(compound)
-        products.append(compound)
+        compound_cache.put(name, compound)
+    reactants, products = assemble_reaction(outline, species, {**known, **generated})
 
-    firebase_reactions.child(reaction_id).set({
+    reaction_cache.put(reaction_id, {
         "prompt": prompt,
         "reactants": reactants,
         "products": products,
-        "reaction": parsed.get("reaction", ""),
-        "reactionDescription": parsed.get("reactionDescription", "")
+        "reaction": outline.get("reaction", ""),
+        "reactionDescription": outline.get("reactionDescription", "")
     })
 
+    if _prompt_index is not None:
+        _prompt_index.add(reaction_id, prompt, outline.get("reaction", ""))
+    _library_version += 1
+
     return {
         "reaction_id": reaction_id,
         "reactants": reactants,
         "products": products,
-        "reaction": parsed.get("reaction", ""),
-        "reactionDescription": parsed.get("reactionDescription", "")
+        "reaction": outline.get("reaction", ""),
+        "reactionDescription": outline.get("reactionDescription", "")
     }
@@ -0,0 +1,109 @@
+# json_repair.py – tolerant clean-up of almost-JSON LLM replies
+# ------------------------------------------------------------------ #
+import re
+
+_FENCE = re.compile(r"^\s*```[a-zA-Z]*[ \t]*\r?\n?|\r?\n?[ \t]*```\s*$")
+_CLOSERS = {"{": "}", "[": "]"}
+_SCALAR_TAIL = re.compile(r"[:\[,]\s*(?:-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?|true|false|null)\s*$")
+
+
+def strip_fences(text: str) -> str:
+    """Drop a surrounding ```json ... ``` fence, if any."""
+    return _FENCE.sub("", text.strip()).strip()
+
+
+def repair_json(text: str) -> str:
+    """
+    Best-effort valid JSON from an LLM reply, in one pass:
+
+        - a ```json fence and any prose before the first '{' / '[' or after
+          the top-level value are dropped
+        - trailing commas before '}' / ']' are removed
+        - raw newlines and tabs inside strings are escaped
+        - a reply cut off mid-way (token limit, dropped stream) is cut back
+          to its last complete value and the open arrays and objects closed
+
+    Valid JSON comes back unchanged apart from the fence. The result is not
+    guaranteed to parse – a reply that is broken in other ways still isn't.
+    """
+    text = strip_fences(text)
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    if not starts:
+        return text
+    out = []
+    stack = []                  # open "{" / "["
+    expect_key = []             # per open object: next string is a key
+    in_string = escape = False
+    string_is_key = False
+    safe = (0, "")              # (len(out), stack) after the last complete value
+    for ch in text[min(starts):]:
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+                out.append(ch)
+                if not string_is_key:
+                    safe = (len(out), "".join(stack))
+                continue
+            elif ch == "\n":
+                ch = "\\n"
+            elif ch == "\t":
+                ch = "\\t"
+            elif ch == "\r":
+                continue
+            out.append(ch)
+            continue
+        if ch == '"':
+            in_string = True
+            string_is_key = bool(stack) and stack[-1] == "{" and expect_key[-1]
+        elif ch in "{[":
+            stack.append(ch)
+            expect_key.append(ch == "{")
+            out.append(ch)
+            safe = (len(out), "".join(stack))
+            continue
+        elif ch in "}]":
+            if not stack:
+                break
+            _drop_trailing_comma(out)
+            stack.pop()
+            expect_key.pop()
+            out.append(ch)
+            safe = (len(out), "".join(stack))
+            if not stack:
+                return "".join(out)
+            continue
+        elif ch == ",":
+            _drop_trailing_space(out)
+            safe = (len(out), "".join(stack))
+            if stack and stack[-1] == "{":
+                expect_key[-1] = True
+        elif ch == ":":
+            if stack and stack[-1] == "{":
+                expect_key[-1] = False
+        out.append(ch)
+
+    # cut off: keep everything up to the last complete value, then close what was open there
+    if stack:
+        if not in_string and _SCALAR_TAIL.search("".join(out[safe[0]:])):
+            safe = (len(out), "".join(stack))        # ends on a complete number / literal
+        n, open_at_safe = safe
+        out = out[:n]
+        _drop_trailing_comma(out)
+        out.extend(_CLOSERS[c] for c in reversed(open_at_safe))
+    return "".join(out)
+
+
+def _drop_trailing_space(out: list):
+    while out and out[-1] in " \t\r\n":
+        out.pop()
+
+
+def _drop_trailing_comma(out: list):
+    _drop_trailing_space(out)
+    if out and out[-1] == ",":
+        out.pop()
+        _drop_trailing_space(out)
@@ -0,0 +1,78 @@
+# json_stream.py – incremental JSON scanning of streamed LLM replies
+# ------------------------------------------------------------------ #
+import json
+from typing import Iterable, List, Tuple
+
+STREAMED_KEYS = ("reactants", "products", "compounds")
+
+
+class JSONObjectStream:
+    """
+    Feeds a JSON document in arbitrary chunks and hands back every object
+    that closes directly inside one of the top-level arrays named in `keys`
+    – each reactant, product or compound as soon as its closing brace
+    arrives, long before the document ends.
+
+    A single pass over each character keeps the nesting stack, the string
+    and escape state, and the last key seen at the top level; nothing is
+    re-scanned. Text before the first '{' (a ```json fence) is skipped.
+    """
+    def __init__(self, keys: Iterable[str] = STREAMED_KEYS):
+        self.keys = frozenset(keys)
+        self.text = ""
+        self._pos = 0
+        self._stack: List[str] = []          # "{" / "["
+        self._in_string = False
+        self._escape = False
+        self._string_start = -1
+        self._last_string = ""
+        self._top_key = None                 # key of the current top-level value
+        self._array_key = None               # top-level array being streamed, if any
+        self._object_start = -1
+
+    def feed(self, chunk: str) -> List[Tuple[str, dict]]:
+        """Append `chunk`; returns the (key, object) pairs completed by it, in order."""
+        self.text += chunk
+        text, stack = self.text, self._stack
+        done = []
+        for i in range(self._pos, len(text)):
+            ch = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    self._last_string = text[self._string_start + 1:i]
+                continue
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i
+            elif ch == ":" and len(stack) == 1:
+                self._top_key = self._last_string
+            elif ch in "{[":
+                if not stack and ch == "[":
+                    continue                 # only a top-level object is streamed
+                stack.append(ch)
+                if len(stack) == 2 and ch == "[":
+                    self._array_key = self._top_key if self._top_key in self.keys else None
+                elif len(stack) == 3 and ch == "{" and self._array_key is not None:
+                    self._object_start = i
+            elif ch in "}]" and stack:
+                if len(stack) == 3 and ch == "}" and self._array_key is not None and self._object_start >= 0:
+                    try:
+                        done.append((self._array_key, json.loads(text[self._object_start:i + 1])))
+                    except json.JSONDecodeError:
+                        pass                 # left to the full-document parse
+                    self._object_start = -1
+                elif len(stack) == 2:
+                    self._array_key = None
+                stack.pop()
+        self._pos = len(text)
+        return done
+
+    @property
+    def complete(self) -> bool:
+        """True once the top-level object has closed."""
+        return self._pos > 0 and not self._stack and "{" in self.text
@@ -0,0 +1,344 @@
+# kinetics.py – vectorized mass-action kinetics
+# ------------------------------------------------------------------ #
+import re
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from scipy import sparse
+
+R_GAS = 8.314462618          # J / (mol K)
+ATM = 101325.0               # Pa
+ZERO_C = 273.15              # K
+
+# Arrhenius defaults used when the reaction JSON carries no "kinetics" block.
+# Picked so a 1 atm bimolecular gas reaction half-converts in a few seconds
+# around room temperature and visibly speeds up towards 100 °C.
+DEFAULT_A = 3.0e9
+DEFAULT_EA = 5.0e4           # J / mol
+
+_ARROWS = ("<=>", "⇌", "->", "→", "⟶", "=>", "=")
+_SPECTATORS = {"energy", "heat", "light", "hv", "hν"}
+
+
+class ReactionConditions:
+    """
+    Values behind the Temperature / Pressure / Concentration sliders.
+    `concentration` is the mole fraction of the first reactant ("Reactant A");
+    `thermostat` names the MD thermostat (see thermostats.THERMOSTATS).
+    Thermostats and barostats hold this object and read it every step.
+    """
+    def __init__(self, temperature_c: float = 25.0, pressure_atm: float = 1.0, concentration: float = 0.5,
+                 thermostat: str = "berendsen"):
+        self.temperature_c = temperature_c
+        self.pressure_atm = pressure_atm
+        self.concentration = concentration
+        self.thermostat = thermostat
+
+    @property
+    def temperature_k(self) -> float:
+        return self.temperature_c + ZERO_C
+
+    def total_concentration(self) -> float:
+        """Ideal-gas total concentration in mol/L at the current T and P."""
+        return self.pressure_atm * ATM / (R_GAS * self.temperature_k) / 1000.0
+
+
+class Reaction:
+    """
+    One irreversible elementary step with a modified Arrhenius rate constant
+        k(T) = A * T**beta * exp(-Ea / (R T))
+    `orders` defaults to the reactant stoichiometry (mass action).
+    """
+    def __init__(
+        self,
+        reactants: Dict[str, float],
+        products: Dict[str, float],
+        A: float = DEFAULT_A,
+        Ea: float = DEFAULT_EA,
+        beta: float = 0.0,
+        orders: Optional[Dict[str, float]] = None,
+    ):
+        self.reactants = reactants
+        self.products = products
+        self.A = A
+        self.Ea = Ea
+        self.beta = beta
+        self.orders = orders if orders is not None else dict(reactants)
+
+
+# ---------- equation parsing ----------------------------------------------
+def _parse_side(side: str) -> Dict[str, float]:
+    terms = {}
+    for term in re.split(r"\s+\+\s+", side.strip()):
+        term = term.strip()
+        if not term:
+            continue
+        m = re.match(r"^(\d+/\d+|\d+(?:\.\d+)?)?\s*(.+)$", term)
+        coef, species = m.group(1), m.group(2).strip()
+        species = re.sub(r"\((?:s|l|g|aq)\)$", "", species).strip()
+        if species.lower() in _SPECTATORS:
+            continue
+        if coef and "/" in coef:
+            num, den = coef.split("/")
+            value = float(num) / float(den)
+        else:
+            value = float(coef) if coef else 1.0
+        terms[species] = terms.get(species, 0.0) + value
+    return terms
+
+
+def parse_equation(equation: str):
+    """
+    "C2H5OH + 3O2 → 2CO2 + 3H2O"  ->  ({"C2H5OH": 1, "O2": 3}, {"CO2": 2, "H2O": 3})
+    """
+    for arrow in _ARROWS:
+        if arrow in equation:
+            lhs, rhs = equation.split(arrow, 1)
+            reactants, products = _parse_side(lhs), _parse_side(rhs)
+            if reactants and products:
+                return reactants, products
+            break
+    raise ValueError(f"Cannot parse reaction equation: {equation!r}")
+
+
+def reaction_from_json(js) -> Reaction:
+    """Build a `Reaction` from the stored reaction JSON (`reaction` + optional `kinetics`)."""
+    reactants, products = parse_equation(js.get("reaction", ""))
+    params = js.get("kinetics") or {}
+    # LLM equations are overall, not elementary: unless told otherwise assume
+    # first order in each reactant rather than raising c to the coefficients.
+    orders = params.get("orders") or {name: 1.0 for name in reactants}
+    return Reaction(
+        reactants, products,
+        A=float(params.get("A", DEFAULT_A)),
+        Ea=float(params.get("Ea", DEFAULT_EA)),
+        beta=float(params.get("beta", 0.0)),
+        orders=orders,
+    )
+
+
+# ---------- model ---------------------------------------------------------
+class KineticsModel:
+    """
+    Stoichiometry-matrix form of a reaction set.
+
+    species        S names, `index` maps name -> row
+    reactant_stoich  (R, S) sparse reactant coefficients
+    product_stoich   (R, S) sparse product coefficients
+    stoich           (S, R) sparse net stoichiometry, dc/dt = stoich @ rates
+    Reactant orders are packed into (R, K) index/exponent tables, K being the
+    largest number of distinct reactants in any step, so a rate evaluation is a
+    single gather + product over a tiny axis instead of a Python loop.
+    """
+    def __init__(self, reactions: Sequence[Reaction], species: Optional[List[str]] = None):
+        self.reactions = list(reactions)
+        if species is None:
+            seen = {}
+            for rx in self.reactions:
+                for name in list(rx.reactants) + list(rx.products):
+                    seen.setdefault(name, None)
+            species = list(seen)
+        self.species = list(species)
+        self.index = {name: i for i, name in enumerate(self.species)}
+
+        S, R = len(self.species), len(self.reactions)
+        rows, cols, r_val, p_val = [], [], [], []
+        for j, rx in enumerate(self.reactions):
+            for name, nu in rx.reactants.items():
+                rows.append(j); cols.append(self.index[name]); r_val.append(nu); p_val.append(0.0)
+            for name, nu in rx.products.items():
+                rows.append(j); cols.append(self.index[name]); r_val.append(0.0); p_val.append(nu)
+        self.reactant_stoich = sparse.csr_matrix((r_val, (rows, cols)), shape=(R, S))
+        self.product_stoich = sparse.csr_matrix((p_val, (rows, cols)), shape=(R, S))
+        self.stoich = (self.product_stoich - self.reactant_stoich).T.tocsr()
+
+        self.A = np.array([rx.A for rx in self.reactions], dtype=float)
+        self.Ea = np.array([rx.Ea for rx in self.reactions], dtype=float)
+        self.beta = np.array([rx.beta for rx in self.reactions], dtype=float)
+
+        # padded order tables; padding points at an extra "always 1" slot (index S)
+        K = max([len(rx.orders) for rx in self.reactions] + [1])
+        self.order_index = np.full((R, K), S, dtype=np.intp)
+        self.order_power = np.zeros((R, K))
+        for j, rx in enumerate(self.reactions):
+            for k, (name, order) in enumerate(rx.orders.items()):
+                self.order_index[j, k] = self.index[name]
+                self.order_power[j, k] = order
+
+        # Integer orders are evaluated as-is so rates and Jacobian stay smooth
+        # through the tiny negative undershoots implicit solvers produce;
+        # fractional orders need c >= 0.
+        self._fractional = bool(np.any(self.order_power != np.round(self.order_power)))
+        # all-first-order steps (the library default) skip the power entirely
+        self._unit_orders = bool(np.all(self.order_power[self.order_index < S] == 1.0))
+
+        # sparsity pattern of d(rates)/dc, (R, S), fixed by the order tables
+        real = self.order_index < S
+        self._jac_rows, self._jac_slot = np.nonzero(real)
+        self._jac_cols = self.order_index[self._jac_rows, self._jac_slot]
+
+    @property
+    def n_species(self) -> int:
+        return len(self.species)
+
+    @property
+    def n_reactions(self) -> int:
+        return len(self.reactions)
+
+    def rate_constants(self, temperature_k: float) -> np.ndarray:
+        return self.A * temperature_k ** self.beta * np.exp(-self.Ea / (R_GAS * temperature_k))
+
+    def rates(self, c: np.ndarray, k: np.ndarray) -> np.ndarray:
+        """
+        Reaction rates for concentrations `c` of shape (S,) or (S, M) – the
+        latter evaluates M independent cells at once (e.g. a spatial grid).
+        """
+        if self._fractional:
+            c = np.maximum(c, 0.0)
+        ones = np.ones((1,) + c.shape[1:], dtype=c.dtype)
+        ext = np.concatenate([c, ones], axis=0)
+        kk = k.reshape(k.shape + (1,) * (c.ndim - 1))
+        if self._unit_orders:
+            return kk * np.prod(ext[self.order_index], axis=1)
+        power = self.order_power.reshape(self.order_power.shape + (1,) * (c.ndim - 1))
+        return kk * np.prod(ext[self.order_index] ** power, axis=1)
+
+    def rhs(self, c: np.ndarray, k: np.ndarray) -> np.ndarray:
+        return self.stoich @ self.rates(c, k)
+
+    def _rate_jacobian_values(self, c: np.ndarray, k: np.ndarray) -> np.ndarray:
+        if self._fractional:
+            c = np.maximum(c, 0.0)
+        ext = np.append(c, 1.0)
+        F = ext[self.order_index] ** self.order_power                  # (R, K)
+        j, m, i = self._jac_rows, self._jac_slot, self._jac_cols
+        p = self.order_power[j, m]
+        others = np.ones_like(p)
+        for other in range(F.shape[1]):
+            others *= np.where(m == other, 1.0, F[j, other])
+        d_own = p * np.where(p == 1.0, 1.0, np.maximum(c[i], 1e-30) ** (p - 1.0))
+        return k[j] * d_own * others
+
+    def rate_jacobian(self, c: np.ndarray, k: np.ndarray):
+        """
+        Analytic d(rates)/dc as an (R, S) sparse matrix:
+            dr_j/dc_i = k_j * p_ji * c_i**(p_ji - 1) * prod_{m != i} c_m**p_jm
+        """
+        return sparse.csr_matrix((self._rate_jacobian_values(c, k), (self._jac_rows, self._jac_cols)),
+                                 shape=(self.n_reactions, self.n_species))
+
+    def _jacobian_assembly(self):
+        """
+        Symbolic part of J = stoich @ dR, computed once: the CSC pattern of J
+        (diagonal always included, so solvers can shift it in place) and a
+        sparse map B with J.data = B @ dR.data.
+        """
+        if getattr(self, "_assembly", None) is not None:
+            return self._assembly
+        S = self.n_species
+        st = self.stoich.tocsc()
+        counts = np.diff(st.indptr)[self._jac_rows]            # species touched by each dR entry's reaction
+        entry = np.repeat(np.arange(len(self._jac_rows)), counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        pos = st.indptr[self._jac_rows][entry] + offsets
+        rows = st.indices[pos]
+        cols = self._jac_cols[entry]
+        vals = st.data[pos]
+
+        rows = np.concatenate([rows, np.arange(S)])
+        cols = np.concatenate([cols, np.arange(S)])
+        keys = cols.astype(np.int64) * S + rows                  # CSC order: by column, then row
+        uniq, slot = np.unique(keys, return_inverse=True)
+        n_real = len(entry)
+        B = sparse.csr_matrix((vals, (slot[:n_real], entry)), shape=(len(uniq), len(self._jac_rows)))
+        indices = (uniq % S).astype(np.int32)
+        indptr = np.searchsorted(uniq // S, np.arange(S + 1)).astype(np.int32)
+        diag = slot[n_real:]
+        self._assembly = (B, indices, indptr, diag)
+        return self._assembly
+
+    def jacobian(self, c: np.ndarray, k: np.ndarray):
+        """
+        Analytic sparse (S, S) Jacobian of `rhs` in CSC form. Its sparsity
+        pattern is fixed (and always contains the diagonal), so only the values
+        are recomputed: one sparse mat-vec over the rate derivatives.
+        """
+        B, indices, indptr, _ = self._jacobian_assembly()
+        data = B @ self._rate_jacobian_values(c, k)
+        return sparse.csc_matrix((data, indices, indptr), shape=(self.n_species, self.n_species))
+
+    def integrate(self, c0, t_end: float, temperature_k: float, n_steps: int = 200, n_out: Optional[int] = None):
+        """
+        Fixed-step RK4 from 0 to `t_end`. Returns (times, C) with C of shape
+        (n_out, S) sampled uniformly; `n_out` defaults to n_steps + 1.
+        """
+        c = np.array(c0, dtype=float)
+        k = self.rate_constants(temperature_k)
+        dt = t_end / n_steps
+        n_out = n_out or n_steps + 1
+        out_steps = np.linspace(0, n_steps, n_out).round().astype(int)
+        C = np.empty((n_out,) + c.shape)
+        o = 0
+        for step in range(n_steps + 1):
+            while o < n_out and out_steps[o] == step:
+                C[o] = c
+                o += 1
+            if step == n_steps:
+                break
+            k1 = self.rhs(c, k)
+            k2 = self.rhs(c + 0.5 * dt * k1, k)
+            k3 = self.rhs(c + 0.5 * dt * k2, k)
+            k4 = self.rhs(c + dt * k3, k)
+            c = np.maximum(c + dt / 6.0 * (k1 + 2 * k2 + 2 * k3 + k4), 0.0)
+        return np.linspace(0.0, t_end, n_out), C
+
+
+# ---------- conditions -> animation ---------------------------------------
+def initial_concentrations(model: KineticsModel, reactants: Dict[str, float], conditions: ReactionConditions):
+    """
+    Split the ideal-gas total concentration between the reactants: the first
+    one ("Reactant A") gets `conditions.concentration` of it, the rest share
+    the remainder in stoichiometric proportion.
+    """
+    c0 = np.zeros(model.n_species)
+    names = list(reactants)
+    total = conditions.total_concentration()
+    frac_a = min(max(conditions.concentration, 0.0), 1.0)
+    c0[model.index[names[0]]] = total * frac_a
+    rest = names[1:]
+    if rest:
+        weight = sum(reactants[n] for n in rest)
+        for n in rest:
+            c0[model.index[n]] = total * (1.0 - frac_a) * reactants[n] / weight
+    return c0
+
+
+def limiting_conversion(rx: Reaction, model: KineticsModel, x0: np.ndarray, X: np.ndarray) -> np.ndarray:
+    """
+    Consumed fraction of the limiting reactant of `rx` along the trajectory
+    rows `X`, in [0, 1]; `x0` is the start state in the same units
+    (concentrations or molecule counts). Zero throughout if a reactant is missing.
+    """
+    idx = [model.index[n] for n in rx.reactants]
+    nu = np.array([rx.reactants[n] for n in rx.reactants])
+    start = x0[idx] / nu
+    limiting = int(np.argmin(np.where(start > 0, start, np.inf)))
+    if start[limiting] <= 0:
+        return np.zeros(len(X))
+    consumed = (x0[idx[limiting]] - X[:, idx[limiting]]) / x0[idx[limiting]]
+    return np.clip(consumed, 0.0, 1.0)
+
+
+def reaction_progress(js, conditions: ReactionConditions, n_frames: int, sim_time: float = 10.0) -> np.ndarray:
+    """
+    Per-frame extent of reaction in [0, 1] for the stored reaction `js` under
+    `conditions`, over a fixed `sim_time` window (seconds). The extent is the
+    consumed fraction of the limiting reactant, so hotter / denser conditions
+    make the animation complete earlier and cold, dilute ones may never finish.
+    """
+    rx = reaction_from_json(js)
+    model = KineticsModel([rx])
+    c0 = initial_concentrations(model, rx.reactants, conditions)
+    _, C = model.integrate(c0, sim_time, conditions.temperature_k,
+                           n_steps=max(4 * n_frames, 200), n_out=n_frames)
+    return limiting_conversion(rx, model, c0, C)
@@ -0,0 +1,287 @@
+# llm_client.py – asyncio LLM client: bounded concurrency, timeouts, retries
+# ------------------------------------------------------------------ #
+import asyncio
+import random
+import weakref
+from typing import AsyncIterator, Awaitable, Callable, Iterable, List, Optional
+
+from .cassette import CassetteTransport, active_cassette
+
+MODEL = "gpt-4-turbo"
+SYSTEM_PROMPT = "You are a chemistry modeling assistant."
+DEFAULT_CONCURRENCY = 8
+
+# a transport takes a chat-completion request dict and returns the reply text;
+# one with a `stream(request)` async iterator of text deltas can also stream
+Transport = Callable[[dict], Awaitable[str]]
+
+
+class RetryableError(Exception):
+    """Raised by a transport for failures worth retrying: rate limits, timeouts, 5xx."""
+
+
+class LLMError(RuntimeError):
+    """The request failed for good: a non-retryable error, or retries ran out."""
+
+
+class OpenAITransport:
+    """
+    `openai.ChatCompletion.acreate` (openai 0.27). `api_base` points it at any
+    OpenAI-compatible server – a local stub for tests and benchmarks.
+    """
+    def __init__(self, api_base: Optional[str] = None, api_key: Optional[str] = None):
+        self.api_base = api_base
+        self.api_key = api_key
+
+    async def __call__(self, request: dict) -> str:
+        import openai
+        from openai import error
+
+        kwargs = dict(request)
+        if self.api_base:
+            kwargs["api_base"] = self.api_base
+        if self.api_key:
+            kwargs["api_key"] = self.api_key
+        try:
+            response = await openai.ChatCompletion.acreate(**kwargs)
+        except (error.RateLimitError, error.Timeout, error.APIConnectionError,
+                error.ServiceUnavailableError, error.TryAgain) as e:
+            raise RetryableError(str(e)) from e
+        except error.APIError as e:
+            if (e.http_status or 0) >= 500:
+                raise RetryableError(str(e)) from e
+            raise
+        return response.choices[0].message.content
+
+    async def stream(self, request: dict) -> AsyncIterator[str]:
+        import openai
+        from openai import error
+
+        kwargs = dict(request, stream=True)
+        if self.api_base:
+            kwargs["api_base"] = self.api_base
+        if self.api_key:
+            kwargs["api_key"] = self.api_key
+        try:
+            chunks = await openai.ChatCompletion.acreate(**kwargs)
+        except (error.RateLimitError, error.Timeout, error.APIConnectionError,
+                error.ServiceUnavailableError, error.TryAgain) as e:
+            raise RetryableError(str(e)) from e
+        async for chunk in chunks:
+            delta = chunk.choices[0].delta.get("content")
+            if delta:
+                yield delta
+
+
+class LLMClient:
+    """
+    Chat completions from asyncio code without blocking the event loop.
+
+    At most `max_concurrency` requests are in flight at once; the rest queue
+    on a semaphore, so `complete_many` over hundreds of prompts stays inside
+    the provider's rate limit. Each attempt is cut off after `timeout`
+    seconds. Timeouts and `RetryableError`s are retried up to `max_retries`
+    times with "full jitter" exponential backoff – a uniform delay in
+    [0, min(max_backoff, backoff * 2^attempt)] – so a burst of rate-limited
+    requests does not retry in lockstep. Backoff sleeps outside the
+    semaphore, leaving the slot to requests that can go now.
+
+    Fields:
+        calls      transport calls made, retries included
+        retries    attempts that were retried
+        failures   requests that raised LLMError
+        in_flight  requests currently holding a slot
+    """
+    def __init__(
+        self,
+        transport: Optional[Transport] = None,
+        *,
+        max_concurrency: int = DEFAULT_CONCURRENCY,
+        timeout: float = 120.0,
+        max_retries: int = 4,
+        backoff: float = 1.0,
+        max_backoff: float = 30.0,
+        model: str = MODEL,
+        max_tokens: int = 3500,
+        temperature: float = 0.5,
+        seed: Optional[int] = None,
+    ):
+        self.transport = transport or OpenAITransport()
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.model = model
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self._rng = random.Random(seed)
+        # one semaphore per event loop: asyncio primitives must not cross loops
+        self._semaphores = weakref.WeakKeyDictionary()
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self.in_flight = 0
+
+    def request(self, prompt: str, system: str = SYSTEM_PROMPT, **overrides) -> dict:
+        """The chat-completion request for `prompt`; `overrides` replace model/max_tokens/temperature."""
+        request = {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": system},
+                {"role": "user", "content": prompt},
+            ],
+            "max_tokens": self.max_tokens,
+            "temperature": self.temperature,
+        }
+        request.update(overrides)
+        return request
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        sem = self._semaphores.get(loop)
+        if sem is None:
+            sem = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return sem
+
+    def backoff_delay(self, attempt: int) -> float:
+        return self._rng.uniform(0.0, min(self.max_backoff, self.backoff * 2.0 ** attempt))
+
+    async def complete(self, prompt: str, **kwargs) -> str:
+        """Reply text for `prompt`; `kwargs` go to `request`. Raises LLMError when retries run out."""
+        request = self.request(prompt, **kwargs)
+        sem = self._semaphore()
+        for attempt in range(self.max_retries + 1):
+            async with sem:
+                self.in_flight += 1
+                self.calls += 1
+                try:
+                    return await asyncio.wait_for(self.transport(request), self.timeout)
+                except asyncio.TimeoutError:
+                    reason = f"timed out after {self.timeout:g} s"
+                except RetryableError as e:
+                    reason = str(e)
+                except Exception as e:
+                    self.failures += 1
+                    raise LLMError(f"LLM request failed: {e}") from e
+                finally:
+                    self.in_flight -= 1
+            if attempt < self.max_retries:
+                self.retries += 1
+                await asyncio.sleep(self.backoff_delay(attempt))
+        self.failures += 1
+        raise LLMError(f"LLM request failed after {self.max_retries + 1} attempts: {reason}")
+
+    async def stream(self, prompt: str, **kwargs) -> AsyncIterator[str]:
+        """
+        Reply text for `prompt` as it is generated, delta by delta. Holds a
+        concurrency slot until the stream ends; `timeout` bounds the wait for
+        each delta. Failures are retried as in `complete` only until the first
+        delta – after that the caller has seen partial output, so they raise.
+        Transports without `stream` yield the whole reply once.
+        """
+        request = self.request(prompt, **kwargs)
+        if not hasattr(self.transport, "stream"):
+            yield await self.complete(prompt, **kwargs)
+            return
+        sem = self._semaphore()
+        for attempt in range(self.max_retries + 1):
+            started = False
+            async with sem:
+                self.in_flight += 1
+                self.calls += 1
+                deltas = self.transport.stream(request)
+                try:
+                    while True:
+                        try:
+                            delta = await asyncio.wait_for(deltas.__anext__(), self.timeout)
+                        except StopAsyncIteration:
+                            return
+                        started = True
+                        yield delta
+                except asyncio.TimeoutError:
+                    reason = f"no output for {self.timeout:g} s"
+                except RetryableError as e:
+                    reason = str(e)
+                except Exception as e:
+                    self.failures += 1
+                    raise LLMError(f"LLM stream failed: {e}") from e
+                finally:
+                    self.in_flight -= 1
+                    if hasattr(deltas, "aclose"):
+                        await deltas.aclose()
+            if started:
+                self.failures += 1
+                raise LLMError(f"LLM stream broke off: {reason}")
+            if attempt < self.max_retries:
+                self.retries += 1
+                await asyncio.sleep(self.backoff_delay(attempt))
+        self.failures += 1
+        raise LLMError(f"LLM stream failed after {self.max_retries + 1} attempts: {reason}")
+
+    async def complete_many(self, prompts: Iterable[str], **kwargs) -> List:
+        """Replies for all `prompts`, in order, run concurrently; a failed prompt yields its LLMError."""
+        return await asyncio.gather(*(self.complete(p, **kwargs) for p in prompts), return_exceptions=True)
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls per key: the first `do(key, fn)` runs `fn()`
+    as a task, and callers arriving with the same key while it runs await
+    that same task instead of starting their own. Every waiter gets the
+    result, or the exception; the key is released when the task finishes,
+    so a failed call is not cached. Waiters are shielded – one cancelled
+    caller (a client disconnect) doesn't cancel the shared work.
+
+    Fields:
+        started   calls that ran `fn`
+        shared    calls that joined a task already in flight
+    """
+    def __init__(self):
+        self._tasks = {}
+        self.started = 0
+        self.shared = 0
+
+    def __contains__(self, key) -> bool:
+        return key in self._tasks
+
+    async def do(self, key, fn: Callable[[], Awaitable]):
+        loop = asyncio.get_running_loop()
+        task = self._tasks.get(key)
+        if task is None or task.get_loop() is not loop:
+            task = self._tasks[key] = loop.create_task(fn())
+            task.add_done_callback(lambda t: self._release(key, t))
+            self.started += 1
+        else:
+            self.shared += 1
+        return await asyncio.shield(task)
+
+    def _release(self, key, task):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        if not task.cancelled():
+            task.exception()        # retrieved here, so an unawaited failure isn't logged as lost
+
+
+_default_client: Optional[LLMClient] = None
+
+
+def get_llm_client() -> LLMClient:
+    """
+    The shared client the generation code uses unless handed another –
+    through the CHEMSIM_CASSETTE cassette, recording or replaying, when set.
+    """
+    global _default_client
+    if _default_client is None:
+        cassette = active_cassette()
+        if cassette is None:
+            _default_client = LLMClient()
+        else:
+            _default_client = LLMClient(CassetteTransport(cassette, None if cassette.replaying else OpenAITransport()))
+    return _default_client
+
+
+def set_llm_client(client: Optional[LLMClient]):
+    """Swap the shared client – e.g. for one on a stub transport; None resets to the default."""
+    global _default_client
+    _default_client = client
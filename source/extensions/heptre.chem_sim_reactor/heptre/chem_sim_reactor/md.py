@@ -0,0 +1,393 @@
+# md.py – classical molecular dynamics for the generated structures
+# ------------------------------------------------------------------ #
+import math
+from collections import defaultdict
+from typing import Optional, Sequence
+
+import numpy as np
+
+from .particles import cell_list_pairs
+
+# units: Å, fs, amu, e, kJ/mol
+COULOMB = 1389.35457        # kJ/mol · Å / e²
+ACCEL = 1.0e-4              # (kJ/mol/Å) / amu -> Å/fs²
+BOLTZ = 0.0083144626        # kJ/mol/K
+K_BOND = 2000.0             # kJ/mol/Å²,  E = k/2 (r - r0)²
+K_ANGLE = 400.0             # kJ/mol/rad², E = k/2 (θ - θ0)²
+CHARGE_PER_EN = 0.15        # e moved along a bond per unit electronegativity difference
+PRESSURE_ATM = 16388.2      # kJ/mol/Å³ -> atm
+
+# element: (mass amu, covalent radius Å, LJ sigma Å, LJ epsilon kJ/mol, Pauling electronegativity)
+ELEMENTS = {
+    "H":  (1.008,  0.31, 2.57, 0.184, 2.20),
+    "C":  (12.011, 0.76, 3.43, 0.439, 2.55),
+    "N":  (14.007, 0.71, 3.26, 0.289, 3.04),
+    "O":  (15.999, 0.66, 3.12, 0.251, 3.44),
+    "F":  (18.998, 0.57, 3.00, 0.209, 3.98),
+    "Na": (22.990, 1.66, 2.98, 0.126, 0.93),
+    "P":  (30.974, 1.07, 3.69, 1.277, 2.19),
+    "S":  (32.06,  1.05, 3.59, 1.146, 2.58),
+    "Cl": (35.45,  1.02, 3.52, 0.950, 3.16),
+    "K":  (39.098, 2.03, 3.40, 0.146, 0.82),
+    "Br": (79.904, 1.20, 3.73, 1.050, 2.96),
+}
+_DEFAULT_ELEMENT = (12.0, 0.75, 3.40, 0.400, 2.50)
+
+
+def _equilibrium_angle(element: str, degree: int) -> float:
+    """θ0 in degrees from the centre atom's element and number of bonds."""
+    if degree >= 4:
+        return 109.47
+    if degree == 3:
+        return 107.0 if element in ("N", "P") else 120.0
+    if element in ("O", "S"):
+        return 104.5
+    return 180.0 if element == "C" else 120.0
+
+
+def _minimum_image(d: np.ndarray, box: float) -> np.ndarray:
+    d -= np.float32(box) * np.round(d * np.float32(1.0 / box))
+    return d
+
+
+def _pair_params(a, b, sigma, epsilon, charge, cutoff: float):
+    """(eps4, sig2, qq, lj_shift) per listed pair, Lorentz–Berthelot mixed."""
+    eps4 = (4.0 * np.sqrt(epsilon[a] * epsilon[b])).astype(np.float32)
+    sig2 = ((0.5 * (sigma[a] + sigma[b])) ** 2).astype(np.float32)
+    qq = (COULOMB * charge[a] * charge[b]).astype(np.float32)
+    sr6c = (sig2 / np.float32(cutoff ** 2)) ** 3
+    return eps4, sig2, qq, eps4 * (sr6c * sr6c - sr6c)       # shift keeps E continuous at the cutoff
+
+
+# The force kernels below return per-term force vectors (3, K), energies (K,) and
+# virials r·F (K,) rather than accumulating, so a caller can keep only the terms it owns.
+def _nonbonded_terms(x, i, j, params, box: float, cutoff: float):
+    """LJ + shifted-force Coulomb for listed pairs inside the cutoff: (i, j, force on i, energy, virial)."""
+    d = _minimum_image(x[:, i] - x[:, j], box)
+    r2 = np.einsum("ij,ij->j", d, d)
+    inside = r2 < cutoff ** 2
+    i, j, d, r2 = i[inside], j[inside], d[:, inside], r2[inside]
+    eps4, sig2, qq, shift = (p[inside] for p in params)
+    inv_r2 = 1.0 / r2
+    sr6 = (sig2 * inv_r2) ** 3
+    r = np.sqrt(r2)
+    rc = np.float32(cutoff)
+    f_over_r = eps4 * (12.0 * sr6 * sr6 - 6.0 * sr6) * inv_r2 + qq * (inv_r2 / r - 1.0 / (rc * rc * r))
+    energy = eps4 * (sr6 * sr6 - sr6) - shift + qq * (1.0 / r - 2.0 / rc + r / (rc * rc))
+    return i, j, f_over_r * d, energy, f_over_r * r2
+
+
+def _bond_terms(x, bonds, r0, box: float):
+    """Harmonic bonds: (a, b, force on a, energy, virial)."""
+    a, b = bonds[:, 0], bonds[:, 1]
+    d = _minimum_image(x[:, a] - x[:, b], box)
+    r = np.sqrt(np.einsum("ij,ij->j", d, d))
+    dr = r - r0
+    return a, b, (-K_BOND * dr / r) * d, 0.5 * K_BOND * dr * dr, -K_BOND * dr * r
+
+
+def _angle_terms(x, angles, theta0, box: float):
+    """Harmonic angles: (a, c, b, force on a, force on b, energy, virial); the centre takes -(fa + fb)."""
+    a, c, b = angles.T
+    u = _minimum_image(x[:, a] - x[:, c], box)
+    v = _minimum_image(x[:, b] - x[:, c], box)
+    ru = np.sqrt(np.einsum("ij,ij->j", u, u))
+    rv = np.sqrt(np.einsum("ij,ij->j", v, v))
+    cos = np.clip(np.einsum("ij,ij->j", u, v) / (ru * rv), -1.0, 1.0)
+    dtheta = np.arccos(cos) - theta0
+    # F_end = k dθ / sinθ * dcosθ/dx_end; (θ-π)/sinθ stays finite for linear centres
+    g = K_ANGLE * dtheta / np.maximum(np.sqrt(1.0 - cos * cos), 1e-3)
+    fa = g * (v / (ru * rv) - cos * u / (ru * ru))
+    fb = g * (u / (ru * rv) - cos * v / (rv * rv))
+    virial = np.einsum("ij,ij->j", u, fa) + np.einsum("ij,ij->j", v, fb)
+    return a, c, b, fa, fb, 0.5 * K_ANGLE * dtheta * dtheta, virial
+
+
+class MDSystem:
+    """
+    Velocity-Verlet MD over float32 structure-of-arrays state:
+
+    x, v, f        (3, N)   positions Å (wrapped into [0, box)), velocities Å/fs,
+                            forces kJ/mol/Å – one contiguous row per axis
+    mass, charge   (N,)     amu, e
+    bonds          (B, 2)   from the molecule bond graph, harmonic about r0
+    angles         (A, 3)   (end, centre, end) for every bonded pair of a centre
+    box            periodic cubic box edge, Å
+
+    Non-bonded terms are energy-shifted Lennard-Jones (Lorentz–Berthelot
+    mixing) plus shifted-force Coulomb, both cut at `cutoff`, with 1-2 and 1-3 pairs
+    excluded. They run over a Verlet list built to `cutoff + skin` from a cell
+    grid and rebuilt only once some atom has moved more than skin/2.
+
+    Optional `thermostat` / `barostat` (thermostats.py) are applied after
+    every step, vectorized over all atoms.
+    """
+    def __init__(
+        self,
+        elements: Sequence[str],
+        positions,
+        bonds,
+        box: float,
+        *,
+        molecule: Optional[Sequence[int]] = None,
+        charges=None,
+        cutoff: float = 9.0,
+        skin: float = 1.0,
+        dt: float = 0.5,
+        temperature_k: float = 298.15,
+        thermostat=None,
+        barostat=None,
+        seed: Optional[int] = None,
+    ):
+        n = len(elements)
+        self.elements = list(elements)
+        self.box = float(box)
+        self.cutoff, self.skin, self.dt = cutoff, skin, dt
+        if self.box < 2.0 * (cutoff + skin):
+            raise ValueError(f"box {box:.1f} Å is smaller than twice cutoff + skin")
+        self.rng = np.random.default_rng(seed)
+
+        params = np.array([ELEMENTS.get(e, _DEFAULT_ELEMENT) for e in self.elements], dtype=np.float32).reshape(n, 5)
+        self.mass, radius, self.sigma, self.epsilon, en = params.T.copy()
+        self.kinds = sorted(set(self.elements))
+        self.kind = np.array([self.kinds.index(e) for e in self.elements], dtype=np.int32)
+        self.molecule = np.zeros(n, dtype=np.intp) if molecule is None else np.asarray(molecule, dtype=np.intp)
+
+        self.x = np.ascontiguousarray(np.asarray(positions, dtype=np.float32).T)
+        np.mod(self.x, self.box, out=self.x)
+        self.f = np.zeros((3, n), dtype=np.float32)
+        self._inv_mass = (1.0 / self.mass).astype(np.float32)
+
+        # ---------- topology from the bond graph ---------------------------
+        self.bonds = np.asarray(bonds, dtype=np.intp).reshape(-1, 2)
+        self.r0 = (radius[self.bonds[:, 0]] + radius[self.bonds[:, 1]]).astype(np.float32)
+        nbrs = defaultdict(list)
+        for a, b in self.bonds:
+            nbrs[a].append(b)
+            nbrs[b].append(a)
+        angles, theta0 = [], []
+        for c, nb in nbrs.items():
+            t0 = math.radians(_equilibrium_angle(self.elements[c], len(nb)))
+            for k, a in enumerate(nb):
+                for b in nb[k + 1:]:
+                    angles.append((a, c, b))
+                    theta0.append(t0)
+        self.angles = np.array(angles, dtype=np.intp).reshape(-1, 3)
+        self.theta0 = np.array(theta0, dtype=np.float32)
+
+        if charges is None:
+            # bond-polarity charges: neutral per molecule, negative on the more electronegative end
+            q = np.zeros(n)
+            transfer = CHARGE_PER_EN * (en[self.bonds[:, 1]] - en[self.bonds[:, 0]])
+            np.add.at(q, self.bonds[:, 0], transfer)
+            np.add.at(q, self.bonds[:, 1], -transfer)
+            charges = q
+        self.charge = np.asarray(charges, dtype=np.float32)
+
+        pairs = np.concatenate([self.bonds, self.angles[:, [0, 2]]])
+        self._excluded = np.unique(np.minimum(pairs[:, 0], pairs[:, 1]) * n + np.maximum(pairs[:, 0], pairs[:, 1]))
+
+        self.time = 0.0
+        self.n_steps = 0
+        self.n_rebuilds = 0
+        self.potential = 0.0
+        self.virial = 0.0
+        self.thermostat, self.barostat = thermostat, barostat
+        self.v = np.zeros((3, n), dtype=np.float32)
+        self.set_velocities(temperature_k)
+        self._build_neighbours()
+        self.compute_forces()
+
+    # ---------- construction ------------------------------------------------
+    @classmethod
+    def from_molecules(cls, molecules, copies: int = 1, *, padding: float = 3.0, seed: Optional[int] = None, **kwargs):
+        """
+        `copies` randomly rotated replicas of each `MolecularStructure`, laid
+        out on a cubic lattice; the box grows to fit the lattice and cutoff.
+        """
+        # usd_writer pulls in pxr and Firebase; import lazily so md stays headless
+        from .usd_writer import auto_layout
+
+        rng = np.random.default_rng(seed)
+        templates = []
+        for mol in molecules:
+            layout = auto_layout(mol.atoms, mol.bonds)
+            ids = {a.id: k for k, a in enumerate(mol.atoms)}
+            xyz = np.array([layout[a.id] for a in mol.atoms], dtype=float)
+            xyz -= xyz.mean(axis=0)
+            bonds = [(ids[b.from_atom], ids[b.to_atom]) for b in mol.bonds
+                     if b.from_atom in ids and b.to_atom in ids]
+            templates.append(([a.element for a in mol.atoms], xyz, bonds))
+
+        extent = max(np.linalg.norm(t[1], axis=1).max(initial=0.0) for t in templates) * 2.0 + padding
+        total = copies * len(templates)
+        side = max(1, math.ceil(total ** (1.0 / 3.0) - 1e-9))
+        cutoff = kwargs.get("cutoff", 9.0) + kwargs.get("skin", 1.0)
+        box = max(side * extent, 3.0 * cutoff)           # >= 3 cells per side for the cell grid
+        spacing = box / side
+
+        elements, positions, bonds, molecule = [], [], [], []
+        for k in range(total):
+            els, xyz, bnd = templates[k % len(templates)]
+            q, _ = np.linalg.qr(rng.standard_normal((3, 3)))
+            cell = np.array([k // (side * side), (k // side) % side, k % side], dtype=float)
+            offset = len(elements)
+            elements += els
+            # small jitter: the layout grid has exactly linear angles, where the angle force has no direction
+            positions.append(xyz @ q.T + (cell + 0.5) * spacing + rng.normal(0.0, 0.05, xyz.shape))
+            bonds += [(a + offset, b + offset) for a, b in bnd]
+            molecule += [k] * len(els)
+        system = cls(elements, np.concatenate(positions), bonds, box, molecule=molecule, seed=seed, **kwargs)
+        system.minimize()               # the layout is a lattice sketch, not a geometry
+        return system
+
+    # ---------- state ---------------------------------------------------------
+    @property
+    def n_atoms(self) -> int:
+        return self.x.shape[1]
+
+    def set_velocities(self, temperature_k: float):
+        """Maxwell–Boltzmann velocities with zero total momentum."""
+        sigma = np.sqrt(BOLTZ * temperature_k * ACCEL / self.mass)
+        v = self.rng.standard_normal((3, self.n_atoms)) * sigma
+        v -= (v * self.mass).sum(axis=1, keepdims=True) / self.mass.sum()
+        self.v = v.astype(np.float32)
+
+    def kinetic_energy(self) -> float:
+        return float(0.5 * np.sum(self.mass * (self.v * self.v)) / ACCEL)
+
+    def temperature(self) -> float:
+        dof = max(3 * self.n_atoms - 3, 1)
+        return 2.0 * self.kinetic_energy() / (dof * BOLTZ)
+
+    # ---------- coupling interface (thermostats.py) ------------------------------
+    @property
+    def velocities(self) -> np.ndarray:
+        return self.v
+
+    def thermal_sigma(self, temperature_k: float) -> np.ndarray:
+        """Maxwell–Boltzmann velocity std per atom, Å/fs; (N,) broadcasts over (3, N)."""
+        return np.sqrt(BOLTZ * temperature_k * ACCEL / self.mass).astype(np.float32)
+
+    def pressure_atm(self) -> float:
+        """Virial pressure from the last force evaluation."""
+        return (2.0 * self.kinetic_energy() + self.virial) / (3.0 * self.box ** 3) * PRESSURE_ATM
+
+    def scale_box(self, mu: float):
+        """Scale box and coordinates by `mu`; the box never shrinks below 2 (cutoff + skin)."""
+        mu = max(mu, 2.0 * (self.cutoff + self.skin) / self.box)
+        self.box *= mu
+        self.x *= np.float32(mu)
+        np.mod(self.x, self.box, out=self.x)
+
+    def _couple(self, dt: float):
+        if self.thermostat is not None:
+            self.thermostat.apply(self, dt)
+        if self.barostat is not None:
+            self.barostat.apply(self, dt)
+
+    def _minimum_image(self, d: np.ndarray) -> np.ndarray:
+        return _minimum_image(d, self.box)
+
+    # ---------- Verlet list ------------------------------------------------------
+    def _build_neighbours(self):
+        n = self.n_atoms
+        i, j, _ = cell_list_pairs(self.x.T, self.box, self.cutoff + self.skin)
+        a, b = np.minimum(i, j), np.maximum(i, j)
+        if len(self._excluded):
+            keep = ~np.isin(a * n + b, self._excluded, assume_unique=False)
+            a, b = a[keep], b[keep]
+        self._pi, self._pj = a, b
+        self._pair = _pair_params(a, b, self.sigma, self.epsilon, self.charge, self.cutoff)
+        self._x_built = self.x.copy()
+        self.n_rebuilds += 1
+
+    def _needs_rebuild(self) -> bool:
+        d = self._minimum_image(self.x - self._x_built)
+        return float(np.max(np.einsum("ij,ij->j", d, d))) > (0.5 * self.skin) ** 2
+
+    # ---------- forces ---------------------------------------------------------------
+    def compute_forces(self) -> np.ndarray:
+        x, n = self.x, self.n_atoms
+        idx, wx, wy, wz = [], [], [], []
+
+        def push(atoms, w):
+            idx.append(atoms)
+            wx.append(w[0]); wy.append(w[1]); wz.append(w[2])
+
+        i, j, w, e, vir = _nonbonded_terms(x, self._pi, self._pj, self._pair, self.box, self.cutoff)
+        energy, virial = float(np.sum(e)), float(np.sum(vir))
+        push(i, w)
+        push(j, -w)
+        if len(self.bonds):
+            a, b, w, e, vir = _bond_terms(x, self.bonds, self.r0, self.box)
+            energy += float(np.sum(e))
+            virial += float(np.sum(vir))
+            push(a, w)
+            push(b, -w)
+        if len(self.angles):
+            a, c, b, fa, fb, e, vir = _angle_terms(x, self.angles, self.theta0, self.box)
+            energy += float(np.sum(e))
+            virial += float(np.sum(vir))
+            push(a, fa)
+            push(b, fb)
+            push(c, -(fa + fb))
+
+        atoms = np.concatenate(idx)
+        self.f[0] = np.bincount(atoms, np.concatenate(wx), n)
+        self.f[1] = np.bincount(atoms, np.concatenate(wy), n)
+        self.f[2] = np.bincount(atoms, np.concatenate(wz), n)
+        self.potential, self.virial = energy, virial
+        return self.f
+
+    def minimize(self, n_iter: int = 200, max_move: float = 0.05):
+        """
+        Steepest descent with every atom's move capped at `max_move` Å, to
+        relax strained input geometry before dynamics. Velocities are kept.
+        """
+        for _ in range(n_iter):
+            f = self.f
+            fmax = float(np.sqrt(np.max(np.einsum("ij,ij->j", f, f))))
+            if fmax < 10.0:                                  # kJ/mol/Å
+                break
+            self.x += np.float32(max_move / fmax) * f
+            np.mod(self.x, self.box, out=self.x)
+            if self._needs_rebuild():
+                self._build_neighbours()
+            self.compute_forces()
+
+    # ---------- integration ----------------------------------------------------------
+    def step(self, n_steps: int = 1):
+        """Velocity-Verlet: half kick, drift, (re)list, forces, half kick, coupling."""
+        half = np.float32(0.5 * self.dt * ACCEL) * self._inv_mass
+        dt = np.float32(self.dt)
+        for _ in range(n_steps):
+            self.v += half * self.f
+            self.x += dt * self.v
+            np.mod(self.x, self.box, out=self.x)
+            if self._needs_rebuild():
+                self._build_neighbours()
+            self.compute_forces()
+            self.v += half * self.f
+            self._couple(self.dt)
+            self.time += self.dt
+            self.n_steps += 1
+
+    def snapshot(self):
+        """
+        (positions (N, 3) float32, proto_indices = element kind, ids) for
+        `write_particle_instancer`; each molecule is made whole across the
+        periodic boundary around its first atom so bonds never stretch.
+        """
+        first = np.zeros(self.molecule.max() + 1, dtype=np.intp)
+        first[self.molecule[::-1]] = np.arange(self.n_atoms)[::-1]
+        anchor = self.x[:, first[self.molecule]]
+        whole = anchor + self._minimum_image(self.x - anchor)
+        return np.ascontiguousarray(whole.T), self.kind.copy(), np.arange(self.n_atoms, dtype=np.int64)
+
+    def trajectory(self, n_frames: int, steps_per_frame: int = 10):
+        """Yield `n_frames` snapshots, `steps_per_frame` steps apart (first one is the start)."""
+        yield self.snapshot()
+        for _ in range(n_frames - 1):
+            self.step(steps_per_frame)
+            yield self.snapshot()
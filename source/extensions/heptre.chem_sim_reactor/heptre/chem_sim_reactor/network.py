@@ -0,0 +1,355 @@
+# network.py – reaction network index over the stored reaction library
+# ------------------------------------------------------------------ #
+import hashlib
+import json
+import re
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+from scipy import sparse
+
+from .kinetics import DEFAULT_A, DEFAULT_EA, KineticsModel, Reaction, parse_equation
+
+WL_ITERATIONS = 4
+
+_TOKEN = re.compile(r"([A-Z][a-z]?|\(|\)|\[|\]|\d+)")
+
+
+# ---------- canonical species identity --------------------------------------
+def formula_counts(formula: str) -> Optional[Dict[str, int]]:
+    """
+    Element counts of a condensed formula: "C2H5OH" -> {"C": 2, "H": 6, "O": 1}.
+    Handles groups and hydrates ("Ca(OH)2", "CuSO4·5H2O"); trailing charges
+    and phase tags are dropped. None if the string is not a formula.
+    """
+    formula = re.sub(r"\((?:s|l|g|aq)\)$|\^?\d*[+-]$", "", formula.strip())
+    total: Dict[str, int] = {}
+    for part in re.split(r"[·•*.]", formula):
+        m = re.match(r"^(\d+)(.*)$", part)
+        mult, part = (int(m.group(1)), m.group(2)) if m else (1, part)
+        tokens = _TOKEN.findall(part)
+        if not part or "".join(tokens) != part:
+            return None
+        stack = [{}]
+        for k, tok in enumerate(tokens):
+            if tok.isdigit():
+                continue
+            n = int(tokens[k + 1]) if k + 1 < len(tokens) and tokens[k + 1].isdigit() else 1
+            if tok in "([":
+                stack.append({})
+            elif tok in ")]":
+                if len(stack) == 1:
+                    return None
+                group = stack.pop()
+                for el, c in group.items():
+                    stack[-1][el] = stack[-1].get(el, 0) + c * n
+            else:
+                stack[-1][tok] = stack[-1].get(tok, 0) + n
+        if len(stack) != 1:
+            return None
+        for el, c in stack[0].items():
+            total[el] = total.get(el, 0) + c * mult
+    return total or None
+
+
+def hill_formula(counts: Dict[str, int]) -> str:
+    """Hill order: C, then H, then the rest alphabetically; without carbon, all alphabetically."""
+    if "C" in counts:
+        order = ["C"] + (["H"] if "H" in counts else []) + sorted(e for e in counts if e not in ("C", "H"))
+    else:
+        order = sorted(counts)
+    return "".join(e + (str(counts[e]) if counts[e] != 1 else "") for e in order)
+
+
+def _digest(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def wl_hash(elements: Sequence[str], edges: Sequence[tuple], iterations: int = WL_ITERATIONS) -> str:
+    """
+    Weisfeiler–Lehman hash of a molecular graph: atoms start labelled by
+    element and are relabelled `iterations` times from their sorted
+    neighbour labels (prefixed by bond order). Isomorphic graphs hash
+    equal whatever their atom order or ids; distinct isomers, e.g.
+    ethanol and dimethyl ether, separate within the first round.
+    """
+    nbrs = [[] for _ in elements]
+    for a, b, order in edges:
+        nbrs[a].append((b, order))
+        nbrs[b].append((a, order))
+    labels = list(elements)
+    history = [sorted(labels)]
+    for _ in range(iterations):
+        labels = [_digest(labels[i] + "|" + ",".join(sorted(f"{o}{labels[j]}" for j, o in nbrs[i])))
+                  for i in range(len(labels))]
+        history.append(sorted(labels))
+    return _digest(json.dumps(history))
+
+
+def species_hash(structure: dict) -> str:
+    """
+    Canonical species id "<Hill formula>-<WL hash>" of a stored
+    MolecularStructure dict. Structures without atoms fall back to the
+    formula (or name) plus a hash of the lower-cased name.
+
+    Only connectivity is hashed: with explicit hydrogens it fixes the bond
+    orders, and sources disagree on writing them – LLM JSON leaves them
+    out, SMILES gives aromatic rings 1.5 – so benzene from either hashes
+    the same.
+    """
+    atoms = structure.get("atoms") or []
+    if not atoms:
+        counts = formula_counts(structure.get("formula") or structure.get("name", ""))
+        hill = hill_formula(counts) if counts else "?"
+        return f"{hill}-n{_digest(structure.get('name', '').strip().lower())[:15]}"
+    index = {a["id"]: k for k, a in enumerate(atoms)}
+    elements = [a["element"] for a in atoms]
+    edges = [(index[b["from_atom"]], index[b["to_atom"]], 1) for b in structure.get("bonds") or []
+             if b.get("from_atom") in index and b.get("to_atom") in index]
+    counts: Dict[str, int] = {}
+    for e in elements:
+        counts[e] = counts.get(e, 0) + 1
+    return f"{hill_formula(counts)}-{wl_hash(elements, edges)}"
+
+
+# ---------- network -----------------------------------------------------------
+class Species:
+    """
+    One distinct compound of the library.
+
+    id         canonical hash, see `species_hash`
+    name       first name it was stored under
+    formula    Hill formula
+    aliases    every name / formula it appears under, lower-cased
+    structure  the stored MolecularStructure dict, if any
+    """
+    def __init__(self, id: str, name: str, formula: str, structure: Optional[dict] = None):
+        self.id = id
+        self.name = name
+        self.formula = formula
+        self.aliases = set()
+        self.structure = structure
+
+
+class ReactionNetwork:
+    """
+    The reaction library as a bipartite species–reaction graph.
+
+    species            S `Species`, `species_index` maps id -> row
+    reaction_ids       R library keys (`reactions/<id>` in Firebase)
+    equations          R equation strings
+    A, Ea              (R,) Arrhenius parameters, library defaults where absent
+    reactant_stoich    (S, R) CSR reactant coefficients
+    product_stoich     (S, R) CSR product coefficients
+    Row s of each CSR matrix lists the reactions consuming / producing
+    species s, so `consuming` and `producing` are slices, not scans; the
+    CSC twins give each reaction's reactants and products the same way.
+    """
+    def __init__(self, species: List[Species], reaction_ids: List[str], equations: List[str],
+                 reactant_stoich, product_stoich, A=None, Ea=None):
+        self.species = species
+        self.species_index = {s.id: k for k, s in enumerate(species)}
+        self.reaction_ids = list(reaction_ids)
+        self.reaction_index = {r: j for j, r in enumerate(self.reaction_ids)}
+        self.equations = list(equations)
+        R = len(self.reaction_ids)
+        self.A = np.full(R, DEFAULT_A) if A is None else np.asarray(A, dtype=float)
+        self.Ea = np.full(R, DEFAULT_EA) if Ea is None else np.asarray(Ea, dtype=float)
+        self.reactant_stoich = sparse.csr_matrix(reactant_stoich)
+        self.product_stoich = sparse.csr_matrix(product_stoich)
+        self._reactants_of = self.reactant_stoich.tocsc()
+        self._products_of = self.product_stoich.tocsc()
+        self._aliases: Dict[str, List[int]] = {}
+        for k, s in enumerate(species):
+            for alias in s.aliases | {s.id.lower(), s.formula.lower()}:
+                rows = self._aliases.setdefault(alias, [])
+                if k not in rows:
+                    rows.append(k)
+
+    @property
+    def n_species(self) -> int:
+        return len(self.species)
+
+    @property
+    def n_reactions(self) -> int:
+        return len(self.reaction_ids)
+
+    # ---------- construction ------------------------------------------------
+    @classmethod
+    def from_library(cls, reactions: Dict[str, dict], compounds: Optional[Dict[str, dict]] = None):
+        """
+        Index a `reactions/<id>` mapping as stored by gpt_utils. Reactant and
+        product entries are structure dicts, or compound names resolved
+        through `compounds` (older entries). Coefficients come from the
+        balanced equation, matched to structures by name or Hill formula;
+        unmatched species count once.
+        """
+        compounds = compounds or {}
+        species: List[Species] = []
+        index: Dict[str, int] = {}
+        hashes: Dict[str, str] = {}         # each entry embeds full copies of its structures
+        ids, equations, A, Ea = [], [], [], []
+        r_rows, p_rows, r_cols, p_cols, r_val, p_val = [], [], [], [], [], []
+
+        def resolve(entry) -> int:
+            structure = entry if isinstance(entry, dict) else compounds.get(entry) or {"name": str(entry)}
+            key = json.dumps([structure.get("name"), structure.get("formula"), structure.get("atoms"),
+                              structure.get("bonds")], sort_keys=True)
+            sid = hashes.get(key)
+            if sid is None:
+                sid = hashes[key] = species_hash(structure)
+            k = index.get(sid)
+            if k is None:
+                hill = sid.rsplit("-", 1)[0]
+                index[sid] = k = len(species)
+                species.append(Species(sid, structure.get("name", sid), hill,
+                                       structure if structure.get("atoms") else None))
+            s = species[k]
+            for alias in (structure.get("name"), structure.get("formula")):
+                if alias:
+                    s.aliases.add(alias.strip().lower())
+            return k
+
+        for rid, entry in reactions.items():
+            if not isinstance(entry, dict) or not (entry.get("reactants") or entry.get("products")):
+                continue
+            j = len(ids)
+            equation = entry.get("reaction", "")
+            try:
+                lhs, rhs = parse_equation(equation)
+            except ValueError:
+                lhs, rhs = {}, {}
+            for side, coefs, rows, cols, vals in (("reactants", lhs, r_rows, r_cols, r_val),
+                                                  ("products", rhs, p_rows, p_cols, p_val)):
+                lookup = _coefficient_lookup(coefs)
+                for item in entry.get(side) or []:
+                    k = resolve(item)
+                    rows.append(k)
+                    cols.append(j)
+                    vals.append(_coefficient(lookup, species[k], item))
+            params = entry.get("kinetics") or {}
+            ids.append(rid)
+            equations.append(equation)
+            A.append(float(params.get("A", DEFAULT_A)))
+            Ea.append(float(params.get("Ea", DEFAULT_EA)))
+
+        S, R = len(species), len(ids)
+        # duplicate (s, r) entries – a species listed twice – sum, as in the equation
+        reactant = sparse.csr_matrix((r_val, (r_rows, r_cols)), shape=(S, R))
+        product = sparse.csr_matrix((p_val, (p_rows, p_cols)), shape=(S, R))
+        return cls(species, ids, equations, reactant, product, A, Ea)
+
+    # ---------- lookup -----------------------------------------------------------
+    def find_species(self, query: Union[str, int]) -> List[int]:
+        """Rows matching a species id, name or formula (any formula notation); several for isomers."""
+        if isinstance(query, (int, np.integer)):
+            return [int(query)]
+        if query in self.species_index:
+            return [self.species_index[query]]
+        rows = self._aliases.get(query.strip().lower())
+        if rows is None:
+            counts = formula_counts(query)
+            rows = self._aliases.get(hill_formula(counts).lower(), []) if counts else []
+        return list(rows)
+
+    def row(self, query: Union[str, int]) -> int:
+        """First row matching `query`; KeyError if none does."""
+        rows = self.find_species(query)
+        if not rows:
+            raise KeyError(f"unknown species {query!r}")
+        return rows[0]
+
+    def consuming(self, species: Union[str, int]) -> np.ndarray:
+        """Indices of the reactions that consume `species`."""
+        m, s = self.reactant_stoich, self.row(species)
+        return m.indices[m.indptr[s]:m.indptr[s + 1]]
+
+    def producing(self, species: Union[str, int]) -> np.ndarray:
+        """Indices of the reactions that produce `species`."""
+        m, s = self.product_stoich, self.row(species)
+        return m.indices[m.indptr[s]:m.indptr[s + 1]]
+
+    def reactants_of(self, reaction: int) -> np.ndarray:
+        m = self._reactants_of
+        return m.indices[m.indptr[reaction]:m.indptr[reaction + 1]]
+
+    def products_of(self, reaction: int) -> np.ndarray:
+        m = self._products_of
+        return m.indices[m.indptr[reaction]:m.indptr[reaction + 1]]
+
+    # ---------- kinetics -------------------------------------------------------------
+    def to_kinetics_model(self, reactions: Optional[Sequence[int]] = None) -> KineticsModel:
+        """
+        A `KineticsModel` over `reactions` (all by default), species named by
+        canonical id. Like `reaction_from_json`, each step is taken first
+        order in each reactant.
+        """
+        cols = np.arange(self.n_reactions) if reactions is None else np.asarray(reactions, dtype=np.intp)
+        ids = [s.id for s in self.species]
+        rm, pm = self._reactants_of, self._products_of
+        rx = []
+        for j in cols:
+            r0, r1, p0, p1 = rm.indptr[j], rm.indptr[j + 1], pm.indptr[j], pm.indptr[j + 1]
+            reactants = {ids[s]: float(nu) for s, nu in zip(rm.indices[r0:r1], rm.data[r0:r1])}
+            products = {ids[s]: float(nu) for s, nu in zip(pm.indices[p0:p1], pm.data[p0:p1])}
+            rx.append(Reaction(reactants, products, A=self.A[j], Ea=self.Ea[j],
+                               orders={name: 1.0 for name in reactants}))
+        return KineticsModel(rx)
+
+    # ---------- persistence ---------------------------------------------------------
+    def save(self, path: str):
+        """Write the index to an .npz, so a session can skip rebuilding it from the library."""
+        meta = {
+            "species": [{"id": s.id, "name": s.name, "formula": s.formula, "aliases": sorted(s.aliases),
+                         "structure": s.structure} for s in self.species],
+            "reaction_ids": self.reaction_ids,
+            "equations": self.equations,
+        }
+        r, p = self.reactant_stoich.tocoo(), self.product_stoich.tocoo()
+        with open(path, "wb") as f:
+            np.savez_compressed(
+                f, meta=np.frombuffer(json.dumps(meta).encode("utf-8"), dtype=np.uint8), A=self.A, Ea=self.Ea,
+                r_row=r.row, r_col=r.col, r_val=r.data, p_row=p.row, p_col=p.col, p_val=p.data)
+
+    @classmethod
+    def load(cls, path: str):
+        with np.load(path) as z:
+            meta = json.loads(z["meta"].tobytes().decode("utf-8"))
+            S, R = len(meta["species"]), len(meta["reaction_ids"])
+            reactant = sparse.csr_matrix((z["r_val"], (z["r_row"], z["r_col"])), shape=(S, R))
+            product = sparse.csr_matrix((z["p_val"], (z["p_row"], z["p_col"])), shape=(S, R))
+            A, Ea = z["A"], z["Ea"]
+        species = []
+        for d in meta["species"]:
+            s = Species(d["id"], d["name"], d["formula"], d["structure"])
+            s.aliases = set(d["aliases"])
+            species.append(s)
+        return cls(species, meta["reaction_ids"], meta["equations"], reactant, product, A, Ea)
+
+
+def _coefficient_lookup(coefs: Dict[str, float]) -> Dict[str, float]:
+    lookup = {}
+    for term, nu in coefs.items():
+        lookup[term.strip().lower()] = nu
+        counts = formula_counts(term)
+        if counts:
+            lookup.setdefault(hill_formula(counts).lower(), nu)
+    return lookup
+
+
+def _coefficient(lookup: Dict[str, float], species: Species, item) -> float:
+    keys = [item] if isinstance(item, str) else [item.get("name"), item.get("formula")]
+    for key in keys + [species.formula]:
+        if key and key.strip().lower() in lookup:
+            return lookup[key.strip().lower()]
+    return 1.0
+
+
+def load_reaction_network(reactions_ref=None, compounds_ref=None) -> ReactionNetwork:
+    """Fetch the whole `reactions` (and `compounds`) tree from Firebase once and index it."""
+    if reactions_ref is None or compounds_ref is None:
+        # firebase_utils initialises the Firebase app on import; keep network importable without it
+        from .firebase_utils import get_firebase_compounds_ref, get_firebase_reactions_ref
+        reactions_ref = reactions_ref or get_firebase_reactions_ref()
+        compounds_ref = compounds_ref or get_firebase_compounds_ref()
+    return ReactionNetwork.from_library(reactions_ref.get() or {}, compounds_ref.get() or {})
@@ -0,0 +1,363 @@
+# particles.py – particle reaction-diffusion with cell-list collision detection
+# ------------------------------------------------------------------ #
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from .kinetics import ATM, R_GAS
+
+BOLTZMANN = 1.380649e-23        # J / K
+AMU = 1.66053906660e-27         # kg
+
+# half shell of the 27-cell neighbourhood: every unordered pair of adjacent
+# cells is visited exactly once (the (0, 0, 0) self cell is handled apart)
+_HALF_SHELL = [(dx, dy, dz)
+               for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1)
+               if (dx, dy, dz) > (0, 0, 0)]
+
+
+def cell_list_pairs(pos: np.ndarray, box: float, cutoff: float):
+    """
+    All (i, j) pairs of `pos` (N, 3) closer than `cutoff` in a periodic cubic
+    box, each pair once, plus the cell order of the particles (None when the
+    box is too small for a grid) for callers that keep their arrays
+    spatially sorted.
+
+    Cells are at least `cutoff` wide, on a grid padded by one ghost layer:
+    particles in boundary cells are copied into the opposite ghost layer
+    (shifted by the box), so periodic neighbours are reached by a plain
+    linear offset. Particles are sorted by cell; for the self cell and each
+    half-shell offset the neighbour cell's slice of the sorted order is
+    expanded with repeat/cumsum, so the work is proportional to N times the
+    (small) cell occupancy.
+    """
+    n = len(pos)
+    empty = np.empty(0, dtype=np.intp)
+    if n < 2:
+        return empty, empty, None
+    # cells no smaller than the cutoff, at most ~8 per particle;
+    # below 3 per side the ghost layers would overlap, so use one cell
+    nc = min(int(box // cutoff), int((8 * n) ** (1.0 / 3.0)))
+    if nc < 3:
+        d = pos[:, None] - pos[None]
+        d -= np.float32(box) * np.round(d * np.float32(1.0 / box))
+        i, j = np.nonzero(np.triu(np.einsum("ijk,ijk->ij", d, d) < cutoff ** 2, 1))
+        return i, j, None
+
+    # real particles plus ghost images, in padded cell coordinates 0..nc+1
+    cell = (pos * np.float32(nc / box)).astype(np.int32)
+    np.minimum(cell, nc - 1, out=cell)
+    cell += 1
+    src = np.arange(n)
+    shift = np.zeros((n, 3), dtype=np.float32)
+    for axis in range(3):
+        lo = np.nonzero(cell[:, axis] == 1)[0]
+        hi = np.nonzero(cell[:, axis] == nc)[0]
+        c_lo, c_hi = cell[lo], cell[hi]
+        c_lo[:, axis] = nc + 1
+        c_hi[:, axis] = 0
+        s_lo, s_hi = shift[lo], shift[hi]
+        s_lo[:, axis] += box
+        s_hi[:, axis] -= box
+        cell = np.concatenate([cell, c_lo, c_hi])
+        shift = np.concatenate([shift, s_lo, s_hi])
+        src = np.concatenate([src, src[lo], src[hi]])
+
+    p = nc + 2
+    flat = (cell[:, 0] * p + cell[:, 1]) * p + cell[:, 2]
+    order = np.argsort(flat, kind="stable")
+    flat_s = flat[order]
+    pos_s = np.take(pos, src[order], axis=0) + np.take(shift, order, axis=0)
+    start = np.zeros(p ** 3 + 1, dtype=np.int32)
+    np.cumsum(np.bincount(flat, minlength=p ** 3), out=start[1:])
+
+    # expand pairs only from real particles (ghosts are partners, never origins)
+    real = np.nonzero(order < n)[0]
+    cell_r = flat_s[real]
+    I, J = [], []
+    for off in [(0, 0, 0)] + _HALF_SHELL:
+        if off == (0, 0, 0):
+            # same cell: pair each particle only with those after it in sorted order
+            lo, hi = real + 1, start[cell_r + 1]
+        else:
+            nb = cell_r + ((off[0] * p + off[1]) * p + off[2])
+            lo, hi = start[nb], start[nb + 1]
+        m = hi - lo
+        has = np.nonzero(m > 0)[0]
+        if len(has) == 0:
+            continue
+        m, lo = m[has], lo[has]
+        total = int(m.sum())
+        first = np.cumsum(m) - m
+        I.append(np.repeat(real[has], m))
+        J.append(np.repeat(lo - first, m) + np.arange(total))
+    if not I:
+        return empty, empty, order[real]
+    i, j = np.concatenate(I), np.concatenate(J)
+    d = np.take(pos_s, i, axis=0) - np.take(pos_s, j, axis=0)
+    close = np.einsum("ij,ij->i", d, d) < cutoff ** 2
+    return order[i[close]], src[order[j[close]]], order[real]
+
+
+class CollisionReaction:
+    """
+    A + B -> products (one or two species) on contact. Each collision reacts
+    with probability steric * exp(-Ea / RT).
+    """
+    def __init__(self, a: str, b: str, products: Sequence[str], Ea: float = 0.0, steric: float = 1.0):
+        if not 1 <= len(products) <= 2:
+            raise ValueError("collision reactions need one or two products")
+        self.a, self.b = a, b
+        self.products = list(products)
+        self.Ea = Ea
+        self.steric = steric
+
+    def probability(self, temperature_k: float) -> float:
+        return min(1.0, self.steric * float(np.exp(-self.Ea / (R_GAS * temperature_k))))
+
+
+class ParticleSystem:
+    """
+    Molecule centres in a periodic cubic box, stored structure-of-arrays:
+
+    pos      (N, 3) float32   positions in nm, inside [0, box)
+    vel      (N, 3) float32   velocities in nm/ps (ballistic mode only)
+    species  (N,)   int32     index into `names`
+    ids      (N,)   int64     persistent particle ids (stable across reactions)
+
+    `step()` moves every particle (Brownian or ballistic), bins them into a
+    cell grid no finer than the contact distance, and tests only pairs in the
+    same or adjacent cells, so a step costs O(N) at fixed density.
+
+    A `thermostat` (thermostats.py) sets the bath temperature every step:
+    Brownian motion takes it through the diffusion coefficients, ballistic
+    velocities are coupled to it directly. A `barostat` rescales the box
+    against the ideal-gas pressure.
+    """
+    def __init__(
+        self,
+        names: List[str],
+        box: float,
+        *,
+        radius: float = 0.15,                 # contact radius per molecule, nm
+        diffusion: Optional[Sequence[float]] = None,   # nm^2/ps at 298.15 K
+        mass: Optional[Sequence[float]] = None,        # amu
+        temperature_k: float = 298.15,
+        mode: str = "brownian",
+        thermostat=None,
+        barostat=None,
+        seed: Optional[int] = None,
+    ):
+        if mode not in ("brownian", "ballistic"):
+            raise ValueError(f"unknown mode {mode!r}")
+        self.names = list(names)
+        self.index = {n: i for i, n in enumerate(self.names)}
+        self.box = float(box)
+        self.contact = 2.0 * radius
+        self.mode = mode
+        self.temperature_k = temperature_k
+        self.thermostat, self.barostat = thermostat, barostat
+        self.rng = np.random.default_rng(seed)
+        S = len(self.names)
+        self.diffusion = np.asarray(diffusion if diffusion is not None else [1.0e-3] * S, dtype=np.float32)
+        self.mass = np.asarray(mass if mass is not None else [30.0] * S, dtype=np.float32)
+
+        self.pos = np.empty((0, 3), dtype=np.float32)
+        self.vel = np.empty((0, 3), dtype=np.float32)
+        self.species = np.empty(0, dtype=np.int32)
+        self.ids = np.empty(0, dtype=np.int64)
+        self._next_id = 0
+
+        # (S, S) lookup: reaction index for a colliding pair, -1 for none
+        self.reactions: List[CollisionReaction] = []
+        self._rule = np.full((S, S), -1, dtype=np.int32)
+
+        self._cell_order = None
+        self.time = 0.0
+        self.n_steps = 0
+        self.n_reacted = 0
+
+    # ---------- setup -------------------------------------------------------
+    def add(self, name: str, count: int):
+        """Scatter `count` new molecules of `name` uniformly in the box."""
+        s = self.index[name]
+        pos = self.rng.uniform(0.0, self.box, (count, 3)).astype(np.float32)
+        self.pos = np.concatenate([self.pos, pos])
+        self.vel = np.concatenate([self.vel, self._thermal_velocities(np.full(count, s))])
+        self.species = np.concatenate([self.species, np.full(count, s, dtype=np.int32)])
+        self.ids = np.concatenate([self.ids, np.arange(self._next_id, self._next_id + count)])
+        self._next_id += count
+
+    def add_reaction(self, reaction: CollisionReaction):
+        a, b = self.index[reaction.a], self.index[reaction.b]
+        self.reactions.append(reaction)
+        self._rule[a, b] = self._rule[b, a] = len(self.reactions) - 1
+
+    @property
+    def n_particles(self) -> int:
+        return len(self.pos)
+
+    def counts(self) -> np.ndarray:
+        return np.bincount(self.species, minlength=len(self.names))
+
+    def _thermal_velocities(self, species: np.ndarray) -> np.ndarray:
+        # Maxwell–Boltzmann: each component ~ N(0, kT/m); m/s == nm/ns, so /1000 for nm/ps
+        sigma = np.sqrt(BOLTZMANN * self.temperature_k / (self.mass[species] * AMU)) / 1000.0
+        return (self.rng.standard_normal((len(species), 3)) * sigma[:, None]).astype(np.float32)
+
+    # ---------- coupling interface (thermostats.py) ------------------------------
+    @property
+    def velocities(self) -> np.ndarray:
+        return self.vel
+
+    def thermal_sigma(self, temperature_k: float) -> np.ndarray:
+        """Velocity std per particle, nm/ps, shaped (N, 1) to broadcast over `vel`."""
+        m = self.mass[self.species] * AMU
+        return (np.sqrt(BOLTZMANN * temperature_k / m) / 1000.0).astype(np.float32)[:, None]
+
+    def temperature(self) -> float:
+        """Kinetic temperature in ballistic mode; the bath temperature for Brownian motion."""
+        if self.mode == "brownian" or self.n_particles == 0:
+            return self.temperature_k
+        m = self.mass[self.species] * AMU
+        return float(np.sum(m * np.einsum("ij,ij->i", self.vel, self.vel)) * 1.0e6 / (3.0 * self.n_particles * BOLTZMANN))
+
+    def pressure_atm(self) -> float:
+        """Ideal-gas pressure N k T / V."""
+        return self.n_particles * BOLTZMANN * self.temperature() / (self.box * 1.0e-9) ** 3 / ATM
+
+    def scale_box(self, mu: float):
+        self.box *= mu
+        self.pos *= np.float32(mu)
+        np.mod(self.pos, self.box, out=self.pos)
+        self.pos[self.pos >= self.box] = 0.0
+
+    def _couple(self, dt: float):
+        if self.thermostat is not None:
+            self.temperature_k = self.thermostat.target_k
+            if self.mode == "ballistic":
+                self.thermostat.apply(self, dt)
+        if self.barostat is not None:
+            self.barostat.apply(self, dt)
+
+    def set_temperature(self, temperature_k: float):
+        """Rescale thermal velocities to a new temperature (ballistic mode)."""
+        if self.mode == "ballistic" and self.temperature_k > 0:
+            self.vel *= np.float32(np.sqrt(temperature_k / self.temperature_k))
+        self.temperature_k = temperature_k
+
+    # ---------- neighbour search ---------------------------------------------
+    def candidate_pairs(self):
+        """All (i, j) pairs closer than the contact distance, each pair once."""
+        i, j, self._cell_order = cell_list_pairs(self.pos, self.box, self.contact)
+        return i, j
+
+    # ---------- dynamics ---------------------------------------------------------
+    def _move(self, dt: float):
+        if self.mode == "brownian":
+            # Stokes–Einstein: D scales with T at fixed viscosity
+            d = self.diffusion[self.species] * np.float32(self.temperature_k / 298.15)
+            step = np.sqrt(2.0 * d * dt).astype(np.float32)
+            self.pos += self.rng.standard_normal(self.pos.shape, dtype=np.float32) * step[:, None]
+        else:
+            self.pos += self.vel * np.float32(dt)
+        np.mod(self.pos, self.box, out=self.pos)
+        # float32 mod can land exactly on `box`
+        self.pos[self.pos >= self.box] = 0.0
+
+    def _react(self):
+        if not self.reactions:
+            return 0
+        return self.collide(*self.candidate_pairs())
+
+    def collide(self, i: np.ndarray, j: np.ndarray) -> int:
+        """
+        React the contact pairs (i, j): pairs without a rule are ignored, each
+        particle reacts at most once, merged partners are removed. Returns the
+        number of reactions that fired.
+        """
+        rx = self._rule[self.species[i], self.species[j]]
+        hit = rx >= 0
+        i, j, rx = i[hit], j[hit], rx[hit]
+        if len(i) == 0:
+            return 0
+        p = np.array([r.probability(self.temperature_k) for r in self.reactions])
+        ok = self.rng.random(len(i)) < p[rx]
+        i, j, rx = i[ok], j[ok], rx[ok]
+
+        # a particle reacts at most once per step: pairs are taken greedily in
+        # random order, each only if both ends are still free. In rounds: a pair
+        # first in line at both of its ends fires, pairs touching it drop out
+        perm = self.rng.permutation(len(i))
+        i, j, rx = i[perm], j[perm], rx[perm]
+        owner = np.empty(self.n_particles, dtype=np.intp)
+        claimed = np.zeros(self.n_particles, dtype=bool)
+        fired = np.zeros(len(i), dtype=bool)
+        left = np.arange(len(i))
+        while len(left):
+            ends = np.stack([i[left], j[left]], axis=1).ravel()
+            _, first = np.unique(ends, return_index=True)
+            owner[ends[first]] = left[first // 2]
+            win = (owner[i[left]] == left) & (owner[j[left]] == left)
+            fired[left[win]] = True
+            claimed[i[left[win]]] = claimed[j[left[win]]] = True
+            left = left[~win]
+            left = left[~(claimed[i[left]] | claimed[j[left]])]
+        i, j, rx = i[fired], j[fired], rx[fired]
+
+        a_is_i = self.species[i] == np.array([self.index[r.a] for r in self.reactions])[rx]
+        first_p = np.array([self.index[r.products[0]] for r in self.reactions], dtype=np.int32)
+        second_p = np.array([self.index[r.products[1]] if len(r.products) > 1 else -1
+                             for r in self.reactions], dtype=np.int32)
+        # the A partner takes the first product, the B partner the second (or vanishes)
+        pa = np.where(a_is_i, i, j)
+        pb = np.where(a_is_i, j, i)
+        d = self.pos[pb] - self.pos[pa]
+        d -= self.box * np.round(d / self.box)
+        merged = second_p[rx] < 0
+        self.pos[pa[merged]] += 0.5 * d[merged]          # single product at the contact midpoint
+        np.mod(self.pos, self.box, out=self.pos)
+        self.species[pa] = first_p[rx]
+        self.species[pb[~merged]] = second_p[rx][~merged]
+        if self.mode == "ballistic":
+            changed = np.concatenate([pa, pb[~merged]])
+            self.vel[changed] = self._thermal_velocities(self.species[changed])
+
+        if np.any(merged):
+            alive = np.ones(self.n_particles, dtype=bool)
+            alive[pb[merged]] = False
+            self.pos, self.vel = self.pos[alive], self.vel[alive]
+            self.species, self.ids = self.species[alive], self.ids[alive]
+            if self._cell_order is not None:
+                keep = self._cell_order[alive[self._cell_order]]
+                self._cell_order = (np.cumsum(alive) - 1)[keep]
+        self.n_reacted += len(i)
+        return len(i)
+
+    def _spatial_sort(self):
+        """
+        Reorder particles by the cell order of the last neighbour search.
+        Particles barely change cells between steps, so the next stable sort
+        sees almost sorted keys and runs several times faster.
+        """
+        order, self._cell_order = self._cell_order, None
+        if order is None or len(order) != self.n_particles:
+            return
+        self.pos, self.vel = self.pos[order], self.vel[order]
+        self.species, self.ids = self.species[order], self.ids[order]
+
+    def step(self, dt: float) -> int:
+        """Advance by `dt` picoseconds; returns the number of reactions that fired."""
+        self._spatial_sort()
+        self._move(dt)
+        self._couple(dt)
+        self.time += dt
+        self.n_steps += 1
+        return self._react()
+
+    def snapshot(self, scale: float = 1.0):
+        """
+        (positions, proto_indices, ids) copies ready for `write_particle_instancer`:
+        float32 (N, 3) positions in scene units, int32 species and int64 ids.
+        """
+        return (self.pos * np.float32(scale)), self.species.copy(), self.ids.copy()
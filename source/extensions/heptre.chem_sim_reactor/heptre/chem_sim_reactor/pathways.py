@@ -0,0 +1,135 @@
+# pathways.py – shortest reaction pathways across the reaction network
+# ------------------------------------------------------------------ #
+import heapq
+import itertools
+from typing import Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+
+from .network import ReactionNetwork
+
+COSTS = ("steps", "ea")
+
+
+class Pathway:
+    """
+    One route from a start species to a target.
+
+    species     species rows visited, start first, target last
+    reactions   reaction columns taken, len(species) - 1 of them
+    cost        total cost: steps, or summed Ea in kJ/mol
+    """
+    def __init__(self, species: Sequence[int], reactions: Sequence[int], cost: float):
+        self.species = list(species)
+        self.reactions = list(reactions)
+        self.cost = cost
+
+    def __len__(self):
+        return len(self.reactions)
+
+    def to_dict(self, network: ReactionNetwork) -> dict:
+        return {
+            "cost": self.cost,
+            "species": [network.species[s].name for s in self.species],
+            "species_ids": [network.species[s].id for s in self.species],
+            "reaction_ids": [network.reaction_ids[j] for j in self.reactions],
+            "equations": [network.equations[j] for j in self.reactions],
+        }
+
+
+def reaction_costs(network: ReactionNetwork, cost: str = "steps") -> np.ndarray:
+    """(R,) cost of taking each reaction: 1 per step, or its activation energy in kJ/mol."""
+    if cost == "steps":
+        return np.ones(network.n_reactions)
+    if cost == "ea":
+        return np.maximum(network.Ea, 0.0) / 1000.0
+    raise ValueError(f"unknown cost {cost!r}, expected one of {COSTS}")
+
+
+def species_graph(network: ReactionNetwork):
+    """
+    (S, S) CSR, entry [a, b] > 0 when some reaction consumes a and produces b –
+    the hypergraph flattened to the species it connects. Cached on the network.
+    """
+    graph = getattr(network, "_species_graph", None)
+    if graph is None:
+        consumes = (network.reactant_stoich != 0).astype(np.int32)
+        produces = (network.product_stoich != 0).astype(np.int32)
+        graph = network._species_graph = (consumes @ produces.T).tocsr()
+    return graph
+
+
+def steps_to(network: ReactionNetwork, target: int, max_steps: Optional[int] = None) -> np.ndarray:
+    """
+    (S,) fewest reactions from each species to `target`, inf where unreachable:
+    a breadth-first search backwards from the target, one sparse
+    mat-vec per level.
+    """
+    graph = species_graph(network)
+    dist = np.full(network.n_species, np.inf)
+    dist[target] = 0.0
+    frontier = np.zeros(network.n_species, dtype=np.int32)
+    frontier[target] = 1
+    level = 0
+    while frontier.any() and (max_steps is None or level < max_steps):
+        level += 1
+        reached = (graph @ frontier > 0) & np.isinf(dist)
+        dist[reached] = level
+        frontier = reached.astype(np.int32)
+    return dist
+
+
+def find_pathways(
+    network: ReactionNetwork,
+    start: Union[str, int],
+    target: Union[str, int],
+    *,
+    cost: str = "steps",
+    limit: int = 5,
+    max_steps: int = 8,
+    avoid: Iterable[Union[str, int]] = (),
+) -> List[Pathway]:
+    """
+    Up to `limit` cheapest loop-free pathways from `start` to `target`,
+    cheapest first. A step follows a reaction from one of its reactants to
+    one of its products; co-reactants are assumed available. `avoid` keeps
+    species (e.g. H2O, O2 hubs) out of the intermediates.
+
+    A* over the species–reaction hypergraph: the heuristic is the backward
+    BFS step count to the target times the cheapest reaction cost, which
+    never overestimates, and also prunes every species that cannot reach
+    the target at all. Each species may be expanded `limit` times, so the
+    first `limit` arrivals at the target are the `limit` best paths.
+    """
+    s0, goal = network.row(start), network.row(target)
+    costs = reaction_costs(network, cost)
+    dist = steps_to(network, goal, max_steps)
+    if np.isinf(dist[s0]):
+        return []
+    h = dist * (costs.min() if len(costs) else 0.0)
+    h[np.isinf(dist)] = np.inf
+    blocked = set()
+    for a in avoid:
+        blocked.update(network.find_species(a))
+    blocked -= {s0, goal}
+
+    expanded = np.zeros(network.n_species, dtype=np.int32)
+    tie = itertools.count()
+    heap = [(h[s0], 0.0, next(tie), s0, (s0,), ())]
+    found: List[Pathway] = []
+    while heap and len(found) < limit:
+        _, g, _, s, path, taken = heapq.heappop(heap)
+        if s == goal:
+            found.append(Pathway(path, taken, g))
+            continue
+        if expanded[s] >= limit or len(taken) >= max_steps:
+            continue
+        expanded[s] += 1
+        for j in network.consuming(s):
+            gj = g + costs[j]
+            for p in network.products_of(j):
+                # dist is inf for species that cannot reach the target
+                if len(taken) + 1 + dist[p] > max_steps or p in blocked or p in path:
+                    continue
+                heapq.heappush(heap, (gj + h[p], gj, next(tie), p, path + (p,), taken + (j,)))
+    return found
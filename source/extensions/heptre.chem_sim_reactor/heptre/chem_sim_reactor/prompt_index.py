@@ -0,0 +1,166 @@
+# prompt_index.py – prompt normalization and fuzzy matching of stored reactions
+# ------------------------------------------------------------------ #
+import hashlib
+import re
+import threading
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# words that don't change which reaction a prompt asks for
+STOPWORDS = frozenset({"a", "an", "the", "of", "with", "and", "in", "by", "between",
+                       "reaction", "reactions", "react", "reacting", "reacts"})
+FUZZY_THRESHOLD = 0.8
+# what separates reactants from products: arrows, "=", and "to" / "into" / "yields" / "gives"
+_ARROW = re.compile(r"<?-+>|<=+>|=+>|[=→⟶⇌⇄⇒]|\b(?:to|into|yields|gives)\b")
+SIDE_SEPARATOR = ">"
+
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Canonical form of a reaction prompt: NFKC (₂ -> 2), lower case,
+    punctuation dropped, coefficients joined to their species, stopwords
+    removed, tokens sorted – so "Ethanol combustion", "ethanol  combustion"
+    and "Combustion of ethanol." all normalize to "combustion ethanol".
+
+    Arrows and "to" split reactants from products. Tokens are sorted only
+    within a side and the sides keep their order, joined by " > ", so a
+    reaction and its reverse stay apart: "ethanol to acetic acid" is
+    "ethanol > acetic acid", "acetic acid to ethanol" is "acetic acid > ethanol".
+    """
+    text = unicodedata.normalize("NFKC", prompt).lower()
+    text = re.sub(r"\b(\d+)\s+(?=[a-z])", r"\1", text)       # "3 O2" -> "3o2", as equations write it
+    sides = []
+    for part in _ARROW.split(text):
+        tokens = re.findall(r"[a-z0-9]+", part)
+        kept = [t for t in tokens if t not in STOPWORDS]
+        if kept or tokens:
+            sides.append(" ".join(sorted(kept or tokens)))
+    return f" {SIDE_SEPARATOR} ".join(sides)
+
+
+def prompt_reaction_id(prompt: str) -> str:
+    """Reaction id of the normalized prompt; variants of one prompt share it."""
+    return hashlib.sha256(normalize_prompt(prompt).encode()).hexdigest()[:16]
+
+
+def trigrams(text: str) -> List[str]:
+    """
+    Distinct character trigrams of a normalized `text` with word boundaries
+    padded, so short words still count. Each trigram is tagged with the side
+    of the equation it is on, so a reversed reaction shares none with the
+    forward one.
+    """
+    grams = set()
+    for k, side in enumerate(text.split(f" {SIDE_SEPARATOR} ")):
+        for word in side.split():
+            padded = f"  {word} "
+            grams.update(f"{k}{padded[i:i + 3]}" for i in range(len(padded) - 2))
+    return sorted(grams)
+
+
+def _side_words(text: str) -> Tuple[frozenset, ...]:
+    """Tokens per side of a normalized text."""
+    return tuple(frozenset(side.split()) for side in text.split(f" {SIDE_SEPARATOR} "))
+
+
+def _side_numbers(text: str) -> Tuple[frozenset, ...]:
+    """Tokens with digits – formulas, coefficients – per side of a normalized text."""
+    return tuple(frozenset(t for t in side.split() if any(ch.isdigit() for ch in t))
+                 for side in text.split(f" {SIDE_SEPARATOR} "))
+
+
+class PromptIndex:
+    """
+    Character-trigram index over normalized prompts and reaction equations.
+
+    Each entry is a normalized text pointing at a reaction id; a reaction
+    may have several (its prompt, its equation, prompts it was matched by).
+    `search` scores entries by Jaccard similarity of trigram sets, counting
+    shared trigrams with one `np.bincount` over the query's posting lists.
+
+    Tokens with digits – formulas, coefficients – must match exactly, so
+    "C2H6 combustion" never resolves to "C3H8 combustion" however close the
+    spelling. Names are not safe to fuzz either – "ethyl acetate" and
+    "methyl acetate" are one letter apart – so `best`, whose answer is
+    reused as the stored reaction, also wants the same words on each side;
+    `search` ranks near misses for display.
+
+    Thread-safe: lookups run on worker threads while new reactions are added.
+    """
+    def __init__(self, threshold: float = FUZZY_THRESHOLD):
+        self.threshold = threshold
+        self.texts: List[str] = []
+        self.reaction_ids: List[str] = []
+        self._sizes: List[int] = []
+        self._postings: Dict[str, List[int]] = {}
+        self._seen: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.texts)
+
+    def add(self, reaction_id: str, *texts: str):
+        """Index `texts` (prompts or equations, raw) under `reaction_id`."""
+        for raw in texts:
+            text = normalize_prompt(raw or "")
+            with self._lock:
+                self._add(reaction_id, text)
+
+    def _add(self, reaction_id: str, text: str):
+        if not text or text in self._seen:
+            return
+        entry = len(self.texts)
+        self._seen[text] = entry
+        self.texts.append(text)
+        self.reaction_ids.append(reaction_id)
+        grams = trigrams(text)
+        self._sizes.append(len(grams))
+        for g in grams:
+            self._postings.setdefault(g, []).append(entry)
+
+    @classmethod
+    def from_library(cls, reactions: Optional[Dict[str, dict]], **kwargs) -> "PromptIndex":
+        """Index a `reactions/<id>` mapping by each reaction's prompt and equation."""
+        index = cls(**kwargs)
+        for reaction_id, js in (reactions or {}).items():
+            if isinstance(js, dict):
+                index.add(reaction_id, js.get("prompt", ""), js.get("reaction", ""))
+        return index
+
+    def search(self, query: str, limit: int = 5, threshold: Optional[float] = None) -> List[Tuple[str, float, str]]:
+        """(reaction_id, similarity, matched text) of the best entries at or above `threshold`, best first."""
+        threshold = self.threshold if threshold is None else threshold
+        text = normalize_prompt(query)
+        grams = trigrams(text)
+        with self._lock:
+            exact = self._seen.get(text)
+            if exact is not None:
+                return [(self.reaction_ids[exact], 1.0, text)]
+            lists = [self._postings[g] for g in grams if g in self._postings]
+            if not lists:
+                return []
+            shared = np.bincount(np.concatenate(lists), minlength=len(self._sizes))
+            sizes = np.asarray(self._sizes)     # entries are only appended: indices below stay valid
+        score = shared / (len(grams) + sizes - shared)
+        candidates = np.flatnonzero(score >= threshold)
+        candidates = candidates[np.argsort(-score[candidates], kind="stable")]
+        numbers = _side_numbers(text)
+        hits, ids = [], set()
+        for entry in candidates:
+            if _side_numbers(self.texts[entry]) != numbers or self.reaction_ids[entry] in ids:
+                continue
+            ids.add(self.reaction_ids[entry])
+            hits.append((self.reaction_ids[entry], float(score[entry]), self.texts[entry]))
+            if len(hits) >= limit:
+                break
+        return hits
+
+    def best(self, query: str) -> Optional[str]:
+        """Reaction id of the closest entry above the threshold with the same words on each side, or None."""
+        words = _side_words(normalize_prompt(query))
+        for reaction_id, _, text in self.search(query):
+            if _side_words(text) == words:
+                return reaction_id
+        return None
@@ -0,0 +1,179 @@
+# raw_log.py – append-only compressed segment log of raw LLM replies
+# ------------------------------------------------------------------ #
+import gzip
+import os
+import sqlite3
+import threading
+import time
+from typing import List, Optional
+
+try:
+    import zstandard
+except ImportError:
+    # optional: gzip is always there and reads back the same way
+    zstandard = None
+
+MAX_SEGMENT_BYTES = 8 * 1024 * 1024
+MAX_SEGMENTS = 64
+
+
+class SegmentLog:
+    """
+    Raw replies archived as compressed frames appended to a few large
+    segment files, with an SQLite index to find them again:
+
+        <directory>/segment-000001.zst        (.gz without zstandard)
+        <directory>/index.sqlite              records(id, reaction_id, label, prompt,
+                                                      ts, segment, offset, length, size)
+
+    Each record is one self-contained zstd frame / gzip member, so reading it
+    back is a seek to `offset` and `length` bytes to decompress; nothing else
+    in the segment is touched. The active segment rotates once it passes
+    `max_segment_bytes`, and beyond `max_segments` the oldest segment and its
+    index rows are dropped. Files and index are created on first append.
+    Thread-safe: generations store their outputs from worker threads.
+    """
+    def __init__(self, directory: str, max_segment_bytes: int = MAX_SEGMENT_BYTES,
+                 max_segments: Optional[int] = MAX_SEGMENTS, codec: Optional[str] = None):
+        if codec is None:
+            codec = "zst" if zstandard is not None else "gz"
+        if codec == "zst" and zstandard is None:
+            raise ValueError("the zst codec needs the zstandard package")
+        if codec not in ("zst", "gz"):
+            raise ValueError(f"unknown codec {codec!r}")
+        self.directory = directory
+        self.max_segment_bytes = max_segment_bytes
+        self.max_segments = max_segments
+        self.codec = codec
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._segment = 0                      # number of the active segment
+
+    # ---------- storage ---------------------------------------------------------------
+    def _open(self) -> sqlite3.Connection:
+        if self._db is None:
+            os.makedirs(self.directory, exist_ok=True)
+            db = sqlite3.connect(os.path.join(self.directory, "index.sqlite"), check_same_thread=False)
+            with db:
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute(
+                    "CREATE TABLE IF NOT EXISTS records ("
+                    "id INTEGER PRIMARY KEY, reaction_id TEXT, label TEXT, prompt TEXT, ts REAL, "
+                    "segment TEXT, offset INTEGER, length INTEGER, size INTEGER)"
+                )
+                db.execute("CREATE INDEX IF NOT EXISTS records_reaction ON records(reaction_id, ts)")
+                db.execute("CREATE INDEX IF NOT EXISTS records_ts ON records(ts)")
+            self._db = db
+            self._segment = max((self._segment_number(name) for name in self._segments()), default=1)
+        return self._db
+
+    def _segments(self) -> List[str]:
+        return sorted(name for name in os.listdir(self.directory) if self._segment_number(name))
+
+    @staticmethod
+    def _segment_number(name: str) -> int:
+        stem, _, ext = name.partition(".")
+        if not stem.startswith("segment-") or ext not in ("zst", "gz") or not stem[8:].isdigit():
+            return 0
+        return int(stem[8:])
+
+    def _compress(self, data: bytes) -> bytes:
+        if self.codec == "zst":
+            return zstandard.ZstdCompressor(level=6).compress(data)
+        return gzip.compress(data, compresslevel=6)
+
+    @staticmethod
+    def _decompress(segment: str, data: bytes) -> bytes:
+        if segment.endswith(".zst"):
+            if zstandard is None:
+                raise RuntimeError(f"{segment} is zstd-compressed; install zstandard to read it")
+            return zstandard.ZstdDecompressor().decompress(data)
+        return gzip.decompress(data)
+
+    # ---------- writing ---------------------------------------------------------------
+    def append(self, reaction_id: str, label: str, content: str, prompt: str = "",
+               ts: Optional[float] = None) -> int:
+        """Archive one raw reply; returns its record id."""
+        raw = content.encode("utf-8")
+        frame = self._compress(raw)
+        ts = time.time() if ts is None else ts
+        with self._lock:
+            db = self._open()
+            name = f"segment-{self._segment:06d}.{self.codec}"
+            path = os.path.join(self.directory, name)
+            offset = os.path.getsize(path) if os.path.exists(path) else 0
+            if offset and offset + len(frame) > self.max_segment_bytes:
+                self._segment += 1
+                name = f"segment-{self._segment:06d}.{self.codec}"
+                path, offset = os.path.join(self.directory, name), 0
+                self._prune(db)
+            with open(path, "ab") as f:
+                f.write(frame)
+            with db:
+                cur = db.execute(
+                    "INSERT INTO records (reaction_id, label, prompt, ts, segment, offset, length, size) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (reaction_id, label, prompt, ts, name, offset, len(frame), len(raw)),
+                )
+            return cur.lastrowid
+
+    def _prune(self, db: sqlite3.Connection):
+        """Drop the oldest segments past `max_segments`, counting the one about to start."""
+        if self.max_segments is None:
+            return
+        segments = self._segments()
+        for name in segments[:max(0, len(segments) + 1 - self.max_segments)]:
+            with db:
+                db.execute("DELETE FROM records WHERE segment = ?", (name,))
+            os.remove(os.path.join(self.directory, name))
+
+    # ---------- reading ---------------------------------------------------------------
+    def find(self, reaction_id: Optional[str] = None, since: Optional[float] = None,
+             until: Optional[float] = None, limit: Optional[int] = None) -> List[dict]:
+        """Index rows, newest first, for one reaction and/or a [since, until) time window."""
+        where, args = [], []
+        if reaction_id is not None:
+            where.append("reaction_id = ?")
+            args.append(reaction_id)
+        if since is not None:
+            where.append("ts >= ?")
+            args.append(since)
+        if until is not None:
+            where.append("ts < ?")
+            args.append(until)
+        sql = "SELECT id, reaction_id, label, prompt, ts, segment, size FROM records"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY ts DESC, id DESC"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        with self._lock:
+            rows = self._open().execute(sql, args).fetchall()
+        keys = ("id", "reaction_id", "label", "prompt", "ts", "segment", "size")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def read(self, record_id: int) -> str:
+        """The raw reply of one record."""
+        with self._lock:
+            row = self._open().execute("SELECT segment, offset, length FROM records WHERE id = ?",
+                                       (record_id,)).fetchone()
+        if row is None:
+            raise KeyError(record_id)
+        segment, offset, length = row
+        with open(os.path.join(self.directory, segment), "rb") as f:
+            f.seek(offset)
+            data = f.read(length)
+        return self._decompress(segment, data).decode("utf-8")
+
+    def latest(self, reaction_id: str, label: Optional[str] = None) -> Optional[str]:
+        """The newest raw reply for a reaction, optionally of one `label` ("outline", "structures 0", ...)."""
+        for row in self.find(reaction_id):
+            if label is None or row["label"] == label:
+                return self.read(row["id"])
+        return None
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
@@ -1,8 +1,8 @@
 # reaction_anim_builder.py  – FINAL
 # ------------------------------------------------------------------ #
 from pathlib import Path
-from pxr import Usd, UsdGeom, Sdf, Gf
-import carb, itertools, math
+from pxr import Usd, UsdGeom, Sdf, Gf, Vt
+import carb, itertools, math, random
 LOG = carb.log_info
 
 from pxr import Sdf
@@ -27,14 +27,73 @@ def _prepare_fresh_layer(path_str: str):
     if old_layer is not None:
         old_layer.TransferContent(Sdf.Layer.CreateAnonymous())  # Detach contents
 
+# ---------- shared helpers ------------------------------------------------
+def _ring_layout(n, radius):
+    inc = 2*math.pi / max(n, 1)
+    for i in range(n):
+        a = i * inc
+        yield Gf.Vec3d(radius*math.cos(a), 0, radius*math.sin(a))
+
+def _ensure_translate(xf: UsdGeom.Xformable):
+    for op in xf.GetOrderedXformOps():
+        if op.GetOpType() == UsdGeom.XformOp.TypeTranslate:
+            return op
+    return xf.AddTranslateOp()
+
+def _add_ref(stage, file: Path, stage_path: str, pos: Gf.Vec3d, label: str,
+             t0=0, label_height=0.8):
+    xf = UsdGeom.Xform.Define(stage, stage_path)
+    xf.GetPrim().GetReferences().AddReference(file.as_posix())
+    _ensure_translate(UsdGeom.Xformable(xf)).Set(pos, t0)
+
+    if hasattr(UsdGeom, "Text"):
+        lbl = UsdGeom.Text.Define(stage, Sdf.Path(stage_path + "/Label"))
+        lbl.CreateTextAttr(label)
+        lbl.CreateDisplayColorAttr([(1, 1, 1)])
+        _ensure_translate(UsdGeom.Xformable(lbl)).Set(
+            (0, label_height, 0), t0)
+    return xf
+
+def _animate_progress(react_xf, prod_xf, prod_pos, progress, t0, tmix, tend,
+                      mix_at=0.5, done_at=0.99):
+    n = len(progress)
+    frames = [t0 + (tmix - t0) * i / max(n - 1, 1) for i in range(n)]
+    first = lambda thr: next((f for f, p in zip(frames, progress) if p >= thr), None)
+    t_mixed, t_done = first(mix_at), first(done_at)
+
+    for xf in react_xf:
+        tr = _ensure_translate(UsdGeom.Xformable(xf))
+        start = Gf.Vec3d(tr.Get(t0))
+        for f, p in zip(frames, progress):
+            tr.Set(start * (1.0 - float(p)), f)
+        xf.CreateVisibilityAttr().Set("inherited", t0)
+        if t_done is not None:
+            xf.GetVisibilityAttr().Set("invisible", t_done)
+
+    for xf, final_pos in zip(prod_xf, prod_pos):
+        tr = _ensure_translate(UsdGeom.Xformable(xf))
+        for f, p in zip(frames, progress):
+            tr.Set(final_pos + Gf.Vec3d(0, -2, 0) * (1.0 - float(p)), f)
+        tr.Set(tr.Get(frames[-1]), tend)
+        xf.CreateVisibilityAttr().Set("invisible", t0)
+        if t_mixed is not None:
+            xf.GetVisibilityAttr().Set("inherited", t_mixed)
+
 # ------------------------------------------------------------------ #
 def build_reaction_animation(folder: str,
                              *,
                              ring_radius  = 4.0,     # reactant ring
                              react_frames = 24,      # reactant->origin time
                              hold_frames  = 24,      # hold after mix
-                             label_height = 0.8):
-
+                             label_height = 0.8,
+                             progress     = None):   # extent of reaction per frame
+    """
+    `progress`, when given, is the extent of reaction in [0, 1] sampled
+    uniformly over the react_frames window (see `kinetics.reaction_progress`).
+    Reactants then slide in, and products rise, in step with the simulated
+    conversion instead of linearly; a reaction that never completes under the
+    chosen conditions leaves its reactants partly mixed and visible.
+    """
     folder = Path(folder)
     LOG(f"[anim]  Building reaction animation in ➜ {folder}")
 
@@ -56,45 +115,26 @@ def build_reaction_animation(folder: str,
     stage.SetStartTimeCode(t0)
     stage.SetEndTimeCode(tend)
 
-    # ---------- helpers ---------------------------------------------------
-    def ring_layout(n, radius):
-        inc = 2*math.pi / max(n, 1)
-        for i in range(n):
-            a = i * inc
-            yield Gf.Vec3d(radius*math.cos(a), 0, radius*math.sin(a))
-
-    def ensure_translate(xf: UsdGeom.Xformable):
-        for op in xf.GetOrderedXformOps():
-            if op.GetOpType() == UsdGeom.XformOp.TypeTranslate:
-                return op
-        return xf.AddTranslateOp()
-
-    def add_ref(file: Path, stage_path: str, pos: Gf.Vec3d, label: str):
-        xf = UsdGeom.Xform.Define(stage, stage_path)
-        xf.GetPrim().GetReferences().AddReference(file.as_posix())
-        ensure_translate(UsdGeom.Xformable(xf)).Set(pos, t0)
-
-        if hasattr(UsdGeom, "Text"):
-            lbl = UsdGeom.Text.Define(stage, Sdf.Path(stage_path + "/Label"))
-            lbl.CreateTextAttr(label)
-            lbl.CreateDisplayColorAttr([(1, 1, 1)])
-            ensure_translate(UsdGeom.Xformable(lbl)).Set(
-                (0, label_height, 0), t0)
-        return xf
-
     # ---------- place xforms ----------------------------------------------
-    outer_pos   = list(ring_layout(len(react_paths), ring_radius))
+    outer_pos   = list(_ring_layout(len(react_paths), ring_radius))
     inner_r     = max(1.2, ring_radius*0.4)
-    inner_pos   = list(ring_layout(len(prod_paths),  inner_r))
+    inner_pos   = list(_ring_layout(len(prod_paths),  inner_r))
 
-    react_xf = [add_ref(p, f"/World/Reactants/{sanitize_prim_name(p.stem)}", pos, p.stem)
+    react_xf = [_add_ref(stage, p, f"/World/Reactants/{sanitize_prim_name(p.stem)}", pos, p.stem, t0, label_height)
                 for p, pos in zip(react_paths, outer_pos)]
-    prod_xf  = [add_ref(p, f"/World/Products/{sanitize_prim_name(p.stem)}",  pos, p.stem)
+    prod_xf  = [_add_ref(stage, p, f"/World/Products/{sanitize_prim_name(p.stem)}",  pos, p.stem, t0, label_height)
                 for p, pos in zip(prod_paths,  inner_pos)]
 
+    if progress is not None:
+        _animate_progress(react_xf, prod_xf, inner_pos, progress, t0, tmix, tend)
+        stage.GetRootLayer().Save()
+        usd_path = str(folder / f"reaction_anim_{timestamp}.usd")
+        LOG(f"✅  wrote {usd_path} (kinetics-driven)")
+        return usd_path
+
     # ---------- animate reactants -----------------------------------------
     for xf in react_xf:
-        tr = ensure_translate(UsdGeom.Xformable(xf))
+        tr = _ensure_translate(UsdGeom.Xformable(xf))
         start = Gf.Vec3d(tr.Get(t0))
         tr.Set(start, t0)
         tr.Set(Gf.Vec3d(0, 0, 0), tmix)          # slide to origin
@@ -103,7 +143,7 @@ def build_reaction_animation(folder: str,
 
     # ---------- animate products ------------------------------------------
     for xf, final_pos in zip(prod_xf, inner_pos):
-        tr = ensure_translate(UsdGeom.Xformable(xf))
+        tr = _ensure_translate(UsdGeom.Xformable(xf))
         tr.Set(final_pos + Gf.Vec3d(0, -2, 0), t0)  # start below
         tr.Set(final_pos,                      tmix)
         tr.Set(final_pos,                      tend)
@@ -116,6 +156,196 @@ def build_reaction_animation(folder: str,
     return usd_path
 
 
+# ---------- multi-step mechanisms ----------------------------------------
+MECHANISM_ROLES = ("reactants", "intermediates", "transition_states", "products")
+
+def _species_file_map(folder: Path):
+    """
+    Map sanitized species name -> USD file, written by `write_usd_from_reaction`
+    as `<role>_<name>.usd`.  A species that shows up under several roles is
+    only mapped once (first role wins), so the mechanism references one file.
+    """
+    files = {}
+    for role in MECHANISM_ROLES:
+        for p in sorted(folder.glob(f"{role}_*.usd")):
+            files.setdefault(p.stem[len(role) + 1:], p)
+    return files
+
+def build_mechanism_animation(folder: str,
+                              steps,
+                              *,
+                              ring_radius  = 4.0,    # stage ring
+                              step_frames  = 24,     # stage k -> k+1 time
+                              hold_frames  = 24,     # hold after each step
+                              label_height = 0.8):
+    """
+    Lay an ordered mechanism out as consecutive timeline segments in ONE stage.
+
+    `steps` is a list of stages, e.g.
+        [{"label": "Reactants",  "kind": "reactants",        "species": ["Ethanol", "Oxygen"]},
+         {"label": "TS1",        "kind": "transition_state", "species": ["TS1"]},
+         ...]
+    Each species is defined once under /World/Species and referenced a single
+    time; stage membership is expressed purely through translate/visibility
+    time samples, which are only written where a value actually changes.
+    Segment k (stage k -> k+1) spans
+        [k*(step_frames+hold_frames), k*(step_frames+hold_frames)+step_frames]
+    so a two-stage mechanism times exactly like `build_reaction_animation`.
+    """
+    folder = Path(folder)
+    LOG(f"[anim]  Building mechanism animation ({len(steps)} stages) in ➜ {folder}")
+    if len(steps) < 2:
+        raise RuntimeError("A mechanism needs at least two stages")
+
+    files = _species_file_map(folder)
+    stages = []
+    for i, st in enumerate(steps):
+        names = [sanitize_prim_name(n) for n in st.get("species", [])]
+        missing = [n for n in names if n not in files]
+        if missing:
+            raise RuntimeError(f"Stage {i}: no USD for species {missing}")
+        stages.append(list(dict.fromkeys(names)))   # de-dup, keep order
+
+    # ---------- stage -----------------------------------------------------
+    timestamp = int(time.time())
+    usd_path  = str(folder / f"reaction_anim_{timestamp}.usd")
+    stage = Usd.Stage.CreateNew(usd_path)
+    UsdGeom.SetStageUpAxis(stage, UsdGeom.Tokens.y)
+    UsdGeom.Xform.Define(stage, "/World")
+
+    seg = step_frames + hold_frames
+    tend = (len(stages) - 1) * seg
+    stage.SetStartTimeCode(0)
+    stage.SetEndTimeCode(tend)
+
+    # stage k is fully shown at `shown[k]`; the segment into it starts at `shown[k] - step_frames`
+    shown = [0] + [k * seg + step_frames for k in range(len(stages) - 1)]
+    slots = [dict(zip(names, _ring_layout(len(names), ring_radius))) for names in stages]
+
+    # ---------- one prim per species --------------------------------------
+    first_stage = {}
+    for k, names in enumerate(stages):
+        for n in names:
+            first_stage.setdefault(n, k)
+
+    for name, k0 in first_stage.items():
+        xf = _add_ref(stage, files[name], f"/World/Species/{name}",
+                      slots[k0][name], name, 0, label_height)
+        tr = _ensure_translate(UsdGeom.Xformable(xf))
+        vis = xf.CreateVisibilityAttr()
+        vis.Set("inherited" if k0 == 0 else "invisible", 0)
+
+        present = False
+        pos = slots[k0][name]
+        for k in range(len(stages)):
+            here = name in stages[k]
+            if k == 0:
+                present = here
+                continue
+            t_start, t_end = shown[k] - step_frames, shown[k]
+            if present and here:
+                new_pos = slots[k][name]
+                if new_pos != pos:              # glide to the new slot
+                    tr.Set(pos, t_start)
+                    tr.Set(new_pos, t_end)
+                    pos = new_pos
+            elif present and not here:          # consumed: slide in, vanish
+                tr.Set(pos, t_start)
+                tr.Set(Gf.Vec3d(0, 0, 0), t_end)
+                vis.Set("invisible", t_end)
+                pos = Gf.Vec3d(0, 0, 0)
+            elif not present and here:          # formed: rise from below
+                new_pos = slots[k][name]
+                tr.Set(new_pos + Gf.Vec3d(0, -2, 0), t_start)
+                tr.Set(new_pos, t_end)
+                vis.Set("inherited", t_start)   # visible while it rises
+                pos = new_pos
+            present = here
+
+    # ---------- segment table for consumers (UI, overlays) ----------------
+    stage.GetRootLayer().customLayerData = {
+        "mechanism": {
+            "labels": Vt.StringArray([st.get("label", f"Stage {k}") for k, st in enumerate(steps)]),
+            "kinds":  Vt.StringArray([st.get("kind", "") for st in steps]),
+            "frames": Vt.IntArray(shown),
+        }
+    }
+
+    stage.GetRootLayer().Save()
+    LOG(f"✅  wrote {usd_path}")
+    return usd_path
+
+
+# ---------- individual molecules (stochastic) -----------------------------
+def build_population_animation(folder: str,
+                               species_files,
+                               lifetimes,
+                               t_end: float,
+                               *,
+                               frames          = 48,     # timeline length
+                               box             = 6.0,    # half-width of the scatter box
+                               max_per_species = 40,
+                               label_height    = 0.8,
+                               seed            = 0):
+    """
+    One prim per simulated molecule, shown only while it exists.
+
+    `species_files` maps species name -> USD file and `lifetimes` maps
+    species name -> [(appear, disappear), ...] in simulation seconds, as
+    returned by `stochastic.molecule_lifetimes`. Simulation time [0, t_end]
+    is mapped onto frames [0, frames]; each molecule gets a fixed random spot
+    in the box and visibility samples at its appear / disappear frames only.
+    Species without a file are skipped.
+    """
+    folder = Path(folder)
+    LOG(f"[anim]  Building population animation in ➜ {folder}")
+    rng = random.Random(seed)
+    to_frame = lambda t: int(round(float(t) / t_end * frames)) if t_end > 0 else 0
+
+    timestamp = int(time.time())
+    usd_path  = str(folder / f"reaction_anim_{timestamp}.usd")
+    stage = Usd.Stage.CreateNew(usd_path)
+    UsdGeom.SetStageUpAxis(stage, UsdGeom.Tokens.y)
+    UsdGeom.Xform.Define(stage, "/World")
+    stage.SetStartTimeCode(0)
+    stage.SetEndTimeCode(frames)
+
+    shown = {}
+    for name, spans in lifetimes.items():
+        file = species_files.get(name)
+        if file is None:
+            continue
+        prim_name = sanitize_prim_name(name)
+        n = 0
+        for appear, gone in spans:
+            f0, f1 = to_frame(appear), to_frame(gone)
+            if f1 <= f0 and gone < t_end:
+                continue                        # lived less than a frame
+            if n >= max_per_species:
+                break
+            pos = Gf.Vec3d(rng.uniform(-box, box), rng.uniform(0, box), rng.uniform(-box, box))
+            xf = _add_ref(stage, Path(file), f"/World/Molecules/{prim_name}/m{n}",
+                          pos, name, 0, label_height)
+            vis = xf.CreateVisibilityAttr()
+            vis.Set("inherited" if f0 == 0 else "invisible", 0)
+            if f0 > 0:
+                vis.Set("inherited", f0)
+            if gone < t_end:
+                vis.Set("invisible", f1)
+            n += 1
+        shown[prim_name] = n
+
+    stage.GetRootLayer().customLayerData = {
+        "population": {
+            "species": Vt.StringArray(list(shown)),
+            "shown":   Vt.IntArray(list(shown.values())),
+        }
+    }
+    stage.GetRootLayer().Save()
+    LOG(f"✅  wrote {usd_path} ({sum(shown.values())} molecules)")
+    return usd_path
+
+
 # test ---------------------------------------------------------------------
 if __name__ == "__main__":
     build_reaction_animation("./output_usd/Ethanol_Combust_reaction")
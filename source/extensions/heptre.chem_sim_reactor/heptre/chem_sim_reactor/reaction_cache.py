@@ -0,0 +1,206 @@
+# reaction_cache.py – tiered reaction cache: memory LRU -> SQLite -> Firebase
+# ------------------------------------------------------------------ #
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+from .prompt_index import normalize_prompt
+
+
+class LRUCache:
+    """
+    Bounded in-process map with per-entry time-to-live. Thread-safe: the Kit
+    UI, the API handlers and their worker threads share one instance.
+
+    Fields:
+        hits, misses   lookup counters
+    """
+    def __init__(self, capacity: int = 1024, ttl: Optional[float] = 3600.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.capacity = capacity
+        self.ttl = ttl
+        self.clock = clock
+        self._items: "OrderedDict[str, Tuple[float, object]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key: str):
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None and (self.ttl is None or self.clock() - item[0] < self.ttl):
+                self._items.move_to_end(key)
+                self.hits += 1
+                return item[1]
+            if item is not None:
+                del self._items[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value):
+        with self._lock:
+            self._items[key] = (self.clock(), value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.capacity:
+                self._items.popitem(last=False)
+
+    def invalidate(self, key: Optional[str] = None):
+        """Drop `key`, or everything."""
+        with self._lock:
+            if key is None:
+                self._items.clear()
+            else:
+                self._items.pop(key, None)
+
+
+class SQLiteStore:
+    """
+    Local on-disk copy of the reaction library, one row per reaction:
+
+        reactions(id PRIMARY KEY, prompt, normalized, data JSON, updated)
+
+    with indexes on `prompt` and `normalized` for lookups by prompt. WAL
+    journaling keeps readers from blocking the writer; one connection is
+    shared across threads behind a lock.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS reactions ("
+                "id TEXT PRIMARY KEY, prompt TEXT, normalized TEXT, data TEXT NOT NULL, updated REAL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS reactions_prompt ON reactions(prompt)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS reactions_normalized ON reactions(normalized)")
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM reactions").fetchone()[0]
+
+    def get(self, reaction_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._db.execute("SELECT data FROM reactions WHERE id = ?", (reaction_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_by_prompt(self, prompt: str) -> Tuple[Optional[str], Optional[dict]]:
+        """(id, reaction) stored with this exact prompt, else with the same normalized prompt."""
+        with self._lock:
+            row = self._db.execute("SELECT id, data FROM reactions WHERE prompt = ? LIMIT 1", (prompt,)).fetchone()
+            if row is None:
+                row = self._db.execute("SELECT id, data FROM reactions WHERE normalized = ? LIMIT 1",
+                                       (normalize_prompt(prompt),)).fetchone()
+        return (row[0], json.loads(row[1])) if row else (None, None)
+
+    def put(self, reaction_id: str, data: dict):
+        self.put_many({reaction_id: data})
+
+    def put_many(self, reactions: Dict[str, dict]):
+        rows = []
+        now = time.time()
+        for reaction_id, data in reactions.items():
+            if not isinstance(data, dict):
+                continue
+            prompt = data.get("prompt", "")
+            rows.append((reaction_id, prompt, normalize_prompt(prompt), json.dumps(data), now))
+        with self._lock, self._db:
+            self._db.executemany("INSERT OR REPLACE INTO reactions VALUES (?, ?, ?, ?, ?)", rows)
+
+    def delete(self, reaction_id: str):
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM reactions WHERE id = ?", (reaction_id,))
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class TieredReactionCache:
+    """
+    Reaction lookups through successively slower tiers:
+
+        memory   LRUCache          ~µs
+        local    SQLiteStore       ~10-100 µs
+        remote   Firebase RTDB ref (`child(id).get()` / `.set()`), ~100 ms
+
+    A hit fills every faster tier on the way back; `put` writes through all
+    of them, so the next lookup in this process, or in the next one on this
+    machine, never leaves it. Either faster tier may be None.
+
+    Fields:
+        hits   {"memory": n, "local": n, "remote": n}
+        misses lookups that reached the remote and found nothing
+    """
+    def __init__(self, remote=None, local: Optional[SQLiteStore] = None, memory: Optional[LRUCache] = None):
+        self.remote = remote
+        self.local = local
+        self.memory = memory
+        self.hits = {"memory": 0, "local": 0, "remote": 0}
+        self.misses = 0
+
+    def get(self, reaction_id: str) -> Optional[dict]:
+        if self.memory is not None:
+            data = self.memory.get(reaction_id)
+            if data is not None:
+                self.hits["memory"] += 1
+                return data
+        if self.local is not None:
+            data = self.local.get(reaction_id)
+            if data is not None:
+                self.hits["local"] += 1
+                if self.memory is not None:
+                    self.memory.put(reaction_id, data)
+                return data
+        if self.remote is not None:
+            data = self.remote.child(reaction_id).get()
+            if data:
+                self.hits["remote"] += 1
+                self._fill(reaction_id, data)
+                return data
+        self.misses += 1
+        return None
+
+    def get_by_prompt(self, prompt: str) -> Tuple[Optional[str], Optional[dict]]:
+        """(id, reaction) from the local tier by stored prompt – catches variants filed under another id."""
+        if self.local is None:
+            return None, None
+        reaction_id, data = self.local.get_by_prompt(prompt)
+        if data is not None and self.memory is not None:
+            self.memory.put(reaction_id, data)
+        return reaction_id, data
+
+    def put(self, reaction_id: str, data: dict):
+        """Write through: remote first, so a failed remote write doesn't leave a local-only entry."""
+        if self.remote is not None:
+            self.remote.child(reaction_id).set(data)
+        self._fill(reaction_id, data)
+
+    def warm(self, reactions: Optional[Dict[str, dict]]):
+        """Copy a whole `reactions/<id>` snapshot into the local tier."""
+        if self.local is not None and reactions:
+            self.local.put_many(reactions)
+
+    def invalidate(self, reaction_id: str):
+        """Forget `reaction_id` in the faster tiers; the remote copy stays."""
+        if self.memory is not None:
+            self.memory.invalidate(reaction_id)
+        if self.local is not None:
+            self.local.delete(reaction_id)
+
+    def _fill(self, reaction_id: str, data: dict):
+        if self.local is not None:
+            self.local.put(reaction_id, data)
+        if self.memory is not None:
+            self.memory.put(reaction_id, data)
@@ -0,0 +1,184 @@
+# scheduler.py – fixed-timestep simulation loop decoupled from the Kit render loop
+# ------------------------------------------------------------------ #
+import threading
+import time
+from typing import Any, Callable, Optional, Tuple
+
+# one-shot main-thread callbacks keep their update subscription alive here until they fire
+_PENDING = set()
+
+
+class SnapshotBuffer:
+    """
+    Single-writer, single-reader double buffer without locks.
+
+    The writer fills the back slot and publishes it by flipping `_front` – a
+    single reference store, atomic under the GIL. Slots hold immutable
+    (sequence, snapshot) tuples that are replaced, never mutated, so a
+    reader always gets one complete snapshot. If the writer publishes twice
+    while the reader is looking, the reader simply sees the newer one.
+    """
+    def __init__(self):
+        self._slots = [(0, None), (0, None)]
+        self._front = 0
+        self._seq = 0
+
+    def publish(self, snapshot):
+        self._seq += 1
+        back = 1 - self._front
+        self._slots[back] = (self._seq, snapshot)
+        self._front = back
+
+    def latest(self) -> Tuple[int, Any]:
+        """(sequence number, snapshot) of the newest publish; (0, None) before the first."""
+        return self._slots[self._front]
+
+
+class FixedStepScheduler:
+    """
+    Runs `step()` on a worker thread at a fixed wall-clock tick `dt_wall` and
+    publishes `snapshot()` every `publish_every` ticks into a SnapshotBuffer.
+    The Kit main thread never waits on the simulation: `subscribe(apply)`
+    hooks the app update stream and hands `apply` only the newest snapshot,
+    at most once per rendered frame, skipping frames with nothing new.
+
+    A tick that falls behind catches up with at most `max_catch_up` steps;
+    further missed ticks are dropped (counted in `dropped`) rather than
+    letting a slow engine spiral. `realtime=False` steps as fast as possible.
+    `step` may itself fan out to processes, e.g. `SlabDecomposition.step`.
+    """
+    def __init__(
+        self,
+        step: Callable[[], Any],
+        snapshot: Callable[[], Any],
+        *,
+        dt_wall: float = 1.0 / 60.0,
+        publish_every: int = 1,
+        max_catch_up: int = 4,
+        realtime: bool = True,
+    ):
+        self._step, self._snapshot = step, snapshot
+        self.dt_wall = dt_wall
+        self.publish_every = publish_every
+        self.max_catch_up = max_catch_up
+        self.realtime = realtime
+        self.buffer = SnapshotBuffer()
+        self.steps = 0
+        self.dropped = 0
+        self.error: Optional[BaseException] = None
+        self._stop = threading.Event()
+        self._resume = threading.Event()
+        self._resume.set()
+        self._thread: Optional[threading.Thread] = None
+        self._applied = 0
+        self._sub = None
+
+    # ---------- worker thread ---------------------------------------------------
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self.buffer.publish(self._snapshot())
+        self._thread = threading.Thread(target=self._loop, name="chem_sim_reactor.scheduler", daemon=True)
+        self._thread.start()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def pause(self):
+        self._resume.clear()
+
+    def resume(self):
+        self._resume.set()
+
+    def _tick(self):
+        self._step()
+        self.steps += 1
+        if self.steps % self.publish_every == 0:
+            self.buffer.publish(self._snapshot())
+
+    def _loop(self):
+        try:
+            next_t = time.monotonic()
+            while not self._stop.is_set():
+                if not self._resume.is_set():
+                    self._resume.wait(0.1)
+                    next_t = time.monotonic()
+                    continue
+                if not self.realtime:
+                    self._tick()
+                    continue
+                now = time.monotonic()
+                if now < next_t:
+                    self._stop.wait(next_t - now)
+                    continue
+                due = int((now - next_t) / self.dt_wall) + 1
+                for _ in range(min(due, self.max_catch_up)):
+                    self._tick()
+                self.dropped += max(due - self.max_catch_up, 0)
+                next_t += due * self.dt_wall
+        except BaseException as e:          # surfaced to the main thread by poll()
+            self.error = e
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the worker and drop the update subscription."""
+        self._stop.set()
+        self._resume.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self._sub = None
+
+    # ---------- main thread -------------------------------------------------------------
+    def poll(self, apply: Callable[[Any], None]) -> bool:
+        """Apply the newest snapshot if it has not been applied yet; True if one was."""
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise RuntimeError("simulation step failed") from error
+        seq, snapshot = self.buffer.latest()
+        if seq == self._applied:
+            return False
+        self._applied = seq
+        apply(snapshot)
+        return True
+
+    def subscribe(self, apply: Callable[[Any], None], on_error: Optional[Callable[[Exception], None]] = None):
+        """Call `poll(apply)` once per Kit update; a failed step stops the scheduler and reports to `on_error`."""
+        import omni.kit.app
+
+        def _on_update(_event):
+            try:
+                self.poll(apply)
+            except Exception as e:
+                self.stop()
+                if on_error is not None:
+                    on_error(e)
+
+        self._sub = omni.kit.app.get_app().get_update_event_stream().create_subscription_to_pop(
+            _on_update, name="chem_sim_reactor.scheduler")
+        return self._sub
+
+
+def defer_on_main_thread(fn: Callable[[], Any], delay: float = 0.0):
+    """
+    Run `fn` once on the Kit main thread, on the first update at least `delay`
+    seconds from now, instead of blocking the main thread with time.sleep.
+    Callable from worker threads, to hand their results back to the UI.
+    """
+    import omni.kit.app
+
+    due = time.monotonic() + delay
+    holder = []
+
+    def _on_update(_event):
+        if not holder or time.monotonic() < due:
+            return
+        _PENDING.discard(holder.pop())
+        fn()
+
+    sub = omni.kit.app.get_app().get_update_event_stream().create_subscription_to_pop(
+        _on_update, name="chem_sim_reactor.defer")
+    holder.append(sub)
+    _PENDING.add(sub)
+    return sub
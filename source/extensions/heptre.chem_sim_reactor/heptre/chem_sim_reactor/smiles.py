@@ -0,0 +1,188 @@
+# smiles.py – SMILES to MolecularStructure with implicit hydrogens
+# ------------------------------------------------------------------ #
+import re
+from typing import Dict, List, Optional
+
+from .Molecular import Atom, Bond, MolecularStructure
+from .network import hill_formula
+
+# normal valences of the organic subset; implicit H fills up to the smallest that fits
+VALENCES = {
+    "B": (3,), "C": (4,), "N": (3, 5), "O": (2,), "P": (3, 5), "S": (2, 4, 6),
+    "F": (1,), "Cl": (1,), "Br": (1,), "I": (1,),
+}
+BOND_ORDERS = {"-": 1, "=": 2, "#": 3, "$": 4, ":": 1.5, "/": 1, "\\": 1}
+AROMATIC_ORDER = 1.5
+
+# same colours the LLM is told to use; anything else keeps Atom's grey
+ELEMENT_COLORS = {
+    "C": "#000000", "H": "#FFFFFF", "O": "#FF0000", "N": "#0000FF", "S": "#FFFF00", "P": "#FFA500",
+    "F": "#90E050", "Cl": "#00FF00", "Br": "#A52A2A", "I": "#940094", "B": "#FFB5B5",
+    "Na": "#AB5CF2", "K": "#8F40D4", "Mg": "#8AFF00", "Ca": "#3DFF00", "Fe": "#E06633",
+}
+
+# bracket atoms may be any element
+ELEMENTS = frozenset("""
+H He Li Be B C N O F Ne Na Mg Al Si P S Cl Ar K Ca Sc Ti V Cr Mn Fe Co Ni Cu Zn Ga Ge As Se Br Kr
+Rb Sr Y Zr Nb Mo Tc Ru Rh Pd Ag Cd In Sn Sb Te I Xe Cs Ba La Ce Pr Nd Pm Sm Eu Gd Tb Dy Ho Er Tm Yb
+Lu Hf Ta W Re Os Ir Pt Au Hg Tl Pb Bi Po At Rn Fr Ra Ac Th Pa U Np Pu Am Cm Bk Cf Es Fm Md No Lr
+Rf Db Sg Bh Hs Mt Ds Rg Cn Nh Fl Mc Lv Ts Og
+""".split())
+
+_TOKEN = re.compile(r"\[[^\]]*\]|Br|Cl|[BCNOPSFI]|[bcnops]|\*|[()]|[-=#$:/\\.]|%\d\d|\d")
+_BRACKET = re.compile(
+    r"^\[(?P<isotope>\d+)?(?P<element>[A-Z][a-z]?|[a-z][a-z]?|\*)"
+    r"(?P<chiral>@@?|@[A-Z]{2}\d+)?(?P<h>H\d*)?(?P<charge>[+-]\d+|[+-]+)?(?::\d+)?\]$"
+)
+_AROMATIC_BRACKET = {"b", "c", "n", "o", "p", "s", "se", "as", "te"}
+
+
+class _Atom:
+    __slots__ = ("element", "aromatic", "charge", "hydrogens", "orders")
+
+    def __init__(self, element: str, aromatic: bool, charge: int = 0, hydrogens: Optional[int] = None):
+        self.element = element
+        self.aromatic = aromatic
+        self.charge = charge
+        self.hydrogens = hydrogens      # None: implicit, from valence
+        self.orders: List[float] = []
+
+
+def _parse_charge(text: Optional[str]) -> int:
+    if not text:
+        return 0
+    sign = 1 if text[0] == "+" else -1
+    if len(text) > 1 and text[1:].isdigit():
+        return sign * int(text[1:])
+    return sign * len(text)
+
+
+def _bracket_atom(token: str, pos: int) -> _Atom:
+    m = _BRACKET.match(token)
+    if m is None:
+        raise ValueError(f"bad bracket atom {token!r} at {pos}")
+    symbol = m.group("element")
+    aromatic = symbol in _AROMATIC_BRACKET
+    element = symbol.capitalize() if aromatic else symbol
+    if element not in ELEMENTS and element != "*":
+        raise ValueError(f"unknown element {symbol!r} at {pos}")
+    h = m.group("h")
+    hydrogens = (int(h[1:]) if len(h) > 1 else 1) if h else 0
+    return _Atom(element, aromatic, _parse_charge(m.group("charge")), hydrogens)
+
+
+def _implicit_hydrogens(atom: _Atom) -> int:
+    valences = VALENCES.get(atom.element)
+    if valences is None:
+        return 0
+    # aromatic bonds count one each, plus one shared pi bond for the atom –
+    # except lone-pair donors (furan o, thiophene s, N-substituted pyrrole n)
+    explicit = sum(1 if order == AROMATIC_ORDER else order for order in atom.orders)
+    if atom.aromatic and atom.element not in ("O", "S") and not (atom.element == "N" and explicit >= 3):
+        explicit += 1
+    for v in valences:
+        if v >= explicit:
+            return int(round(v - explicit))
+    return 0
+
+
+def parse_smiles(smiles: str, name: str = "", description: str = "") -> MolecularStructure:
+    """
+    MolecularStructure of a SMILES string: organic-subset and bracket atoms
+    (isotope and chirality read but dropped), branches, ring closures
+    (digits and %nn), bond orders - = # $ :, charges, aromatic lower-case
+    atoms and '.'-separated fragments. Aromatic bonds get order 1.5.
+    Implicit hydrogens follow the normal valences; bracket atoms carry
+    exactly the H they list. Heavy atoms are a1..an in SMILES order, their
+    hydrogens follow. Raises ValueError on malformed input.
+    """
+    text = smiles.strip()
+    tokens = _TOKEN.findall(text)
+    if "".join(tokens) != text or not tokens:
+        raise ValueError(f"not a SMILES string: {smiles!r}")
+
+    atoms: List[_Atom] = []
+    bonds: List[list] = []                 # [i, j, order]
+    rings: Dict[str, tuple] = {}           # label -> (atom, order or None)
+    branches: List[Optional[int]] = []
+    prev: Optional[int] = None
+    pending: Optional[float] = None
+    pos = 0
+
+    def connect(i: int, j: int, order: Optional[float]):
+        if order is None:
+            order = AROMATIC_ORDER if atoms[i].aromatic and atoms[j].aromatic else 1
+        bonds.append([i, j, order])
+        atoms[i].orders.append(order)
+        atoms[j].orders.append(order)
+
+    for tok in tokens:
+        if tok.startswith("[") or tok[0].isalpha() or tok == "*":
+            if tok.startswith("["):
+                atom = _bracket_atom(tok, pos)
+            elif tok == "*":
+                atom = _Atom("*", False, hydrogens=0)
+            elif tok.islower():
+                atom = _Atom(tok.upper(), True)
+            else:
+                atom = _Atom(tok, False)
+            atoms.append(atom)
+            if prev is not None:
+                connect(prev, len(atoms) - 1, pending)
+            prev, pending = len(atoms) - 1, None
+        elif tok in BOND_ORDERS:
+            pending = BOND_ORDERS[tok]
+        elif tok[0].isdigit() or tok[0] == "%":
+            if prev is None:
+                raise ValueError(f"ring closure {tok!r} before any atom at {pos}")
+            label = tok.lstrip("%")
+            if label in rings:
+                other, order = rings.pop(label)
+                if other == prev:
+                    raise ValueError(f"ring closure {tok!r} bonds an atom to itself at {pos}")
+                connect(other, prev, pending if pending is not None else order)
+            else:
+                rings[label] = (prev, pending)
+            pending = None
+        elif tok == "(":
+            if prev is None:
+                raise ValueError(f"branch before any atom at {pos}")
+            branches.append(prev)
+        elif tok == ")":
+            if not branches:
+                raise ValueError(f"unbalanced ')' at {pos}")
+            prev, pending = branches.pop(), None
+        elif tok == ".":
+            prev, pending = None, None
+        pos += len(tok)
+
+    if rings:
+        raise ValueError(f"unclosed ring bond(s) {sorted(rings)} in {smiles!r}")
+    if branches:
+        raise ValueError(f"unbalanced '(' in {smiles!r}")
+    if pending is not None:
+        raise ValueError(f"dangling bond at the end of {smiles!r}")
+
+    out_atoms = [Atom(f"a{i + 1}", a.element, ELEMENT_COLORS.get(a.element, "#808080"), a.charge)
+                 for i, a in enumerate(atoms)]
+    out_bonds = [Bond(out_atoms[i].id, out_atoms[j].id, order) for i, j, order in bonds]
+    for i, a in enumerate(atoms):
+        n_h = a.hydrogens if a.hydrogens is not None else _implicit_hydrogens(a)
+        for _ in range(n_h):
+            h = Atom(f"a{len(out_atoms) + 1}", "H", ELEMENT_COLORS["H"])
+            out_atoms.append(h)
+            out_bonds.append(Bond(out_atoms[i].id, h.id))
+
+    counts: Dict[str, int] = {}
+    for a in out_atoms:
+        if a.element != "*":
+            counts[a.element] = counts.get(a.element, 0) + 1
+    return MolecularStructure(name or smiles, out_atoms, out_bonds, formula=hill_formula(counts) if counts else "",
+                              description=description)
+
+
+def smiles_to_dict(smiles: str, name: str = "", description: str = "") -> dict:
+    """`parse_smiles` in the stored-JSON form, with the SMILES kept alongside."""
+    d = parse_smiles(smiles, name, description).to_dict()
+    d["smiles"] = smiles.strip()
+    return d
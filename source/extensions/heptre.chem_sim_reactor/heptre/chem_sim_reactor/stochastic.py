@@ -0,0 +1,318 @@
+# stochastic.py – exact and approximate stochastic simulation (Gillespie)
+# ------------------------------------------------------------------ #
+import math
+from fractions import Fraction
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .kinetics import KineticsModel, ReactionConditions, initial_concentrations, reaction_from_json
+
+AVOGADRO = 6.02214076e23
+
+
+class IndexedPriorityQueue:
+    """
+    Binary min-heap of (time, reaction) with a position index per reaction,
+    so any reaction's putative time can be changed in O(log R).
+    """
+    def __init__(self, times: np.ndarray):
+        n = len(times)
+        self.times = np.array(times, dtype=float)
+        self.heap = list(range(n))              # heap slot -> reaction
+        self.pos = list(range(n))               # reaction -> heap slot
+        for i in range(n // 2 - 1, -1, -1):
+            self._down(i)
+
+    def top(self) -> Tuple[float, int]:
+        j = self.heap[0]
+        return self.times[j], j
+
+    def update(self, j: int, t: float):
+        old = self.times[j]
+        self.times[j] = t
+        if t < old:
+            self._up(self.pos[j])
+        else:
+            self._down(self.pos[j])
+
+    def _swap(self, a: int, b: int):
+        h = self.heap
+        h[a], h[b] = h[b], h[a]
+        self.pos[h[a]] = a
+        self.pos[h[b]] = b
+
+    def _up(self, i: int):
+        h, times = self.heap, self.times
+        while i > 0:
+            parent = (i - 1) >> 1
+            if times[h[i]] < times[h[parent]]:
+                self._swap(i, parent)
+                i = parent
+            else:
+                break
+
+    def _down(self, i: int):
+        h, times, n = self.heap, self.times, len(self.heap)
+        while True:
+            left = 2 * i + 1
+            if left >= n:
+                break
+            child = left
+            if left + 1 < n and times[h[left + 1]] < times[h[left]]:
+                child = left + 1
+            if times[h[child]] < times[h[i]]:
+                self._swap(i, child)
+                i = child
+            else:
+                break
+
+
+def integer_stoichiometry(model: KineticsModel):
+    """
+    (scale (R,), reactant (R, S), net (R, S)) integer stoichiometry of
+    `model`'s steps. A step with fractional coefficients is multiplied by the
+    smallest integer that clears them – H2 + 0.5 O2 -> H2O fires as
+    2 H2 + O2 -> 2 H2O – and each event then stands for `scale` turnovers,
+    so its propensity is divided by `scale`. Coefficients that are not
+    simple fractions raise ValueError.
+    """
+    reac = model.reactant_stoich.toarray()
+    net = model.stoich.T.toarray()
+    scale = np.ones(model.n_reactions, dtype=np.int64)
+    for j in range(model.n_reactions):
+        for v in np.concatenate([reac[j], net[j]]):
+            f = Fraction(float(v)).limit_denominator(12)
+            if abs(f - v) > 1e-6 * abs(v):
+                raise ValueError(f"step {j} has coefficient {v:g}; the stochastic simulator "
+                                 "needs whole numbers or simple fractions")
+            scale[j] = math.lcm(int(scale[j]), f.denominator)
+    return (scale, np.rint(reac * scale[:, None]).astype(np.int64),
+            np.rint(net * scale[:, None]).astype(np.int64))
+
+
+class StochasticSimulator:
+    """
+    Gibson–Bruck next-reaction method over a `KineticsModel`, switching to
+    Cao–Gillespie–Petzold tau-leaping while every reactant population is large.
+
+    Deterministic rate constants (L/mol)^(m-1)/s are converted to stochastic
+    ones for a reaction volume of `volume_l` litres. Each event costs one heap
+    pop plus an O(log R) update for each reaction in its dependency set.
+    Steps with fractional coefficients fire in whole molecules, scaled as
+    `integer_stoichiometry` describes.
+    """
+    def __init__(
+        self,
+        model: KineticsModel,
+        counts,
+        temperature_k: float,
+        volume_l: float = 1e-18,
+        seed: Optional[int] = None,
+        epsilon: float = 0.03,
+        critical_count: int = 20,
+        leap_threshold: float = 10.0,
+    ):
+        self.model = model
+        self.x = np.array(counts, dtype=np.int64)
+        self.t = 0.0
+        self.rng = np.random.default_rng(seed)
+        self.epsilon = epsilon
+        self.critical_count = critical_count
+        self.leap_threshold = leap_threshold
+
+        scale, reac, self._nu = integer_stoichiometry(model)               # (R,), (R, S), (R, S) net change
+        self._need = [[(i, int(row[i])) for i in np.nonzero(row)[0]] for row in reac]
+        self._order = [[(int(i), float(p)) for i, p in zip(idx, pw) if i < model.n_species]
+                       for idx, pw in zip(model.order_index, model.order_power)]
+        self._change = [[(i, int(row[i])) for i in np.nonzero(row)[0]] for row in self._nu]
+
+        # stochastic rate constants: c = k / (N_A V)^(m-1), m the overall order;
+        # the combinatorial n! of a homo-order-n step is folded into _propensity
+        k = model.rate_constants(temperature_k)
+        m = model.order_power.sum(axis=1)
+        self.c = k * (AVOGADRO * volume_l) ** (1.0 - m) / scale
+        # g_i for the tau bound: highest order of any reaction in species i
+        self._g = np.ones(model.n_species)
+        for o in self._order:
+            for i, p in o:
+                self._g[i] = max(self._g[i], math.ceil(p))
+
+        # dependency graph: reactions whose propensity changes when j fires
+        readers: Dict[int, set] = {}
+        for j in range(model.n_reactions):
+            for i, _ in self._need[j] + self._order[j]:
+                readers.setdefault(i, set()).add(j)
+        self.depends = []
+        for j, ch in enumerate(self._change):
+            deps = {j}
+            for i, _ in ch:
+                deps.update(readers.get(i, ()))
+            self.depends.append(sorted(deps))
+
+        self.a = np.array([self._propensity(j) for j in range(model.n_reactions)])
+        self._reset_queue()
+
+    # ---------- propensities ---------------------------------------------
+    def _propensity(self, j: int) -> float:
+        x = self.x
+        for i, n in self._need[j]:
+            if x[i] < n:
+                return 0.0
+        a = self.c[j]
+        for i, p in self._order[j]:
+            xi = int(x[i])
+            if p == 1.0:
+                a *= xi
+            elif p == int(p):               # x (x-1) ... (x-p+1): distinct molecule tuples
+                a *= math.perm(xi, int(p))
+            else:
+                a *= xi ** p
+        return a
+
+    def _putative(self, a: float) -> float:
+        return self.t + self.rng.exponential(1.0 / a) if a > 0 else math.inf
+
+    def _reset_queue(self):
+        self.queue = IndexedPriorityQueue([self._putative(a) for a in self.a])
+
+    # ---------- exact step (next-reaction method) -------------------------
+    def _fire_next(self, t_end: float) -> Optional[Tuple[float, int, int]]:
+        t_next, mu = self.queue.top()
+        if t_next > t_end:
+            self.t = t_end
+            return None
+        self.t = t_next
+        for i, d in self._change[mu]:
+            self.x[i] += d
+        for j in self.depends[mu]:
+            a_old, a_new = self.a[j], self._propensity(j)
+            self.a[j] = a_new
+            if j == mu:
+                self.queue.update(j, self._putative(a_new))
+            elif a_new <= 0:
+                self.queue.update(j, math.inf)
+            elif a_old > 0 and math.isfinite(self.queue.times[j]):
+                # Gibson–Bruck: rescale the remaining waiting time instead of redrawing
+                self.queue.update(j, self.t + (a_old / a_new) * (self.queue.times[j] - self.t))
+            else:
+                self.queue.update(j, self._putative(a_new))
+        return float(self.t), mu, 1
+
+    # ---------- tau-leaping ------------------------------------------------
+    def _leap_tau(self) -> float:
+        """Cao, Gillespie & Petzold (2006) step bound: |Δx_i| <= max(eps*x_i/g_i, 1)."""
+        active = self.a > 0
+        if not np.any(active):
+            return math.inf
+        reac_species = {i for j in np.nonzero(active)[0] for i, _ in self._need[j] + self._order[j]}
+        if any(self.x[i] < self.critical_count for i in reac_species):
+            return 0.0
+        nu, a = self._nu[active], self.a[active]
+        mu = nu.T @ a
+        sigma2 = (nu.T ** 2) @ a
+        idx = np.array(sorted(reac_species))
+        bound = np.maximum(self.epsilon * self.x[idx] / self._g[idx], 1.0)
+        with np.errstate(divide="ignore"):
+            tau1 = np.min(np.where(mu[idx] != 0, bound / np.abs(mu[idx]), np.inf))
+            tau2 = np.min(np.where(sigma2[idx] != 0, bound ** 2 / sigma2[idx], np.inf))
+        return float(min(tau1, tau2))
+
+    def _leap(self, tau: float) -> Tuple[float, np.ndarray]:
+        while True:
+            k = self.rng.poisson(self.a * tau)
+            x_new = self.x + k @ self._nu
+            if np.all(x_new >= 0):
+                break
+            tau *= 0.5                       # overshoot: retry with a shorter leap
+        self.x = x_new
+        self.t += tau
+        self.a = np.array([self._propensity(j) for j in range(len(self.a))])
+        self._reset_queue()                  # memoryless: redraw putative times
+        return self.t, k
+
+    # ---------- driver -------------------------------------------------------
+    def events(self, t_end: float, max_events: Optional[int] = None) -> Iterator[Tuple[float, int, int]]:
+        """
+        Yield (time, reaction, count) until `t_end`. Exact events have count 1;
+        a tau-leap yields one tuple per reaction that fired during the leap,
+        stamped with the end time of the leap.
+        """
+        emitted = 0
+        while self.t < t_end and (max_events is None or emitted < max_events):
+            a0 = float(self.a.sum())
+            if a0 <= 0:
+                self.t = t_end
+                return
+            tau = self._leap_tau()
+            if tau * a0 >= self.leap_threshold:
+                tau = min(tau, t_end - self.t)
+                _, fired = self._leap(tau)
+                for j in np.nonzero(fired)[0]:
+                    yield float(self.t), int(j), int(fired[j])
+                    emitted += 1
+                continue
+            # populations are small or the leap would be tiny: a batch of exact events
+            for _ in range(100):
+                ev = self._fire_next(t_end)
+                if ev is None:
+                    return
+                yield ev
+                emitted += 1
+
+    def run(self, t_end: float, n_out: int = 101):
+        """Counts sampled on a uniform grid of `n_out` times in [0, t_end]."""
+        times = np.linspace(self.t, t_end, n_out)
+        X = np.empty((n_out, len(self.x)), dtype=np.int64)
+        X[0] = self.x
+        o = 1
+        before = self.x.copy()                   # state just before the next event
+        for t, _, _ in self.events(t_end):
+            while o < n_out and times[o] < t:
+                X[o] = before
+                o += 1
+            before[:] = self.x
+        while o < n_out:
+            X[o] = self.x
+            o += 1
+        return times, X
+
+
+def molecule_lifetimes(model: KineticsModel, counts, events, t_end: float) -> Dict[str, List[Tuple[float, float]]]:
+    """
+    Turn an event stream into per-molecule (appear, disappear) intervals per
+    species – what the USD timeline needs to show individual molecules. The
+    oldest molecule of a species is the one consumed first.
+    """
+    _, _, nu = integer_stoichiometry(model)
+    alive = {name: [0.0] * int(n) for name, n in zip(model.species, counts)}
+    done: Dict[str, List[Tuple[float, float]]] = {name: [] for name in model.species}
+    for t, j, n in events:
+        for i in np.nonzero(nu[j])[0]:
+            name, d = model.species[i], int(nu[j, i]) * n
+            if d > 0:
+                alive[name].extend([t] * d)
+            else:
+                gone, alive[name] = alive[name][:-d], alive[name][-d:]
+                done[name].extend((t0, t) for t0 in gone)
+    for name, starts in alive.items():
+        done[name].extend((t0, t_end) for t0 in starts)
+    return done
+
+
+def molecule_population(js, conditions: ReactionConditions, n_molecules: int = 24,
+                        sim_time: float = 10.0, seed: Optional[int] = None):
+    """
+    Simulate the stored reaction `js` with about `n_molecules` reactant
+    molecules, split like `initial_concentrations`; the reaction volume is
+    chosen so those counts match the ideal-gas concentrations, which keeps
+    the event timing consistent with `reaction_progress`.
+    Returns (reaction, lifetimes) – see `molecule_lifetimes`.
+    """
+    rx = reaction_from_json(js)
+    model = KineticsModel([rx])
+    c0 = initial_concentrations(model, rx.reactants, conditions)
+    volume_l = n_molecules / (AVOGADRO * c0.sum())
+    counts = np.round(c0 * AVOGADRO * volume_l).astype(np.int64)
+    sim = StochasticSimulator(model, counts, conditions.temperature_k, volume_l=volume_l, seed=seed)
+    return rx, molecule_lifetimes(model, counts, sim.events(sim_time), sim_time)
@@ -0,0 +1,290 @@
+# sweep.py – parallel parameter sweeps over temperature, pressure and concentration
+# ------------------------------------------------------------------ #
+import argparse
+import csv
+import hashlib
+import itertools
+import json
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .kinetics import KineticsModel, ReactionConditions, initial_concentrations, limiting_conversion, reaction_from_json
+from .stochastic import AVOGADRO, StochasticSimulator
+
+COLUMNS = ["temperature_c", "pressure_atm", "concentration", "method", "yield", "t_half_s", "k"]
+METHODS = ("kinetics", "stochastic")
+
+
+def condition_grid(temperatures_c: Sequence[float], pressures_atm: Sequence[float] = (1.0,),
+                   concentrations: Sequence[float] = (0.5,)) -> List[ReactionConditions]:
+    """Cartesian grid, temperature varying fastest, so every (P, x) pair is one contiguous T series."""
+    return [ReactionConditions(float(t), float(p), float(x))
+            for p, x, t in itertools.product(pressures_atm, concentrations, temperatures_c)]
+
+
+def simulate_point(js, conditions: ReactionConditions, method: str = "kinetics", sim_time: float = 10.0,
+                   n_out: int = 101, n_molecules: int = 1000, seed: Optional[int] = None) -> Dict:
+    """
+    One sweep point: the conversion curve of the limiting reactant over
+    `sim_time` seconds, from RK4 kinetics or one stochastic run with about
+    `n_molecules` molecules. Returns a record with the `COLUMNS` plus the
+    `extent` curve; `t_half_s` is None when half conversion is never reached.
+    """
+    rx = reaction_from_json(js)
+    model = KineticsModel([rx])
+    c0 = initial_concentrations(model, rx.reactants, conditions)
+    if method == "kinetics":
+        times, X = model.integrate(c0, sim_time, conditions.temperature_k, n_steps=max(4 * n_out, 200), n_out=n_out)
+        x0 = c0
+    elif method == "stochastic":
+        # same volume rule as molecule_population: counts match the ideal-gas concentrations
+        volume_l = n_molecules / (AVOGADRO * c0.sum())
+        x0 = np.round(c0 * AVOGADRO * volume_l).astype(np.int64)
+        sim = StochasticSimulator(model, x0, conditions.temperature_k, volume_l=volume_l, seed=seed)
+        times, X = sim.run(sim_time, n_out)
+    else:
+        raise ValueError(f"unknown method {method!r}, expected one of {METHODS}")
+
+    extent = limiting_conversion(rx, model, x0, X)
+    t_half = None
+    if extent[-1] >= 0.5:
+        i = int(np.argmax(extent >= 0.5))
+        t_half = float(times[0]) if i == 0 else float(np.interp(0.5, extent[i - 1:i + 1], times[i - 1:i + 1]))
+    return {
+        "temperature_c": conditions.temperature_c,
+        "pressure_atm": conditions.pressure_atm,
+        "concentration": conditions.concentration,
+        "method": method,
+        "yield": float(extent[-1]),
+        "t_half_s": t_half,
+        "k": float(model.rate_constants(conditions.temperature_k)[0]),
+        "extent": extent.tolist(),
+    }
+
+
+# ---------- cache ---------------------------------------------------------------
+class ResultCache:
+    """
+    One JSON file per sweep point under `root`, named by a hash of everything
+    that determines the result: the parsed reaction and its Arrhenius
+    parameters, the conditions and the run settings.
+    """
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    @staticmethod
+    def key(js, conditions: ReactionConditions, **settings) -> str:
+        rx = reaction_from_json(js)
+        payload = {
+            "reactants": rx.reactants, "products": rx.products, "orders": rx.orders,
+            "A": rx.A, "Ea": rx.Ea, "beta": rx.beta,
+            "conditions": [conditions.temperature_c, conditions.pressure_atm, conditions.concentration],
+            "settings": settings,
+        }
+        return hashlib.sha1(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict]:
+        try:
+            with open(self._path(key), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key: str, record: Dict):
+        tmp = self._path(key) + f".{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(record, f)
+        os.replace(tmp, self._path(key))
+
+
+def _run_point(task):
+    js, t, p, x, settings = task
+    return simulate_point(js, ReactionConditions(t, p, x), **settings)
+
+
+def run_sweep(js, grid: Sequence[ReactionConditions], *, method: str = "kinetics", sim_time: float = 10.0,
+              n_out: int = 101, n_molecules: int = 1000, seed: int = 0, workers: Optional[int] = None,
+              cache_dir: Optional[str] = None) -> List[Dict]:
+    """
+    Simulate every point of `grid` and return the records in grid order.
+    Points already in `cache_dir` are not recomputed; the rest are fanned
+    out over a process pool of `workers` (all cores by default; 1 runs
+    inline). Stochastic seeds derive from the cache key, so a point gives
+    the same result whichever sweep it is part of.
+    """
+    if method not in METHODS:
+        raise ValueError(f"unknown method {method!r}, expected one of {METHODS}")
+    cache = ResultCache(cache_dir) if cache_dir else None
+    settings = {"method": method, "sim_time": sim_time, "n_out": n_out}
+    if method == "stochastic":
+        settings.update(n_molecules=n_molecules, seed=seed)
+
+    records: List[Optional[Dict]] = [None] * len(grid)
+    keys, todo = [], []
+    for i, c in enumerate(grid):
+        key = ResultCache.key(js, c, **settings)
+        keys.append(key)
+        hit = cache.get(key) if cache else None
+        if hit is not None:
+            records[i] = hit
+            continue
+        point = dict(settings)
+        if method == "stochastic":
+            point["seed"] = int(key[:15], 16)
+        todo.append((i, (js, c.temperature_c, c.pressure_atm, c.concentration, point)))
+
+    workers = workers or os.cpu_count() or 1
+    tasks = [task for _, task in todo]
+    pool = None
+    if workers == 1 or len(todo) <= 1:
+        results = map(_run_point, tasks)
+    else:
+        pool = ProcessPoolExecutor(max_workers=min(workers, len(todo)), mp_context=mp.get_context("spawn"))
+        results = pool.map(_run_point, tasks, chunksize=max(1, len(todo) // (4 * workers)))
+    try:
+        for (i, _), record in zip(todo, results):
+            records[i] = record
+            if cache:
+                cache.put(keys[i], record)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return records
+
+
+# ---------- outputs -----------------------------------------------------------------
+def write_results_csv(path: str, records: Sequence[Dict]):
+    """The compact table: one row per point, `COLUMNS` only (no curves)."""
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=COLUMNS, extrasaction="ignore")
+        writer.writeheader()
+        for r in records:
+            writer.writerow({**r, "t_half_s": "" if r["t_half_s"] is None else r["t_half_s"]})
+
+
+def _series(records: Sequence[Dict]):
+    """Records grouped into yield-vs-temperature curves, one per (pressure, concentration)."""
+    groups: Dict[tuple, List[Dict]] = {}
+    for r in records:
+        groups.setdefault((r["pressure_atm"], r["concentration"]), []).append(r)
+    return [(key, sorted(rs, key=lambda r: r["temperature_c"])) for key, rs in groups.items()]
+
+
+def write_sweep_usd(path: str, records: Sequence[Dict], width: float = 10.0, height: float = 5.0):
+    """
+    Yield-versus-temperature curves as linear BasisCurves under /World/Sweep,
+    one per (pressure, concentration) series, stacked in depth.
+    """
+    from pxr import Gf, Sdf, Usd, UsdGeom, Vt
+
+    stage = Usd.Stage.CreateNew(path)
+    UsdGeom.SetStageUpAxis(stage, UsdGeom.Tokens.y)
+    root = UsdGeom.Xform.Define(stage, "/World/Sweep")
+    stage.SetDefaultPrim(root.GetPrim())
+    t_all = [r["temperature_c"] for r in records]
+    t_lo, t_span = min(t_all), max(max(t_all) - min(t_all), 1e-9)
+    series = _series(records)
+    for n, ((p, x), rs) in enumerate(series):
+        pts = [Gf.Vec3f(width * (r["temperature_c"] - t_lo) / t_span, height * r["yield"], -0.5 * n) for r in rs]
+        curve = UsdGeom.BasisCurves.Define(stage, f"/World/Sweep/P{n}")
+        curve.CreateTypeAttr(UsdGeom.Tokens.linear)
+        curve.CreatePointsAttr(Vt.Vec3fArray(pts))
+        curve.CreateCurveVertexCountsAttr(Vt.IntArray([len(pts)]))
+        curve.CreateWidthsAttr(Vt.FloatArray([0.05] * len(pts)))
+        hue = n / max(len(series), 1)
+        curve.CreateDisplayColorAttr(Vt.Vec3fArray([Gf.Vec3f(hue, 0.4, 1.0 - hue)]))
+        prim = curve.GetPrim()
+        prim.CreateAttribute("sweep:pressure_atm", Sdf.ValueTypeNames.Float).Set(float(p))
+        prim.CreateAttribute("sweep:concentration", Sdf.ValueTypeNames.Float).Set(float(x))
+    stage.GetRootLayer().Save()
+    return path
+
+
+def write_sweep_gif(path: str, records: Sequence[Dict], size=(480, 320), duration: float = 0.5):
+    """One chart frame per (pressure, concentration) series, earlier series kept in grey."""
+    import imageio
+    from PIL import Image, ImageDraw
+
+    w, h = size
+    m = 40
+    t_all = [r["temperature_c"] for r in records]
+    t_lo, t_span = min(t_all), max(max(t_all) - min(t_all), 1e-9)
+
+    def xy(r):
+        return (m + (w - 2 * m) * (r["temperature_c"] - t_lo) / t_span, h - m - (h - 2 * m) * r["yield"])
+
+    frames, done = [], []
+    for (p, x), rs in _series(records):
+        img = Image.new("RGB", size, "white")
+        draw = ImageDraw.Draw(img)
+        draw.line([(m, m), (m, h - m), (w - m, h - m)], fill="black")
+        draw.text((m, h - m + 8), f"{t_lo:.0f} °C", fill="black")
+        draw.text((w - m - 30, h - m + 8), f"{t_lo + t_span:.0f} °C", fill="black")
+        draw.text((4, m - 6), "yield 1", fill="black")
+        for old in done:
+            draw.line(old, fill=(190, 190, 190), width=2)
+        line = [xy(r) for r in rs]
+        draw.line(line, fill=(200, 40, 40), width=3)
+        draw.text((w // 2 - 60, 8), f"P = {p:g} atm, x_A = {x:g}", fill="black")
+        done.append(line)
+        frames.append(np.asarray(img))
+    imageio.mimsave(path, frames, duration=duration)
+    return path
+
+
+# ---------- CLI -------------------------------------------------------------------------
+def _grid_values(text: str) -> List[float]:
+    """"20:100:81" -> 81 evenly spaced values; "1,5,10" -> a list."""
+    if ":" in text:
+        lo, hi, n = text.split(":")
+        return np.linspace(float(lo), float(hi), int(n)).tolist()
+    return [float(v) for v in text.split(",") if v.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Yield sweep of a stored reaction JSON over a grid of conditions.")
+    parser.add_argument("reaction", help="reaction JSON (as written to output_json)")
+    parser.add_argument("-T", "--temperatures", default="20:100:9", help="°C, lo:hi:n or a comma list")
+    parser.add_argument("-P", "--pressures", default="1", help="atm, lo:hi:n or a comma list")
+    parser.add_argument("-x", "--concentrations", default="0.5", help="Reactant A mole fraction, lo:hi:n or a comma list")
+    parser.add_argument("--method", choices=METHODS, default="kinetics")
+    parser.add_argument("--sim-time", type=float, default=10.0, help="simulated seconds per point")
+    parser.add_argument("--molecules", type=int, default=1000, help="molecules per stochastic run")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--out", default="sweep_output", help="output directory")
+    parser.add_argument("--no-cache", action="store_true", help="ignore and do not fill <out>/cache")
+    parser.add_argument("--usd", action="store_true", help="also write a USD curve summary")
+    parser.add_argument("--gif", action="store_true", help="also write a GIF chart summary")
+    args = parser.parse_args(argv)
+
+    with open(args.reaction, "r") as f:
+        js = json.load(f)
+    grid = condition_grid(_grid_values(args.temperatures), _grid_values(args.pressures),
+                          _grid_values(args.concentrations))
+    os.makedirs(args.out, exist_ok=True)
+    start = time.time()
+    records = run_sweep(js, grid, method=args.method, sim_time=args.sim_time, n_molecules=args.molecules,
+                        seed=args.seed, workers=args.workers,
+                        cache_dir=None if args.no_cache else os.path.join(args.out, "cache"))
+    stem = os.path.join(args.out, os.path.splitext(os.path.basename(args.reaction))[0])
+    write_results_csv(stem + "_sweep.csv", records)
+    if args.usd:
+        write_sweep_usd(stem + "_sweep.usd", records)
+    if args.gif:
+        write_sweep_gif(stem + "_sweep.gif", records)
+    print(f"{len(records)} points in {time.time() - start:.1f} s -> {stem}_sweep.csv")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
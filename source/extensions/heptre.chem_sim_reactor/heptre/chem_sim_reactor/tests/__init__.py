@@ -10,3 +10,25 @@
 
 from .test_benchmarks import *
 from .test_hello import *
+from .test_kinetics import *
+from .test_particles import *
+from .test_md import *
+from .test_domain import *
+from .test_thermostats import *
+from .test_sweep import *
+from .test_scheduler import *
+from .test_checkpoint import *
+from .test_network import *
+from .test_pathways import *
+from .test_equilibrium import *
+from .test_field import *
+from .test_llm_client import *
+from .test_prompt_index import *
+from .test_reaction_cache import *
+from .test_generation import *
+from .test_smiles import *
+from .test_json_stream import *
+from .test_validation import *
+from .test_cassette import *
+from .test_raw_log import *
+from .test_anim_builder import *
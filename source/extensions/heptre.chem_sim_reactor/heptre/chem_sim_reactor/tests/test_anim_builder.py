@@ -0,0 +1,104 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: LicenseRef-NvidiaProprietary
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+
+
+import math
+import tempfile
+from pathlib import Path
+
+import omni.kit.test
+from pxr import Usd, UsdGeom
+
+from heptre.chem_sim_reactor.reaction_anim_builder import (_ring_layout, _species_file_map,
+                                                           build_mechanism_animation)
+
+# ethanol -> acetaldehyde through one transition state; oxygen stays on through stage 1
+MECHANISM = [
+    {"label": "Reactants", "kind": "reactants", "species": ["Ethanol", "Oxygen"]},
+    {"label": "TS1", "kind": "transition_state", "species": ["TS1", "Oxygen"]},
+    {"label": "Products", "kind": "products", "species": ["Acetaldehyde", "Water"]},
+]
+FILES = ["reactants_Ethanol", "reactants_Oxygen", "intermediates_Oxygen", "transition_states_TS1",
+         "products_Acetaldehyde", "products_Water"]
+
+
+def _write_molecule(path: Path):
+    stage = Usd.Stage.CreateNew(str(path))
+    stage.SetDefaultPrim(UsdGeom.Xform.Define(stage, "/Molecule").GetPrim())
+    stage.GetRootLayer().Save()
+
+
+class TestMechanismAnimation(omni.kit.test.AsyncTestCase):
+    async def test_ring_layout(self):
+        self.assertEqual(list(_ring_layout(0, 4.0)), [])
+        points = list(_ring_layout(6, 4.0))
+        self.assertEqual(len(points), 6)
+        for k, p in enumerate(points):
+            self.assertAlmostEqual(math.hypot(p[0], p[2]), 4.0)
+            self.assertEqual(p[1], 0)
+            self.assertAlmostEqual(math.atan2(p[2], p[0]) % (2 * math.pi), k * math.pi / 3)
+
+    async def test_species_file_map(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            folder = Path(tmp)
+            for stem in FILES + ["reaction_anim_1", "notes_Water"]:
+                (folder / f"{stem}.usd").touch()
+            files = _species_file_map(folder)
+            self.assertEqual(set(files), {"Ethanol", "Oxygen", "TS1", "Acetaldehyde", "Water"})
+            self.assertEqual(files["Oxygen"].name, "reactants_Oxygen.usd")      # first role wins
+            self.assertEqual(files["TS1"].name, "transition_states_TS1.usd")
+
+    async def test_mechanism_schedule(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            folder = Path(tmp)
+            for stem in FILES:
+                _write_molecule(folder / f"{stem}.usd")
+            stage = Usd.Stage.Open(build_mechanism_animation(tmp, MECHANISM, step_frames=10, hold_frames=5))
+            # segment 1 spans frames [0, 10], segment 2 [15, 25]
+            self.assertEqual(list(stage.GetRootLayer().customLayerData["mechanism"]["frames"]), [0, 10, 25])
+
+            species = stage.GetPrimAtPath("/World/Species")
+            self.assertEqual({p.GetName() for p in species.GetChildren()},
+                             {"Ethanol", "Oxygen", "TS1", "Acetaldehyde", "Water"})
+            oxygen = stage.GetRootLayer().GetPrimAtPath("/World/Species/Oxygen")
+            refs = oxygen.referenceList.GetAddedOrExplicitItems()
+            self.assertEqual([Path(r.assetPath).name for r in refs], ["reactants_Oxygen.usd"])
+
+            def visible(name, t):
+                attr = UsdGeom.Imageable(stage.GetPrimAtPath(f"/World/Species/{name}")).GetVisibilityAttr()
+                return attr.Get(t) == UsdGeom.Tokens.inherited
+
+            def height(name, t):
+                op = UsdGeom.Xformable(stage.GetPrimAtPath(f"/World/Species/{name}")).GetOrderedXformOps()[0]
+                return op.Get(t)[1]
+
+            # consumed: slides to the origin and vanishes at the end of its segment
+            self.assertTrue(visible("Ethanol", 5))
+            self.assertFalse(visible("Ethanol", 10))
+            self.assertEqual(tuple(UsdGeom.Xformable(stage.GetPrimAtPath("/World/Species/Ethanol"))
+                                   .GetOrderedXformOps()[0].Get(10)), (0, 0, 0))
+            # shared across stages 0 and 1: one prim, visible until consumed in segment 2
+            self.assertTrue(all(visible("Oxygen", t) for t in (0, 10, 20)))
+            self.assertFalse(visible("Oxygen", 25))
+            # formed in segment 2: hidden before it, shown while it rises from below
+            self.assertFalse(visible("Acetaldehyde", 10))
+            for t, y in ((15, -2.0), (20, -1.0), (25, 0.0)):
+                self.assertTrue(visible("Acetaldehyde", t))
+                self.assertAlmostEqual(height("Acetaldehyde", t), y)
+            self.assertTrue(visible("TS1", 5))
+            self.assertFalse(visible("TS1", 25))
+
+    async def test_mechanism_needs_every_species_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            _write_molecule(Path(tmp) / "reactants_Ethanol.usd")
+            with self.assertRaises(RuntimeError):
+                build_mechanism_animation(tmp, MECHANISM)
+            with self.assertRaises(RuntimeError):
+                build_mechanism_animation(tmp, MECHANISM[:1])
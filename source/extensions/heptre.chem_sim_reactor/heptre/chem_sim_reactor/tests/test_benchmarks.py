@@ -10,9 +10,16 @@
 # its affiliates is strictly prohibited.
 
 import asyncio
+import tempfile
+import time
 
 from omni.kit.test import AsyncTestCase, BenchmarkTestCase
 
+from heptre.chem_sim_reactor.cassette import CASSETTE_ENV, active_cassette
+
+# prompts of the end-to-end benchmark; record them once online, replay anywhere
+PIPELINE_PROMPTS = ["ethanol combustion", "methane combustion", "haber process", "neutralization of acetic acid"]
+
 
 class TestBenchmarks(BenchmarkTestCase):
     """
@@ -65,3 +72,32 @@ class TestBenchmarksNoCustomMetric(AsyncTestCase):
 
     async def benchmark_sleepy_no_custom(self):
         await asyncio.sleep(0.1)
+
+
+class TestPipelineBenchmark(BenchmarkTestCase):
+    """
+    Prompt -> reaction JSON -> USD -> upload, end to end, over the traffic in
+    the CHEMSIM_CASSETTE cassette. Run once with CHEMSIM_CASSETTE_MODE=record
+    on a networked machine, then replay offline with the recorded latency or
+    CHEMSIM_CASSETTE_LATENCY / CHEMSIM_CASSETTE_SCALE.
+    """
+
+    async def benchmark_pipeline_over_cassette(self):
+        if active_cassette() is None:
+            self.skipTest(f"set {CASSETTE_ENV} to a cassette to benchmark the pipeline")
+        from heptre.chem_sim_reactor.gpt_utils import query_gpt_and_store_if_missing_async
+        from heptre.chem_sim_reactor.usd_writer import write_usd_from_reaction
+
+        generate, build = [], []
+        with tempfile.TemporaryDirectory() as tmp:
+            for prompt in PIPELINE_PROMPTS:
+                t0 = time.perf_counter()
+                js = await query_gpt_and_store_if_missing_async(prompt)
+                t1 = time.perf_counter()
+                write_usd_from_reaction(js, tmp, source_file_name=f"{prompt.replace(' ', '_')}.json")
+                t2 = time.perf_counter()
+                generate.append((t1 - t0) * 1000)
+                build.append((t2 - t1) * 1000)
+        self.set_metric_sample_array(name="generate", values=generate, unit="ms")
+        self.set_metric_sample_array(name="usd_and_upload", values=build, unit="ms")
+        active_cassette().save()
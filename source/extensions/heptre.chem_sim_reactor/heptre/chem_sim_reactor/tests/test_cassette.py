@@ -0,0 +1,146 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: LicenseRef-NvidiaProprietary
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+
+
+
+import os
+import tempfile
+import time
+
+import omni.kit.test
+
+from heptre.chem_sim_reactor.cassette import (Cassette, CassetteBucket, CassetteRef, CassetteTransport,
+                                              parse_latency)
+from heptre.chem_sim_reactor.llm_client import LLMClient, LLMError
+
+
+class LiveTransport:
+    """Stands in for OpenAI while recording; counts the calls that reach it."""
+    def __init__(self):
+        self.calls = 0
+
+    async def __call__(self, request):
+        self.calls += 1
+        return "reply to " + request["messages"][-1]["content"]
+
+    async def stream(self, request):
+        self.calls += 1
+        for word in ("streamed ", "reply ", "to ", request["messages"][-1]["content"]):
+            yield word
+
+
+class LiveRef:
+    def __init__(self, store, path=""):
+        self.store, self.path = store, path
+
+    def child(self, key):
+        return LiveRef(self.store, f"{self.path}/{key}".strip("/"))
+
+    def get(self):
+        return self.store.get(self.path)
+
+    def set(self, value):
+        self.store[self.path] = value
+
+
+class LiveBlob:
+    def __init__(self, path):
+        self.path, self.public_url = path, None
+
+    def upload_from_filename(self, filename):
+        pass
+
+    def make_public(self):
+        self.public_url = f"https://cdn.example/{self.path}"
+
+
+class LiveBucket:
+    name = "bucket"
+
+    def blob(self, path):
+        return LiveBlob(path)
+
+    def exists(self):
+        return True
+
+
+class TestCassette(omni.kit.test.AsyncTestCase):
+    async def test_llm_replays_offline_with_simulated_latency(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "run.json")
+            live = LiveTransport()
+            recorder = Cassette(path, "record")
+            client = LLMClient(CassetteTransport(recorder, live))
+            self.assertEqual(await client.complete("ethanol"), "reply to ethanol")
+            self.assertEqual("".join([d async for d in client.stream("water")]), "streamed reply to water")
+            recorder.save()
+
+            player = Cassette(path, "replay", latency=0.05)
+            client = LLMClient(CassetteTransport(player))
+            t0 = time.perf_counter()
+            self.assertEqual(await client.complete("ethanol"), "reply to ethanol")
+            self.assertGreaterEqual(time.perf_counter() - t0, 0.05)
+            self.assertEqual([d async for d in client.stream("water")], ["streamed ", "reply ", "to ", "water"])
+            self.assertEqual(live.calls, 2)                  # nothing reached the live transport
+            with self.assertRaises(LLMError):
+                await client.complete("never recorded")
+            self.assertEqual((player.hits, player.misses), (2, 1))
+
+    async def test_rtdb_reads_replay_in_order_and_see_writes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "run.json")
+            recorder = Cassette(path, "record")
+            reactions = CassetteRef(recorder, "reactions", LiveRef({}, "reactions"))
+            self.assertIsNone(reactions.child("r1").get())
+            reactions.child("r1").set({"prompt": "ethanol"})
+            self.assertEqual(reactions.child("r1").get(), {"prompt": "ethanol"})
+            recorder.save()
+
+            player = Cassette(path, "replay", scale=0)
+            reactions = CassetteRef(player, "reactions")
+            self.assertIsNone(reactions.child("r1").get())
+            self.assertEqual(reactions.child("r1").get(), {"prompt": "ethanol"})
+            self.assertEqual(reactions.child("r1").get(), {"prompt": "ethanol"})   # last read repeats
+            reactions.child("r2").set({"prompt": "water", "products": {"p": 1}})
+            self.assertEqual(reactions.child("r2").child("products").get(), {"p": 1})
+            self.assertIsNone(reactions.child("r3").get())
+            self.assertEqual(player.misses, 1)
+
+    async def test_storage_upload_replays_its_url(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "run.json")
+            recorder = Cassette(path, "record")
+            blob = CassetteBucket(recorder, LiveBucket()).blob("animations/r1/anim.usd")
+            blob.upload_from_filename(path)
+            blob.make_public()
+            self.assertEqual(blob.public_url, "https://cdn.example/animations/r1/anim.usd")
+            recorder.save()
+
+            bucket = CassetteBucket(Cassette(path, "replay"), name="offline")
+            blob = bucket.blob("animations/r1/anim.usd")
+            blob.upload_from_filename(path)
+            blob.make_public()
+            self.assertEqual(blob.public_url, "https://cdn.example/animations/r1/anim.usd")
+            other = bucket.blob("animations/r2/anim.usd")
+            other.make_public()
+            self.assertTrue(other.public_url.endswith("/offline/animations/r2/anim.usd"))
+
+    async def test_latency_settings(self):
+        self.assertEqual(parse_latency(None), "recorded")
+        self.assertEqual(parse_latency("0.2"), 0.2)
+        self.assertEqual(parse_latency("llm=2, storage=0.5"), {"llm": 2.0, "storage": 0.5})
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "run.json")
+            Cassette(path, "record").save()
+            cassette = Cassette(path, latency={"llm": 2.0}, scale=0.5)
+            self.assertEqual(cassette.delay("llm", 9.0), 1.0)
+            self.assertEqual(cassette.delay("rtdb", 0.3), 0.15)
+            with self.assertRaises(FileNotFoundError):
+                Cassette(os.path.join(tmp, "missing.json"))
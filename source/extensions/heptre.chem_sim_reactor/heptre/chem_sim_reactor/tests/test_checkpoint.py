@@ -0,0 +1,95 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: LicenseRef-NvidiaProprietary
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+
+
+import os
+import tempfile
+
+import numpy as np
+import omni.kit.test
+
+from heptre.chem_sim_reactor.checkpoint import (
+    ALIGN, Checkpointer, latest_checkpoint, list_checkpoints, load_checkpoint, read_checkpoint, save_checkpoint,
+)
+from heptre.chem_sim_reactor.particles import CollisionReaction, ParticleSystem
+from heptre.chem_sim_reactor.thermostats import LangevinThermostat
+
+from .test_md import _water_box
+
+
+def _reacting_gas(seed=0):
+    ps = ParticleSystem(["A", "B", "C"], 20.0, radius=0.3, mode="ballistic", seed=seed,
+                        thermostat=LangevinThermostat(350.0, tau=2.0, seed=seed))
+    ps.add("A", 1500)
+    ps.add("B", 1500)
+    ps.add_reaction(CollisionReaction("A", "B", ["C"], Ea=2000.0))
+    return ps
+
+
+class TestCheckpoint(omni.kit.test.AsyncTestCase):
+    async def test_arrays_are_aligned_memory_maps(self):
+        ps = _reacting_gas()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = save_checkpoint(os.path.join(tmp, "gas.ckpt"), ps)
+            meta, arrays = read_checkpoint(path)
+            self.assertEqual(meta["engine"], "particles")
+            self.assertEqual(meta["reactions"][0]["products"], ["C"])
+            for name, a in arrays.items():
+                self.assertIsInstance(a.base, np.memmap, msg=name)
+                self.assertEqual(a.ctypes.data % ALIGN, 0, msg=name)
+            np.testing.assert_array_equal(arrays["pos"], ps.pos)
+            del arrays
+            self.assertEqual([p for p in os.listdir(tmp)], ["gas.ckpt"])      # no temp files left behind
+
+    async def test_particle_resume_is_exact(self):
+        ps = _reacting_gas()
+        for _ in range(10):
+            ps.step(0.5)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = save_checkpoint(os.path.join(tmp, "gas.ckpt"), ps)
+            resumed = load_checkpoint(path)
+        for _ in range(20):
+            ps.step(0.5)
+            resumed.step(0.5)
+        self.assertGreater(ps.n_reacted, 0)
+        self.assertEqual(resumed.n_steps, ps.n_steps)
+        self.assertEqual(resumed.n_reacted, ps.n_reacted)
+        for name in ("pos", "vel", "species", "ids"):
+            np.testing.assert_array_equal(getattr(resumed, name), getattr(ps, name), err_msg=name)
+
+    async def test_md_resume_is_exact(self):
+        s = _water_box(n_side=3, spacing=5.0)
+        s.thermostat = LangevinThermostat(350.0, tau=25.0, seed=1)
+        s.step(50)
+        with tempfile.TemporaryDirectory() as tmp:
+            resumed = load_checkpoint(save_checkpoint(os.path.join(tmp, "md.ckpt"), s))
+        s.step(100)
+        resumed.step(100)
+        self.assertEqual(resumed.n_rebuilds, s.n_rebuilds)
+        np.testing.assert_array_equal(resumed.x, s.x)
+        np.testing.assert_array_equal(resumed.v, s.v)
+
+    async def test_checkpointer_writes_in_background_and_rotates(self):
+        ps = _reacting_gas()
+        with tempfile.TemporaryDirectory() as tmp:
+            ckpt = Checkpointer(tmp, every=5, keep=2)
+            saved = {}
+            for _ in range(30):
+                ps.step(0.5)
+                if ckpt.maybe(ps):
+                    saved[ps.n_steps] = ps.pos.copy()
+            self.assertTrue(ckpt.flush(10.0))
+            ckpt.close()
+            self.assertIsNone(ckpt.error)
+            self.assertEqual(ckpt.written + ckpt.skipped, 6)
+            paths = list_checkpoints(tmp)
+            self.assertEqual(len(paths), 2)
+            latest = load_checkpoint(latest_checkpoint(tmp))
+            np.testing.assert_array_equal(latest.pos, saved[latest.n_steps])
@@ -0,0 +1,62 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: LicenseRef-NvidiaProprietary
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+
+
+import numpy as np
+import omni.kit.test
+
+from heptre.chem_sim_reactor.domain import SlabDecomposition, slab_members
+from heptre.chem_sim_reactor.particles import CollisionReaction, ParticleSystem
+
+from .test_md import _water_box
+
+
+class TestSlabDecomposition(omni.kit.test.AsyncTestCase):
+    async def test_slabs_partition_the_box(self):
+        x = np.random.default_rng(0).uniform(0.0, 30.0, 5000).astype(np.float32)
+        owned = [slab_members(x, 30.0, 4, r, 2.0)[0] for r in range(4)]
+        self.assertEqual(sorted(np.concatenate(owned).tolist()), list(range(5000)))
+        _, ghost = slab_members(x, 30.0, 4, 0, 2.0)
+        self.assertTrue(np.all((x[ghost] < 9.5) | (x[ghost] >= 28.0)))
+
+    async def test_md_matches_serial(self):
+        serial, shared = _water_box(n_side=6), _water_box(n_side=6)
+        serial.step(40)
+        with SlabDecomposition(shared, n_workers=3) as run:
+            run.step(40)
+        self.assertLess(np.abs(serial.x - shared.x).max(), 1e-3)
+        self.assertAlmostEqual(shared.potential, serial.potential, delta=1e-3 * abs(serial.potential))
+        self.assertEqual(shared.n_steps, 40)
+
+    async def test_particle_reactions_conserve_mass(self):
+        ps = ParticleSystem(["A", "B", "C"], 20.0, seed=0)
+        ps.add("A", 2000)
+        ps.add("B", 2000)
+        ps.add_reaction(CollisionReaction("A", "B", ["C"]))
+        with SlabDecomposition(ps, n_workers=2, seed=0) as run:
+            fired = sum(run.step(1, dt=10.0) for _ in range(10))
+        a, b, c = ps.counts()
+        self.assertGreater(fired, 0)
+        self.assertEqual((a + c, b + c, c), (2000, 2000, fired))
+        self.assertEqual(len(np.unique(ps.ids[:ps.n_particles])), ps.n_particles)
+
+    async def test_every_particle_moves_exactly_once_per_step(self):
+        # fast ballistic particles cross slab faces every step; a particle claimed by
+        # the slab it just entered would be displaced twice, an unclaimed one not at all
+        ps = ParticleSystem(["A"], 12.0, mode="ballistic", temperature_k=3000.0, seed=1)
+        ps.add("A", 3000)
+        dt = 2.0
+        with SlabDecomposition(ps, n_workers=4, seed=1) as run:
+            for _ in range(5):
+                expected = np.mod(ps.pos + ps.vel * np.float32(dt), np.float32(ps.box))
+                expected[expected >= ps.box] = 0.0
+                run.step(1, dt=dt)
+                moved = np.abs(ps.pos - expected)
+                self.assertLess(np.minimum(moved, ps.box - moved).max(), 1e-3)
@@ -0,0 +1,97 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: LicenseRef-NvidiaProprietary
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+
+
+import time
+
+import numpy as np
+import omni.kit.test
+
+from heptre.chem_sim_reactor.equilibrium import EquilibriumProblem, GibbsSolver, equilibrium_composition
+from heptre.chem_sim_reactor.kinetics import ReactionConditions
+
+
+class TestEquilibrium(omni.kit.test.AsyncTestCase):
+    async def test_dinitrogen_tetroxide_matches_kp(self):
+        js = {"reaction": "N2O4 ⇌ 2NO2"}
+        problem = EquilibriumProblem.from_reaction(js)
+        self.assertEqual(problem.elements, ["N"])          # O is dependent on N in both species
+        for temperature_c, pressure in ((25.0, 1.0), (80.0, 1.0), (25.0, 8.0)):
+            conditions = ReactionConditions(temperature_c=temperature_c, pressure_atm=pressure)
+            x = equilibrium_composition(js, conditions)
+            T = conditions.temperature_k
+            dG = problem.g0_rt(T) @ np.array([-1.0, 2.0])
+            self.assertAlmostEqual(x["NO2"] ** 2 * pressure / x["N2O4"], np.exp(-dG), delta=1e-6 * np.exp(-dG))
+
+    async def test_le_chatelier_and_element_balance(self):
+        js = {"reaction": "N2 + 3H2 → 2NH3"}
+        solver = GibbsSolver(EquilibriumProblem.from_reaction(js))
+        low = equilibrium_composition(js, ReactionConditions(temperature_c=100.0, pressure_atm=1.0), solver)
+        high = equilibrium_composition(js, ReactionConditions(temperature_c=100.0, pressure_atm=10.0), solver)
+        self.assertGreater(high["NH3"], low["NH3"])
+
+        problem = solver.problem
+        n0 = problem.initial_amounts(ReactionConditions())
+        n = solver.solve(n0, 350.0, 2.0)
+        np.testing.assert_allclose(problem.A @ n, problem.A @ n0, rtol=1e-9)
+        self.assertTrue(solver.converged)
+
+    async def test_reaction_run_to_completion(self):
+        # the reactants fall to ~1e-40, leaving C, H and O on acetic acid and water alone
+        js = {"reaction": "CH3CH2OH + O2 -> CH3COOH + H2O"}
+        solver = GibbsSolver(EquilibriumProblem.from_reaction(js))
+        problem = solver.problem
+        for conditions in (ReactionConditions(), ReactionConditions(temperature_c=500.0, pressure_atm=5.0)):
+            x = equilibrium_composition(js, conditions, solver)
+            self.assertTrue(solver.converged)
+            self.assertAlmostEqual(x["CH3COOH"], 0.5, places=9)
+            self.assertAlmostEqual(x["H2O"], 0.5, places=9)
+            dG = problem.g0_rt(conditions.temperature_k) @ np.array([-1.0, -1.0, 1.0, 1.0])
+            self.assertAlmostEqual(np.log(x["CH3COOH"] * x["H2O"] / (x["CH3CH2OH"] * x["O2"])), -dG, delta=1e-6)
+            n0 = problem.initial_amounts(conditions)
+            n = solver.solve(n0, conditions.temperature_k, conditions.pressure_atm, warm=False)
+            np.testing.assert_allclose(problem.A @ n, problem.A @ n0, rtol=1e-9)
+
+    async def test_warm_start_fits_in_a_frame(self):
+        js = {"reaction": "CO + H2O → CO2 + H2"}
+        solver = GibbsSolver(EquilibriumProblem.from_reaction(js))
+        conditions = ReactionConditions()
+        equilibrium_composition(js, conditions, solver)
+        cold = solver.iterations
+        worst = 0.0
+        for temperature_c in np.linspace(25.0, 35.0, 11):              # a slider drag
+            conditions.temperature_c = temperature_c
+            t0 = time.perf_counter()
+            equilibrium_composition(js, conditions, solver)
+            worst = max(worst, time.perf_counter() - t0)
+            self.assertLess(solver.iterations, cold)
+        self.assertLess(worst, 0.016)
+
+    async def test_batch_matches_single_solves(self):
+        js = {"reaction": "H2 + I2 → 2HI", "thermo": {"HI": {"dHf": 26.5, "S": 206.6}}}
+        problem = EquilibriumProblem.from_reaction(js)
+        n0 = problem.initial_amounts(ReactionConditions())
+        T, P = np.array([300.0, 400.0, 500.0]), np.array([1.0, 2.0, 5.0])
+        batch = GibbsSolver(problem).solve_batch(n0, T, P, warm=False)
+        for k in range(3):
+            single = GibbsSolver(problem).solve(n0, T[k], P[k], warm=False)
+            np.testing.assert_allclose(batch[k], single, rtol=1e-8, atol=1e-14)
+
+    async def test_missing_thermo_uses_reaction_gibbs_energy(self):
+        js = {"reaction": "C2H6O + O2 → C2H4O2 + H2O", "thermo": {"dG": -10.0}}
+        problem = EquilibriumProblem.from_reaction(js)
+        dG = (problem.h0 - 298.15 * problem.s0) @ np.array([-1.0, -1.0, 1.0, 1.0])
+        self.assertNotAlmostEqual(dG / 1000.0, -10.0)                   # all four are tabulated
+        js = {"reaction": "C4H10O + O2 → C4H8O2 + H2O", "thermo": {"dG": -10.0}}
+        problem = EquilibriumProblem.from_reaction(js)
+        dG = (problem.h0 - 298.15 * problem.s0) @ np.array([-1.0, -1.0, 1.0, 1.0])
+        self.assertAlmostEqual(dG / 1000.0, -10.0)
+        with self.assertRaises(ValueError):
+            EquilibriumProblem.from_reaction({"reaction": "Ethanol + Oxygen → Water"})
@@ -0,0 +1,77 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: LicenseRef-NvidiaProprietary
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+
+
+
+import time
+
+import numpy as np
+import omni.kit.test
+
+from heptre.chem_sim_reactor.field import ReactionDiffusionGrid
+from heptre.chem_sim_reactor.kinetics import KineticsModel, ReactionConditions, reaction_from_json
+
+COMBUSTION = {"reaction": "C2H5OH + 3O2 → 2CO2 + 3H2O", "kinetics": {"A": 1e6, "Ea": 2e4}}
+
+
+class TestField(omni.kit.test.AsyncTestCase):
+    async def test_diffusion_conserves_mass_and_flattens(self):
+        model = KineticsModel([reaction_from_json({"reaction": "A → B", "kinetics": {"A": 0.0}})])
+        grid = ReactionDiffusionGrid(model, (16, 16, 16), spacing=1e-3)
+        grid.fill("A", 2.0, np.s_[:4, :, :4])
+        m0 = grid.total_moles()
+        spread0 = float(grid.c[0].std())
+        grid.step(grid.stable_dt() * 3.0, 40)                 # sub-steps past the stability limit
+        self.assertTrue(np.allclose(grid.total_moles(), m0, rtol=1e-5))
+        self.assertLess(float(grid.c[0].std()), spread0)
+        self.assertGreaterEqual(float(grid.c.min()), 0.0)
+
+    async def test_laplacian_of_constant_field_is_zero(self):
+        model = KineticsModel([reaction_from_json({"reaction": "A + B → C"})])
+        grid = ReactionDiffusionGrid(model, (8, 6, 4))
+        grid.c[:] = np.float32(0.7)
+        self.assertLess(float(np.abs(grid._laplacian()).max()), 1e-6)
+
+    async def test_reaction_front_follows_stoichiometry(self):
+        grid = ReactionDiffusionGrid.from_reaction(COMBUSTION, ReactionConditions(), n=16, spacing=0.128 / 16)
+        index = grid.model.index
+        m0 = grid.total_moles()
+        self.assertEqual(float(grid.c[index["CO2"]].max()), 0.0)
+        grid.step(grid.stable_dt(), 30)
+        m = grid.total_moles()
+        burned = m0[index["C2H5OH"]] - m[index["C2H5OH"]]
+        self.assertGreater(burned, 0.0)
+        self.assertAlmostEqual(m0[index["O2"]] - m[index["O2"]], 3 * burned, delta=1e-3 * 3 * burned)
+        self.assertAlmostEqual(m[index["CO2"]], 2 * burned, delta=1e-3 * 2 * burned)
+        self.assertAlmostEqual(m[index["H2O"]], 3 * burned, delta=1e-3 * 3 * burned)
+        # products sit at the mixing front, not in the far corners of either half
+        co2 = grid.c[index["CO2"]].mean(axis=(1, 2))
+        self.assertGreater(co2[7] + co2[8], co2[0] + co2[15])
+
+    async def test_downsample_and_frames(self):
+        grid = ReactionDiffusionGrid.from_reaction(COMBUSTION, n=16)
+        coarse = grid.downsample(4)
+        self.assertEqual(coarse.shape, (grid.model.n_species, 4, 4, 4))
+        self.assertTrue(np.allclose(coarse.sum(axis=(1, 2, 3)) * 64, grid.c.sum(axis=(1, 2, 3)), rtol=1e-5))
+        with self.assertRaises(ValueError):
+            grid.downsample(3)
+        frames = list(grid.frames(3, 2, grid.stable_dt(), factor=2))
+        self.assertEqual(len(frames), 3)
+        self.assertEqual(grid.n_steps, 4)
+
+    async def test_step_time(self):
+        grid = ReactionDiffusionGrid.from_reaction(COMBUSTION, n=64, spacing=0.128 / 64)
+        dt = grid.stable_dt()
+        grid.step(dt)
+        t0 = time.perf_counter()
+        grid.step(dt, 5)
+        per_step = (time.perf_counter() - t0) / 5
+        # 64³ x 4 species is ~30 ms a step on one core; leave room for slow CI machines
+        self.assertLess(per_step, 0.5)
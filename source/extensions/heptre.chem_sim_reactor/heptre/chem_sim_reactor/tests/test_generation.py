@@ -0,0 +1,98 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: LicenseRef-NvidiaProprietary
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+
+
+
+import json
+
+import omni.kit.test
+
+from heptre.chem_sim_reactor.generation import (
+    OUTLINE_MAX_TOKENS,
+    assemble_reaction,
+    match_structures,
+    outline_species,
+    parse_llm_json,
+    resolve_compounds,
+    structure_batches,
+    structure_max_tokens,
+)
+from heptre.chem_sim_reactor.network import formula_counts
+
+OUTLINE = {
+    "reaction": "C2H5OH + 3O2 → 2CO2 + 3H2O",
+    "reactants": [{"name": "Ethanol", "formula": "C2H5OH"}, {"name": "Oxygen", "formula": "O2"}],
+    "products": [{"name": "Carbon dioxide", "formula": "CO2"}, "H2O", {"name": "oxygen", "formula": "O2"}],
+}
+
+
+def _structure(name, formula):
+    elements = [e for e, n in formula_counts(formula).items() for _ in range(n)]
+    return {"name": name, "formula": formula, "atoms": [{"id": f"a{i}", "element": e} for i, e in enumerate(elements)],
+            "bonds": []}
+
+
+class TestGeneration(omni.kit.test.AsyncTestCase):
+    async def test_outline_species(self):
+        species = outline_species(parse_llm_json("```json\n" + json.dumps(OUTLINE) + "\n```"))
+        self.assertEqual([sp["name"] for sp in species], ["Ethanol", "Oxygen", "Carbon dioxide", "H2O"])
+        self.assertEqual([sp["role"] for sp in species], ["reactants", "reactants", "products", "products"])
+        self.assertEqual(species[3]["formula"], "H2O")
+
+    async def test_only_unknown_compounds_are_generated(self):
+        store = {
+            "Oxygen": _structure("Oxygen", "O2"),
+            "H2O": _structure("Water", "H2O"),
+            "Ethanol": _structure("Ethanol", "C3H8O"),     # wrong formula: regenerate
+            "Carbon dioxide": {"name": "Carbon dioxide"},     # no atoms: regenerate
+        }
+        lookups = []
+
+        def lookup(key):
+            lookups.append(key)
+            return store.get(key)
+
+        known, unknown = resolve_compounds(outline_species(OUTLINE), lookup)
+        self.assertEqual(sorted(known), ["H2O", "Oxygen"])
+        self.assertEqual([sp["name"] for sp in unknown], ["Ethanol", "Carbon dioxide"])
+        self.assertEqual(lookups[:2], ["Ethanol", "C2H5OH"])
+
+    async def test_batches_and_token_budget(self):
+        species = [{"name": f"S{i}", "formula": "C6H12O6"} for i in range(5)]          # 24 atoms each
+        batches = structure_batches(species, max_atoms=60)
+        self.assertEqual([len(b) for b in batches], [2, 2, 1])
+        self.assertEqual(structure_batches([{"name": "Big", "formula": "C60"}], max_atoms=10), [[{"name": "Big", "formula": "C60"}]])
+        # asking for CO2 alone costs a fraction of the old fixed 3500-token full-reaction request
+        self.assertLess(OUTLINE_MAX_TOKENS + structure_max_tokens([{"name": "Carbon dioxide", "formula": "CO2"}]), 1000)
+        self.assertLessEqual(structure_max_tokens(species), 3500)
+
+    async def test_match_and_assemble(self):
+        species = outline_species(OUTLINE)
+        unknown = [sp for sp in species if sp["name"] in ("Ethanol", "Carbon dioxide")]
+        reply = {"compounds": [_structure("ethanol", "C2H6O"), _structure("CO2 molecule", "CO2")]}
+        matched, missing = match_structures(unknown, reply)
+        self.assertEqual(missing, [])
+        self.assertEqual(len(matched["Carbon dioxide"]["atoms"]), 3)         # matched by formula
+
+        _, missing = match_structures(unknown, {"compounds": [_structure("Ethanol", "C2H6O")]})
+        self.assertEqual([sp["name"] for sp in missing], ["Carbon dioxide"])
+
+        # SMILES entries expand locally; one contradicting its formula counts as missing
+        reply = {"compounds": [{"name": "Ethanol", "formula": "C2H6O", "smiles": "CCO"},
+                               {"name": "Carbon dioxide", "formula": "CO2", "smiles": "C=O"}]}
+        from_smiles, missing = match_structures(unknown, reply)
+        self.assertEqual(len(from_smiles["Ethanol"]["atoms"]), 9)
+        self.assertEqual([sp["name"] for sp in missing], ["Carbon dioxide"])
+
+        structures = dict(matched, Oxygen=_structure("O2", "O2"), H2O=_structure("Water", "H2O"))
+        reactants, products = assemble_reaction(OUTLINE, species, structures)
+        self.assertEqual([m["name"] for m in reactants], ["Ethanol", "Oxygen"])
+        self.assertEqual([m["name"] for m in products], ["Carbon dioxide", "H2O"])
+        self.assertEqual(structures["Oxygen"]["name"], "O2")                  # stored structures untouched
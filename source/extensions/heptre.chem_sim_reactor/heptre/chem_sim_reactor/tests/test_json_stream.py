@@ -0,0 +1,101 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: LicenseRef-NvidiaProprietary
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+
+
+
+import json
+
+import omni.kit.test
+
+from heptre.chem_sim_reactor.json_stream import JSONObjectStream
+from heptre.chem_sim_reactor.llm_client import LLMClient, LLMError, RetryableError
+
+
+REPLY = "```json\n" + json.dumps({
+    "reaction": "CH4 + 2O2 → CO2 + 2H2O",
+    "reactants": [{"name": "Methane", "description": "braces { and \"quotes\" ]"}, {"name": "Oxygen"}],
+    "products": [{"name": "Water", "atoms": [{"id": "a1"}]}],
+    "notes": [{"name": "not streamed"}],
+}, indent=2) + "\n```"
+
+
+class StreamTransport:
+    """Streams `text` in `size`-character deltas; the first `fail_first` streams raise `error` after `fail_after` deltas."""
+    def __init__(self, text, size=5, fail_first=0, fail_after=0, error=RetryableError("connection reset")):
+        self.text = text
+        self.size = size
+        self.fail_first = fail_first
+        self.fail_after = fail_after
+        self.error = error
+        self.streams = 0
+
+    async def stream(self, request):
+        self.streams += 1
+        for n, i in enumerate(range(0, len(self.text), self.size)):
+            if self.streams <= self.fail_first and n == self.fail_after:
+                raise self.error
+            yield self.text[i:i + self.size]
+
+    async def __call__(self, request):
+        return self.text
+
+
+class TestJSONObjectStream(omni.kit.test.AsyncTestCase):
+    async def test_objects_arrive_as_they_close(self):
+        scanner = JSONObjectStream()
+        seen = []
+        for i in range(0, len(REPLY), 3):
+            for key, obj in scanner.feed(REPLY[i:i + 3]):
+                seen.append((key, obj["name"], len(scanner.text)))
+        self.assertEqual([s[:2] for s in seen],
+                         [("reactants", "Methane"), ("reactants", "Oxygen"), ("products", "Water")])
+        # each object is handed over before the document is finished
+        self.assertTrue(all(n < len(REPLY) for _, _, n in seen))
+        self.assertTrue(scanner.complete)
+
+    async def test_strings_and_nesting_do_not_confuse_it(self):
+        scanner = JSONObjectStream(("reactants",))
+        found = scanner.feed(REPLY)
+        self.assertEqual([obj["name"] for _, obj in found], ["Methane", "Oxygen"])
+        self.assertEqual(found[0][1]["description"], 'braces { and "quotes" ]')
+
+    async def test_truncated_reply_is_not_complete(self):
+        scanner = JSONObjectStream()
+        found = scanner.feed(REPLY[:REPLY.index("Water")])
+        self.assertEqual(len(found), 2)
+        self.assertFalse(scanner.complete)
+
+
+class TestLLMStream(omni.kit.test.AsyncTestCase):
+    async def test_streams_deltas(self):
+        client = LLMClient(StreamTransport(REPLY))
+        deltas = [d async for d in client.stream("methane")]
+        self.assertGreater(len(deltas), 10)
+        self.assertEqual("".join(deltas), REPLY)
+        self.assertEqual(client.in_flight, 0)
+
+    async def test_retries_only_before_first_delta(self):
+        transport = StreamTransport(REPLY, fail_first=1, fail_after=0)
+        client = LLMClient(transport, backoff=0.001)
+        self.assertEqual("".join([d async for d in client.stream("methane")]), REPLY)
+        self.assertEqual((transport.streams, client.retries), (2, 1))
+
+        transport = StreamTransport(REPLY, fail_first=1, fail_after=3)
+        client = LLMClient(transport, backoff=0.001)
+        with self.assertRaises(LLMError):
+            async for _ in client.stream("methane"):
+                pass
+        self.assertEqual((transport.streams, client.failures), (1, 1))
+
+    async def test_transport_without_stream_yields_whole_reply(self):
+        async def complete(request):
+            return REPLY
+        client = LLMClient(complete)
+        self.assertEqual([d async for d in client.stream("methane")], [REPLY])
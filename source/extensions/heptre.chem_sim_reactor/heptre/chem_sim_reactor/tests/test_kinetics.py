@@ -0,0 +1,120 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: LicenseRef-NvidiaProprietary
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+
+import numpy as np
+import omni.kit.test
+
+from heptre.chem_sim_reactor.kinetics import (
+    KineticsModel, Reaction, ReactionConditions, parse_equation, reaction_progress
+)
+from heptre.chem_sim_reactor.stiff_solver import integrate_stiff, integrate_to_steady_state
+from heptre.chem_sim_reactor.stochastic import StochasticSimulator, molecule_lifetimes
+
+
+def _robertson():
+    return KineticsModel([
+        Reaction({"A": 1}, {"B": 1}, A=0.04, Ea=0.0),
+        Reaction({"B": 2}, {"B": 1, "C": 1}, A=3.0e7, Ea=0.0),
+        Reaction({"B": 1, "C": 1}, {"A": 1, "C": 1}, A=1.0e4, Ea=0.0),
+    ])
+
+
+class TestKinetics(omni.kit.test.AsyncTestCase):
+    async def test_parse_equation(self):
+        reactants, products = parse_equation("C2H5OH + 3O2(g) → 2CO2 + 3H2O + energy")
+        self.assertEqual(reactants, {"C2H5OH": 1.0, "O2": 3.0})
+        self.assertEqual(products, {"CO2": 2.0, "H2O": 3.0})
+        for equation in ("H2 + 1/2 O2 -> H2O", "H2 + 1/2O2 -> H2O", "H2 + 0.5 O2 -> H2O"):
+            self.assertEqual(parse_equation(equation), ({"H2": 1.0, "O2": 0.5}, {"H2O": 1.0}))
+
+    async def test_first_order_decay_matches_analytic(self):
+        model = KineticsModel([Reaction({"A": 1}, {"B": 1}, A=2.0, Ea=0.0)])
+        _, C = model.integrate([1.0, 0.0], 1.0, 300.0, n_steps=100)
+        self.assertAlmostEqual(C[-1, 0], np.exp(-2.0), places=6)
+        self.assertAlmostEqual(C[-1].sum(), 1.0, places=9)
+
+    async def test_rates_vectorize_over_cells(self):
+        model = KineticsModel([Reaction({"A": 1, "B": 1}, {"C": 1}, A=1.0, Ea=0.0)])
+        k = model.rate_constants(300.0)
+        grid = np.random.default_rng(0).random((3, 5))
+        per_cell = np.stack([model.rhs(grid[:, i], k) for i in range(5)], axis=1)
+        np.testing.assert_allclose(model.rhs(grid, k), per_cell)
+
+    async def test_hotter_reacts_faster(self):
+        js = {"reaction": "A + B -> C"}
+        cold = reaction_progress(js, ReactionConditions(temperature_c=20), n_frames=25)
+        hot = reaction_progress(js, ReactionConditions(temperature_c=100), n_frames=25)
+        self.assertGreater(hot[12], cold[12])
+        self.assertEqual(cold[0], 0.0)
+
+
+class TestStiffSolver(omni.kit.test.AsyncTestCase):
+    async def test_jacobian_matches_finite_differences(self):
+        model = _robertson()
+        k = model.rate_constants(300.0)
+        c = np.array([0.5, 1e-3, 0.2])
+        eps = 1e-7
+        numeric = np.stack([
+            (model.rhs(c + eps * e, k) - model.rhs(c - eps * e, k)) / (2 * eps) for e in np.eye(3)
+        ], axis=1)
+        np.testing.assert_allclose(model.jacobian(c, k).toarray(), numeric, atol=1e-5)
+
+    async def test_robertson_reference_solution(self):
+        result = integrate_stiff(_robertson(), [1.0, 0.0, 0.0], 40.0, 300.0,
+                                 t_eval=[0.0, 40.0], rtol=1e-6, atol=1e-12)
+        np.testing.assert_allclose(result.final, [0.7158271, 9.185535e-6, 0.2841637], rtol=1e-4)
+        self.assertEqual(result.n_lu, result.n_steps + result.n_rejected)
+
+    async def test_steady_state_conserves_mass(self):
+        result = integrate_to_steady_state(_robertson(), [1.0, 0.0, 0.0], 300.0)
+        self.assertTrue(result.steady)
+        self.assertAlmostEqual(result.final.sum(), 1.0, places=8)
+
+
+class TestStochastic(omni.kit.test.AsyncTestCase):
+    async def test_exact_decay_mean(self):
+        model = KineticsModel([Reaction({"A": 1}, {"B": 1}, A=1.0, Ea=0.0)])
+        final = [StochasticSimulator(model, [100, 0], 300.0, seed=s).run(1.0, 3)[1][-1, 0]
+                 for s in range(200)]
+        self.assertAlmostEqual(np.mean(final) / (100 * np.exp(-1.0)), 1.0, delta=0.05)
+
+    async def test_tau_leaping_tracks_deterministic(self):
+        model = KineticsModel([Reaction({"A": 1, "B": 1}, {"C": 1}, A=1.0e4, Ea=0.0)])
+        volume = 1e-15
+        n0 = np.array([200000, 100000, 0])
+        sim = StochasticSimulator(model, n0, 300.0, volume_l=volume, seed=1)
+        _, X = sim.run(1.0, 5)
+        _, C = model.integrate(n0 / (6.02214076e23 * volume), 1.0, 300.0, n_steps=2000, n_out=5)
+        expected = C[-1] * 6.02214076e23 * volume
+        np.testing.assert_allclose(X[-1, [0, 2]], expected[[0, 2]], rtol=0.01)
+        self.assertEqual(X[-1, 0] - X[-1, 1], 100000)
+
+    async def test_fractional_coefficients_fire_whole_molecules(self):
+        model = KineticsModel([Reaction({"H2": 1, "O2": 0.5}, {"H2O": 1}, A=1.0e-2, Ea=0.0,
+                                        orders={"H2": 1.0})])
+        n0 = np.array([40, 40, 0])
+        sim = StochasticSimulator(model, n0, 300.0, volume_l=1e-21, seed=2)
+        _, X = sim.run(50.0, 3)
+        h2, o2, h2o = X[-1]
+        self.assertGreater(h2o, 0)
+        self.assertEqual(2 * (40 - o2), h2o)                # fires as 2H2 + O2 -> 2H2O
+        self.assertEqual(40 - h2, h2o)
+        with self.assertRaises(ValueError):
+            StochasticSimulator(KineticsModel([Reaction({"A": 0.37}, {"B": 1})]), [10, 0], 300.0)
+
+    async def test_lifetimes_follow_events(self):
+        model = KineticsModel([Reaction({"A": 2}, {"B": 1}, A=1.0e-3, Ea=0.0)])
+        sim = StochasticSimulator(model, [10, 0], 300.0, volume_l=1e-21, seed=4)
+        events = list(sim.events(5.0))
+        spans = molecule_lifetimes(model, [10, 0], events, 5.0)
+        self.assertEqual(len(spans["A"]), 10)
+        self.assertEqual(len(spans["B"]), len(events))
+        alive_a = sum(1 for _, t1 in spans["A"] if t1 >= 5.0)
+        self.assertEqual(alive_a, sim.x[0])
@@ -0,0 +1,129 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: LicenseRef-NvidiaProprietary
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+
+
+
+import asyncio
+import time
+
+import omni.kit.test
+
+from heptre.chem_sim_reactor.llm_client import LLMClient, LLMError, RetryableError, SingleFlight
+
+
+class FakeTransport:
+    """Answers after `latency` seconds; the first `fail_first` calls per prompt raise `error`."""
+    def __init__(self, latency=0.01, fail_first=0, error=RetryableError("429 rate limited")):
+        self.latency = latency
+        self.fail_first = fail_first
+        self.error = error
+        self.attempts = {}
+        self.in_flight = 0
+        self.peak = 0
+
+    async def __call__(self, request):
+        prompt = request["messages"][-1]["content"]
+        self.attempts[prompt] = self.attempts.get(prompt, 0) + 1
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+            if self.attempts[prompt] <= self.fail_first:
+                raise self.error
+            return f"reply to {prompt}"
+        finally:
+            self.in_flight -= 1
+
+
+class TestLLMClient(omni.kit.test.AsyncTestCase):
+    async def test_batch_runs_concurrently_within_limit(self):
+        transport = FakeTransport(latency=0.02)
+        client = LLMClient(transport, max_concurrency=8)
+        prompts = [f"reaction {i}" for i in range(200)]
+        t0 = time.perf_counter()
+        replies = await client.complete_many(prompts)
+        elapsed = time.perf_counter() - t0
+        self.assertEqual(replies, [f"reply to {p}" for p in prompts])
+        self.assertEqual(transport.peak, 8)
+        self.assertEqual(client.in_flight, 0)
+        # 25 waves of 20 ms when concurrent, 4 s if serial
+        self.assertLess(elapsed, 1.5)
+
+    async def test_retries_transient_errors_with_backoff(self):
+        transport = FakeTransport(fail_first=2)
+        client = LLMClient(transport, max_retries=3, backoff=0.01, seed=1)
+        self.assertEqual(await client.complete("ethanol combustion"), "reply to ethanol combustion")
+        self.assertEqual(client.calls, 3)
+        self.assertEqual(client.retries, 2)
+        for attempt in range(6):
+            self.assertLessEqual(client.backoff_delay(attempt), min(client.max_backoff, 0.01 * 2 ** attempt))
+
+    async def test_timeouts_retry_then_fail(self):
+        client = LLMClient(FakeTransport(latency=1.0), timeout=0.02, max_retries=2, backoff=0.001)
+        with self.assertRaises(LLMError):
+            await client.complete("slow")
+        self.assertEqual(client.calls, 3)
+        self.assertEqual(client.failures, 1)
+        self.assertEqual(client.in_flight, 0)
+
+    async def test_non_retryable_errors_fail_fast(self):
+        transport = FakeTransport(fail_first=5, error=ValueError("invalid api key"))
+        client = LLMClient(transport, max_retries=4, backoff=0.001)
+        results = await client.complete_many(["a", "b"])
+        self.assertTrue(all(isinstance(r, LLMError) for r in results))
+        self.assertEqual(client.calls, 2)
+
+    async def test_request_overrides(self):
+        client = LLMClient(FakeTransport(), model="m", max_tokens=10)
+        request = client.request("p", system="s", temperature=0.0)
+        self.assertEqual(request["model"], "m")
+        self.assertEqual(request["max_tokens"], 10)
+        self.assertEqual(request["temperature"], 0.0)
+        self.assertEqual(request["messages"][0], {"role": "system", "content": "s"})
+
+
+class TestSingleFlight(omni.kit.test.AsyncTestCase):
+    async def test_concurrent_duplicates_share_one_call(self):
+        transport = FakeTransport(latency=0.02)
+        client = LLMClient(transport)
+        flight = SingleFlight()
+
+        async def generate(key):
+            return await flight.do(key, lambda: client.complete(key))
+
+        keys = ["ethanol"] * 50 + ["methane"] * 20
+        results = await asyncio.gather(*(generate(k) for k in keys))
+        self.assertEqual(results, [f"reply to {k}" for k in keys])
+        self.assertEqual(client.calls, 2)
+        self.assertEqual((flight.started, flight.shared), (2, 68))
+        self.assertNotIn("ethanol", flight)
+        # finished keys are not cached: a later request runs again
+        await generate("ethanol")
+        self.assertEqual(client.calls, 3)
+
+    async def test_errors_reach_every_waiter_and_are_not_cached(self):
+        client = LLMClient(FakeTransport(fail_first=1, error=ValueError("bad request")))
+        flight = SingleFlight()
+        results = await asyncio.gather(*(flight.do("k", lambda: client.complete("k")) for _ in range(5)),
+                                       return_exceptions=True)
+        self.assertTrue(all(isinstance(r, LLMError) for r in results))
+        self.assertEqual(client.calls, 1)
+        self.assertEqual(await flight.do("k", lambda: client.complete("k")), "reply to k")
+
+    async def test_cancelled_waiter_does_not_cancel_shared_work(self):
+        client = LLMClient(FakeTransport(latency=0.05))
+        flight = SingleFlight()
+        first = asyncio.ensure_future(flight.do("k", lambda: client.complete("k")))
+        second = asyncio.ensure_future(flight.do("k", lambda: client.complete("k")))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        self.assertEqual(await second, "reply to k")
+        self.assertTrue(first.cancelled())
+        self.assertEqual(client.calls, 1)
@@ -0,0 +1,68 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: LicenseRef-NvidiaProprietary
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+
+
+import numpy as np
+import omni.kit.test
+
+from heptre.chem_sim_reactor.md import MDSystem
+
+
+def _water_box(n_side=4, spacing=4.0, seed=0):
+    rng = np.random.default_rng(seed)
+    elements, positions, bonds = [], [], []
+    for k in range(n_side ** 3):
+        centre = (np.array([k // n_side ** 2, (k // n_side) % n_side, k % n_side]) + 0.5) * spacing
+        o = len(elements)
+        elements += ["O", "H", "H"]
+        positions += [centre, centre + [0.96, 0.0, 0.0], centre + [-0.24, 0.93, 0.0]]
+        bonds += [(o, o + 1), (o, o + 2)]
+    positions = np.array(positions) + rng.normal(0.0, 0.02, (len(elements), 3))
+    molecule = np.repeat(np.arange(n_side ** 3), 3)
+    return MDSystem(elements, positions, bonds, n_side * spacing, molecule=molecule,
+                    cutoff=4.5, skin=0.8, dt=0.25, seed=seed)
+
+
+class TestMD(omni.kit.test.AsyncTestCase):
+    async def test_forces_match_finite_differences(self):
+        s = _water_box(n_side=3, spacing=5.0)
+        s.x = s.x.astype(np.float64)
+        f = s.compute_forces().astype(np.float64).copy()
+        h = 1e-4
+        for atom in (0, 1, 5):
+            for axis in range(3):
+                s.x[axis, atom] += h
+                s.compute_forces(); e_plus = s.potential
+                s.x[axis, atom] -= 2 * h
+                s.compute_forces(); e_minus = s.potential
+                s.x[axis, atom] += h
+                self.assertAlmostEqual(-(e_plus - e_minus) / (2 * h), f[axis, atom], delta=1e-2 * max(1.0, abs(f[axis, atom])))
+
+    async def test_verlet_list_covers_cutoff(self):
+        s = _water_box()
+        s.step(200)
+        listed = set(zip(s._pi.tolist(), s._pj.tolist()))
+        d = s.x.T[:, None] - s.x.T[None]
+        d -= s.box * np.round(d / s.box)
+        i, j = np.nonzero(np.triu((d ** 2).sum(-1) < s.cutoff ** 2, 1))
+        excluded = set(s._excluded.tolist())
+        n = s.n_atoms
+        missing = [(a, b) for a, b in zip(i.tolist(), j.tolist()) if a * n + b not in excluded and (a, b) not in listed]
+        self.assertEqual(missing, [])
+        self.assertLess(s.n_rebuilds, 200)
+
+    async def test_nve_energy_is_conserved(self):
+        s = _water_box()
+        s.minimize()
+        s.set_velocities(300.0)
+        s.compute_forces()
+        e0 = s.kinetic_energy() + s.potential
+        s.step(400)
+        self.assertLess(abs(s.kinetic_energy() + s.potential - e0), 0.01 * s.kinetic_energy())
@@ -0,0 +1,90 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: LicenseRef-NvidiaProprietary
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+
+
+import os
+import tempfile
+
+import numpy as np
+import omni.kit.test
+
+from heptre.chem_sim_reactor.network import ReactionNetwork, formula_counts, hill_formula, species_hash
+
+
+def _mol(name, heavy, bonds, hydrogens, order=None):
+    """Structure dict in the stored library format; hydrogens[k] H atoms hang off heavy atom k."""
+    order = order or list(range(len(heavy)))
+    atoms = [{"id": f"a{order[k] + 1}", "element": e} for k, e in enumerate(heavy)]
+    bond_list = [{"from_atom": f"a{order[a] + 1}", "to_atom": f"a{order[b] + 1}"} for a, b in bonds]
+    for k, n in enumerate(hydrogens):
+        for _ in range(n):
+            atoms.append({"id": f"h{len(atoms)}", "element": "H"})
+            bond_list.append({"from_atom": f"a{order[k] + 1}", "to_atom": atoms[-1]["id"]})
+    return {"name": name, "atoms": atoms, "bonds": bond_list}
+
+
+ETHANOL = _mol("Ethanol", ["C", "C", "O"], [(0, 1), (1, 2)], [3, 2, 1])
+DIMETHYL_ETHER = _mol("Dimethyl ether", ["C", "O", "C"], [(0, 1), (1, 2)], [3, 0, 3])
+ACETALDEHYDE = _mol("Acetaldehyde", ["C", "C", "O"], [(0, 1), (1, 2)], [3, 1, 0])
+ACETIC_ACID = _mol("Acetic acid", ["C", "C", "O", "O"], [(0, 1), (1, 2), (1, 3)], [3, 0, 0, 1])
+ETHYLENE = _mol("Ethylene", ["C", "C"], [(0, 1)], [2, 2])
+OXYGEN = _mol("Oxygen", ["O", "O"], [(0, 1)], [0, 0])
+WATER = _mol("Water", ["O"], [], [2])
+
+LIBRARY = {
+    "r1": {"reaction": "2C2H5OH + O2 → 2CH3CHO + 2H2O", "reactants": [ETHANOL, OXYGEN],
+           "products": [ACETALDEHYDE, WATER], "kinetics": {"A": 1.0e8, "Ea": 6.0e4}},
+    "r2": {"reaction": "2CH3CHO + O2 → 2CH3COOH", "reactants": [ACETALDEHYDE, OXYGEN], "products": [ACETIC_ACID]},
+    "r3": {"reaction": "C2H5OH → C2H4 + H2O", "reactants": [ETHANOL], "products": [ETHYLENE, WATER]},
+    "r4": {"reaction": "", "reactants": ["Methanol"], "products": ["Formaldehyde"]},
+}
+
+
+class TestNetwork(omni.kit.test.AsyncTestCase):
+    async def test_formulae(self):
+        self.assertEqual(formula_counts("C2H5OH"), {"C": 2, "H": 6, "O": 1})
+        self.assertEqual(formula_counts("Ca(OH)2"), {"Ca": 1, "O": 2, "H": 2})
+        self.assertEqual(formula_counts("CuSO4·5H2O"), {"Cu": 1, "S": 1, "O": 9, "H": 10})
+        self.assertIsNone(formula_counts("Ethanol"))
+        self.assertEqual(hill_formula({"O": 1, "H": 2}), "H2O")
+        self.assertEqual(hill_formula({"O": 2, "H": 4, "C": 2}), "C2H4O2")
+
+    async def test_species_hash_is_canonical(self):
+        shuffled = _mol("ethyl alcohol", ["C", "C", "O"], [(0, 1), (1, 2)], [3, 2, 1], order=[2, 0, 1])
+        self.assertEqual(species_hash(shuffled), species_hash(ETHANOL))
+        self.assertNotEqual(species_hash(DIMETHYL_ETHER), species_hash(ETHANOL))
+        self.assertTrue(species_hash(ETHANOL).startswith("C2H6O-"))
+
+    async def test_network_indexes(self):
+        net = ReactionNetwork.from_library(LIBRARY, {"Methanol": {"name": "Methanol", "formula": "CH3OH"}})
+        self.assertEqual(net.n_reactions, 4)
+        self.assertEqual(net.n_species, 8)              # ethanol, O2, acetaldehyde, water shared
+        self.assertEqual(sorted(net.reaction_ids[j] for j in net.consuming("ethanol")), ["r1", "r3"])
+        self.assertEqual(sorted(net.reaction_ids[j] for j in net.producing("H2O")), ["r1", "r3"])
+        self.assertEqual([net.reaction_ids[j] for j in net.producing("CH3COOH")], ["r2"])
+        self.assertEqual(net.find_species("C2H5OH"), net.find_species("Ethanol"))
+        self.assertEqual(net.reactant_stoich[net.find_species("Ethanol")[0], 0], 2.0)
+        self.assertEqual(net.Ea[0], 6.0e4)
+        with self.assertRaises(KeyError):
+            net.consuming("Benzene")
+
+    async def test_kinetics_model_and_round_trip(self):
+        net = ReactionNetwork.from_library(LIBRARY)
+        model = net.to_kinetics_model([0, 1])
+        self.assertEqual(model.n_reactions, 2)
+        self.assertEqual(model.n_species, 5)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "network.npz")
+            net.save(path)
+            loaded = ReactionNetwork.load(path)
+        self.assertEqual(loaded.reaction_ids, net.reaction_ids)
+        self.assertEqual([s.id for s in loaded.species], [s.id for s in net.species])
+        self.assertEqual((loaded.reactant_stoich != net.reactant_stoich).nnz, 0)
+        np.testing.assert_array_equal(loaded.consuming("acetaldehyde"), net.consuming("acetaldehyde"))
@@ -0,0 +1,70 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: LicenseRef-NvidiaProprietary
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+
+
+import numpy as np
+import omni.kit.test
+
+from heptre.chem_sim_reactor.particles import CollisionReaction, ParticleSystem
+
+
+def _brute_force_pairs(ps):
+    d = ps.pos[:, None] - ps.pos[None]
+    d -= ps.box * np.round(d / ps.box)
+    i, j = np.nonzero(np.triu((d ** 2).sum(-1) < ps.contact ** 2, 1))
+    return {frozenset(p) for p in zip(i.tolist(), j.tolist())}
+
+
+class TestParticles(omni.kit.test.AsyncTestCase):
+    async def test_cell_list_matches_brute_force(self):
+        ps = ParticleSystem(["A", "B", "C"], 8.0, radius=0.25, diffusion=[0.05] * 3, seed=3)
+        ps.add("A", 1500)
+        ps.add("B", 1500)
+        ps.add_reaction(CollisionReaction("A", "B", ["C"], Ea=3000.0))
+        for _ in range(5):
+            ps.step(1.0)
+            i, j = ps.candidate_pairs()
+            self.assertEqual({frozenset(p) for p in zip(i.tolist(), j.tolist())}, _brute_force_pairs(ps))
+
+    async def test_merge_conserves_reactant_atoms(self):
+        ps = ParticleSystem(["A", "B", "C"], 10.0, radius=0.3, diffusion=[0.05] * 3, seed=1)
+        ps.add("A", 2000)
+        ps.add("B", 1000)
+        ps.add_reaction(CollisionReaction("A", "B", ["C"]))
+        for _ in range(10):
+            ps.step(1.0)
+        a, b, c = ps.counts()
+        self.assertGreater(c, 0)
+        self.assertEqual(a + c, 2000)
+        self.assertEqual(b + c, 1000)
+        self.assertEqual(ps.n_particles, 3000 - c)
+        self.assertEqual(len(np.unique(ps.ids)), ps.n_particles)
+
+    async def test_each_particle_reacts_once_greedily(self):
+        # chain a-b-c-d: random-order greedy fires (a,b) and (c,d), or (b,c) alone when it comes first
+        outcomes = {}
+        for seed in range(300):
+            ps = ParticleSystem(["A", "B", "C", "D"], 10.0, seed=seed)
+            ps.add("A", 1)
+            ps.add("B", 1)
+            ps.add("A", 1)
+            ps.add("B", 1)
+            ps.add_reaction(CollisionReaction("A", "B", ["C", "D"], Ea=0.0))
+            fired = ps.collide(np.array([0, 1, 2]), np.array([1, 2, 3]))
+            reacted = tuple(bool(s >= 2) for s in ps.species)
+            self.assertEqual(sum(reacted), 2 * fired)
+            outcomes[reacted] = outcomes.get(reacted, 0) + 1
+        self.assertEqual(set(outcomes), {(True, True, True, True), (False, True, True, False)})
+        self.assertAlmostEqual(outcomes[(False, True, True, False)] / 300, 1 / 3, delta=0.08)
+
+    async def test_collision_probability_rises_with_temperature(self):
+        rx = CollisionReaction("A", "B", ["C"], Ea=2.0e4)
+        self.assertLess(rx.probability(280.0), rx.probability(360.0))
+        self.assertEqual(CollisionReaction("A", "B", ["C"], steric=5.0).probability(300.0), 1.0)
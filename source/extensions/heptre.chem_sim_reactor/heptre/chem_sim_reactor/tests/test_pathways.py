@@ -0,0 +1,74 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: LicenseRef-NvidiaProprietary
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+
+
+import time
+
+import numpy as np
+import omni.kit.test
+
+from heptre.chem_sim_reactor.network import ReactionNetwork
+from heptre.chem_sim_reactor.pathways import find_pathways, steps_to
+
+from .test_network import ACETALDEHYDE, ETHYLENE, LIBRARY, OXYGEN, _mol
+
+ETHYLENE_OXIDE = _mol("Ethylene oxide", ["C", "C", "O"], [(0, 1), (1, 2), (2, 0)], [2, 2, 0])
+
+
+def _library():
+    library = dict(LIBRARY)
+    # a longer but lower-barrier detour: ethanol -> ethylene -> ethylene oxide -> acetaldehyde
+    library["r5"] = {"reaction": "2C2H4 + O2 → 2C2H4O", "reactants": [ETHYLENE, OXYGEN],
+                     "products": [ETHYLENE_OXIDE], "kinetics": {"Ea": 2.0e4}}
+    library["r6"] = {"reaction": "C2H4O → CH3CHO", "reactants": [ETHYLENE_OXIDE],
+                     "products": [ACETALDEHYDE], "kinetics": {"Ea": 1.0e4}}
+    library["r3"] = dict(library["r3"], kinetics={"Ea": 1.0e4})
+    library["r1"] = dict(library["r1"], kinetics={"Ea": 1.2e5})
+    return library
+
+
+class TestPathways(omni.kit.test.AsyncTestCase):
+    async def test_fewest_steps(self):
+        net = ReactionNetwork.from_library(_library())
+        paths = find_pathways(net, "ethanol", "acetic acid", limit=5)
+        self.assertEqual([net.reaction_ids[j] for j in paths[0].reactions], ["r1", "r2"])
+        self.assertEqual(paths[0].cost, 2.0)
+        self.assertEqual([net.species[s].name for s in paths[1].species],
+                         ["Ethanol", "Ethylene", "Ethylene oxide", "Acetaldehyde", "Acetic acid"])
+        self.assertEqual([p.cost for p in paths], sorted(p.cost for p in paths))
+
+    async def test_activation_energy_cost_prefers_detour(self):
+        net = ReactionNetwork.from_library(_library())
+        best = find_pathways(net, "C2H5OH", "CH3COOH", cost="ea", limit=1)[0]
+        self.assertEqual([net.reaction_ids[j] for j in best.reactions], ["r3", "r5", "r6", "r2"])
+        self.assertAlmostEqual(best.cost, 10.0 + 20.0 + 10.0 + 50.0)
+
+    async def test_limits_and_unreachable(self):
+        net = ReactionNetwork.from_library(_library())
+        self.assertEqual(len(find_pathways(net, "ethanol", "acetic acid", limit=1)), 1)
+        self.assertEqual(find_pathways(net, "ethanol", "acetic acid", max_steps=1), [])
+        self.assertEqual(find_pathways(net, "acetic acid", "ethanol"), [])
+        avoided = find_pathways(net, "ethanol", "acetic acid", avoid=["ethylene"])
+        self.assertTrue(all(net.row("ethylene") not in p.species for p in avoided))
+        dist = steps_to(net, net.row("acetic acid"))
+        self.assertEqual(dist[net.row("ethanol")], 2.0)
+        self.assertTrue(np.isinf(dist[net.row("water")]))
+
+    async def test_scales_to_large_library(self):
+        rng = np.random.default_rng(0)
+        S, R = 3000, 30000
+        mols = [{"name": f"M{k}", "formula": f"C{k + 1}H4"} for k in range(S)]
+        library = {f"r{j}": {"reaction": "", "reactants": [mols[a] for a in rng.integers(0, S, 2)],
+                             "products": [mols[b] for b in rng.integers(0, S, 2)]} for j in range(R)}
+        net = ReactionNetwork.from_library(library)
+        t0 = time.perf_counter()
+        paths = find_pathways(net, "M0", "M1", limit=5)
+        self.assertLess(time.perf_counter() - t0, 0.5)
+        self.assertEqual(len(paths), 5)
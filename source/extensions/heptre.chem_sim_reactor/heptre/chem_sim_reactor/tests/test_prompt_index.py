@@ -0,0 +1,112 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: LicenseRef-NvidiaProprietary
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+
+
+
+import threading
+import time
+
+import omni.kit.test
+
+from heptre.chem_sim_reactor.prompt_index import PromptIndex, normalize_prompt, prompt_reaction_id
+
+
+class TestPromptIndex(omni.kit.test.AsyncTestCase):
+    async def test_normalization(self):
+        variants = ["Ethanol combustion", "ethanol  combustion", "Combustion of ethanol.", "ethanol combustion reaction"]
+        self.assertEqual({normalize_prompt(v) for v in variants}, {"combustion ethanol"})
+        self.assertEqual(len({prompt_reaction_id(v) for v in variants}), 1)
+        self.assertEqual(normalize_prompt("C₂H₅OH + 3O₂ → 2CO₂ + 3H₂O"),
+                         normalize_prompt("C2H5OH + 3 O2 -> 2 CO2 + 3 H2O"))
+        self.assertNotEqual(prompt_reaction_id("ethanol combustion"), prompt_reaction_id("methanol combustion"))
+
+    async def test_reverse_reaction_is_a_different_reaction(self):
+        self.assertNotEqual(prompt_reaction_id("2H2 + O2 -> 2H2O"), prompt_reaction_id("2H2O -> 2H2 + O2"))
+        self.assertNotEqual(prompt_reaction_id("ethanol to acetic acid"), prompt_reaction_id("acetic acid to ethanol"))
+        self.assertEqual(prompt_reaction_id("O2 + 2H2 → 2H2O"), prompt_reaction_id("2 H2 + O2 -> 2 H2O"))
+        index = PromptIndex.from_library({"fwd": {"prompt": "2H2 + O2 -> 2H2O"},
+                                          "ox": {"prompt": "ethanol to acetic acid"}})
+        self.assertIsNone(index.best("2H2O -> 2H2 + O2"))                # electrolysis
+        self.assertIsNone(index.best("acetic acid to ethanol"))          # reduction
+        self.assertEqual(index.best("ethanol into acetic acid"), "ox")
+
+    async def test_fuzzy_matches_prompts_and_equations(self):
+        index = PromptIndex.from_library({
+            "r1": {"prompt": "Ethanol combustion", "reaction": "C2H5OH + 3O2 → 2CO2 + 3H2O"},
+            "r2": {"prompt": "Methanol combustion"},
+            "r3": {"prompt": "Haber process ammonia synthesis", "reaction": "N2 + 3H2 → 2NH3"},
+            "bad": "not a reaction",
+        })
+        self.assertEqual(len(index), 5)
+        self.assertEqual(index.best("combustion of ethanol"), "r1")
+        self.assertEqual(index.best("C2H5OH + 3 O2 -> 2 CO2 + 3 H2O"), "r1")
+        self.assertEqual(index.best("ammonia synthesis by the Haber process"), "r3")
+        self.assertIsNone(index.best("Haber proces ammonia synthesis"))           # a typo is still a different word
+        self.assertEqual(index.search("Haber proces ammonia synthesis")[0][0], "r3")
+        self.assertIsNone(index.best("propanol combustion"))
+        hits = index.search("ethanol combution", threshold=0.5)
+        self.assertEqual([h[0] for h in hits], ["r1", "r2"])
+        self.assertGreater(hits[0][1], hits[1][1])
+
+    async def test_names_must_match_exactly(self):
+        index = PromptIndex.from_library({
+            "methanol": {"prompt": "esterification of acetic acid with methanol"},
+            "ethyl": {"prompt": "hydrolysis of ethyl acetate"},
+            "methyl": {"prompt": "saponification of methyl stearate"},
+        })
+        for query, near in (("esterification of acetic acid with ethanol", "methanol"),
+                            ("hydrolysis of methyl acetate", "ethyl"),
+                            ("saponification of ethyl stearate", "methyl")):
+            self.assertEqual(index.search(query)[0][0], near)                    # close in spelling...
+            self.assertIsNone(index.best(query))                                # ...but another ester
+        self.assertEqual(index.best("Hydrolysis of ethyl acetate."), "ethyl")
+
+    async def test_formulas_must_match_exactly(self):
+        index = PromptIndex(threshold=0.5)
+        index.add("ethane", "C2H6 combustion")
+        self.assertEqual(index.best("c2h6 combustion!"), "ethane")
+        self.assertIsNone(index.best("C3H8 combustion"))
+        self.assertIsNone(index.best("C2H6 + O2 combustion"))
+
+    async def test_search_scales(self):
+        index = PromptIndex()
+        for i in range(20000):
+            index.add(f"r{i}", f"compound{i} oxidation with reagent{i % 97}")
+        self.assertEqual(index.best("oxidation of compound12345 with reagent26"), "r12345")
+        t0 = time.perf_counter()
+        for _ in range(20):
+            index.search("compound777 oxidation reagent1")
+        # one bincount over the posting lists, ~ms for 20k prompts
+        self.assertLess((time.perf_counter() - t0) / 20, 0.05)
+
+    async def test_concurrent_add_and_search(self):
+        index = PromptIndex()
+        errors = []
+
+        def writer(k):
+            for i in range(2000):
+                index.add(f"w{k}-{i}", f"compound{k}x{i} oxidation with reagent{i % 13}")
+
+        def reader():
+            try:
+                for i in range(300):
+                    index.search(f"compound0x{i} oxidation reagent{i % 13}")
+            except Exception as e:               # e.g. bincount shorter than the size list
+                errors.append(e)
+
+        threads = [threading.Thread(target=writer, args=(k,)) for k in range(2)]
+        threads += [threading.Thread(target=reader) for _ in range(2)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(len(index), 4000)
+        self.assertEqual(index.best("compound1x1234 oxidation with reagent12"), "w1-1234")
@@ -0,0 +1,68 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: LicenseRef-NvidiaProprietary
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+
+
+
+import os
+import tempfile
+
+import omni.kit.test
+
+from heptre.chem_sim_reactor import raw_log
+from heptre.chem_sim_reactor.raw_log import SegmentLog
+
+
+class TestSegmentLog(omni.kit.test.AsyncTestCase):
+    async def test_round_trip_and_index(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            log = SegmentLog(tmp, codec="gz")
+            reply = '{"reaction": "C2H5OH + 3O2 → 2CO2 + 3H2O", "reactants": []}' * 20
+            first = log.append("r1", "outline", reply, prompt="ethanol combustion", ts=100.0)
+            log.append("r2", "outline", "{}", ts=200.0)
+            log.append("r1", "structures 0", '{"compounds": []}', ts=300.0)
+            self.assertEqual(log.read(first), reply)
+            self.assertEqual([r["label"] for r in log.find("r1")], ["structures 0", "outline"])
+            self.assertEqual([r["reaction_id"] for r in log.find(since=150.0, until=300.0)], ["r2"])
+            self.assertEqual(log.latest("r1", "outline"), reply)
+            self.assertIsNone(log.latest("r3"))
+            # one file for all three, smaller than the text it holds
+            segments = [n for n in os.listdir(tmp) if n.startswith("segment-")]
+            self.assertEqual(segments, ["segment-000001.gz"])
+            self.assertLess(os.path.getsize(os.path.join(tmp, segments[0])), len(reply))
+            log.close()
+
+            reopened = SegmentLog(tmp, codec="gz")
+            self.assertEqual(reopened.latest("r1", "outline"), reply)
+            reopened.close()
+
+    async def test_rotation_drops_oldest_segments(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            log = SegmentLog(tmp, max_segment_bytes=200, max_segments=3, codec="gz")
+            ids = [log.append(f"r{i}", "outline", os.urandom(60).hex()) for i in range(12)]
+            segments = sorted(n for n in os.listdir(tmp) if n.startswith("segment-"))
+            self.assertEqual(len(segments), 3)
+            self.assertTrue(all(os.path.getsize(os.path.join(tmp, n)) <= 200 for n in segments))
+            self.assertEqual(len(log.read(ids[-1])), 120)
+            with self.assertRaises(KeyError):
+                log.read(ids[0])                      # pruned with its segment
+            self.assertEqual({r["segment"] for r in log.find()}, set(segments))
+            log.close()
+
+    async def test_codec_choice(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            if raw_log.zstandard is None:
+                self.assertEqual(SegmentLog(tmp).codec, "gz")
+                with self.assertRaises(ValueError):
+                    SegmentLog(tmp, codec="zst")
+            else:
+                log = SegmentLog(tmp)
+                self.assertEqual(log.codec, "zst")
+                self.assertEqual(log.read(log.append("r1", "outline", "x" * 1000)), "x" * 1000)
+                log.close()
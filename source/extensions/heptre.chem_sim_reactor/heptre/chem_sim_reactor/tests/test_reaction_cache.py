@@ -0,0 +1,105 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: LicenseRef-NvidiaProprietary
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+
+
+
+import os
+import tempfile
+import time
+
+import omni.kit.test
+
+from heptre.chem_sim_reactor.reaction_cache import LRUCache, SQLiteStore, TieredReactionCache
+
+
+class FakeRemote:
+    """Firebase RTDB reference stand-in counting round trips."""
+    def __init__(self, data=None):
+        self.data = dict(data or {})
+        self.gets = 0
+        self.sets = 0
+
+    def child(self, key):
+        remote = self
+
+        class _Ref:
+            def get(self):
+                remote.gets += 1
+                return remote.data.get(key)
+
+            def set(self, value):
+                remote.sets += 1
+                remote.data[key] = value
+        return _Ref()
+
+
+ETHANOL = {"prompt": "Ethanol combustion", "reaction": "C2H5OH + 3O2 → 2CO2 + 3H2O", "reactants": [], "products": []}
+
+
+class TestReactionCache(omni.kit.test.AsyncTestCase):
+    async def test_lru_capacity_and_ttl(self):
+        now = [0.0]
+        lru = LRUCache(capacity=2, ttl=10.0, clock=lambda: now[0])
+        lru.put("a", 1)
+        lru.put("b", 2)
+        self.assertEqual(lru.get("a"), 1)          # a is now most recent
+        lru.put("c", 3)
+        self.assertIsNone(lru.get("b"))
+        self.assertEqual((lru.get("a"), lru.get("c")), (1, 3))
+        now[0] = 10.5
+        self.assertIsNone(lru.get("a"))
+        self.assertEqual(len(lru), 1)
+        self.assertEqual((lru.hits, lru.misses), (3, 2))
+
+    async def test_sqlite_persists_and_finds_by_prompt(self):
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "cache", "reactions.sqlite")
+            store = SQLiteStore(path)
+            store.put_many({"r1": ETHANOL, "r2": {"prompt": "Haber process"}, "junk": "not a dict"})
+            store.close()
+            store = SQLiteStore(path)
+            self.assertEqual(len(store), 2)
+            self.assertEqual(store.get("r1"), ETHANOL)
+            self.assertEqual(store.get_by_prompt("Ethanol combustion")[0], "r1")
+            self.assertEqual(store.get_by_prompt("combustion of ethanol")[0], "r1")
+            self.assertEqual(store.get_by_prompt("methane combustion"), (None, None))
+            store.delete("r1")
+            self.assertIsNone(store.get("r1"))
+            store.close()
+
+    async def test_tiers_fill_on_hit_and_write_through(self):
+        remote = FakeRemote({"r1": ETHANOL})
+        local = SQLiteStore(":memory:")
+        cache = TieredReactionCache(remote, local, LRUCache())
+        self.assertEqual(cache.get("r1"), ETHANOL)
+        self.assertEqual(cache.get("r1"), ETHANOL)
+        self.assertEqual(remote.gets, 1)
+        self.assertEqual(cache.hits, {"memory": 1, "local": 0, "remote": 1})
+
+        cache.memory.invalidate()
+        self.assertEqual(cache.get("r1"), ETHANOL)
+        self.assertEqual(cache.hits["local"], 1)
+
+        cache.put("r2", {"prompt": "Haber process", "reaction": "N2 + 3H2 → 2NH3"})
+        self.assertEqual((remote.sets, remote.data["r2"]["reaction"]), (1, "N2 + 3H2 → 2NH3"))
+        self.assertIsNotNone(local.get("r2"))
+        self.assertEqual(cache.get_by_prompt("the Haber process")[0], "r2")
+
+        self.assertIsNone(cache.get("missing"))
+        self.assertEqual((cache.misses, remote.gets), (1, 2))
+
+    async def test_memory_hits_take_microseconds(self):
+        cache = TieredReactionCache(FakeRemote({"r1": ETHANOL}), SQLiteStore(":memory:"), LRUCache())
+        cache.get("r1")
+        n = 10000
+        t0 = time.perf_counter()
+        for _ in range(n):
+            cache.get("r1")
+        self.assertLess((time.perf_counter() - t0) / n, 50e-6)
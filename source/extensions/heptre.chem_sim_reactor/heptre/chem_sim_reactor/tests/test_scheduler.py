@@ -0,0 +1,65 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: LicenseRef-NvidiaProprietary
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+
+
+import time
+
+import omni.kit.test
+
+from heptre.chem_sim_reactor.scheduler import FixedStepScheduler, SnapshotBuffer
+from heptre.chem_sim_reactor.particles import ParticleSystem
+
+
+class TestScheduler(omni.kit.test.AsyncTestCase):
+    async def test_buffer_returns_newest_complete_snapshot(self):
+        buf = SnapshotBuffer()
+        self.assertEqual(buf.latest(), (0, None))
+        for k in range(5):
+            buf.publish(("frame", k))
+        self.assertEqual(buf.latest(), (5, ("frame", 4)))
+
+    async def test_main_thread_applies_only_the_latest_snapshot(self):
+        ps = ParticleSystem(["A"], 10.0, seed=0)
+        ps.add("A", 500)
+        sched = FixedStepScheduler(lambda: ps.step(1.0), lambda: ps.time, realtime=False)
+        applied = []
+        sched.start()
+        try:
+            deadline = time.monotonic() + 5.0
+            while len(applied) < 3 and time.monotonic() < deadline:
+                sched.poll(applied.append)
+                time.sleep(0.01)                  # one "rendered frame"
+        finally:
+            sched.stop()
+        self.assertEqual(len(applied), 3)
+        self.assertEqual(applied, sorted(set(applied)))
+        self.assertGreater(sched.steps, len(applied))      # frames skip intermediate snapshots
+        sched.poll(applied.append)
+        self.assertFalse(sched.poll(applied.append))        # nothing new, nothing applied
+        self.assertEqual(applied[-1], ps.time)
+
+    async def test_fixed_tick_drops_instead_of_spiralling(self):
+        def slow():
+            time.sleep(0.05)
+        sched = FixedStepScheduler(slow, lambda: None, dt_wall=0.005, max_catch_up=2)
+        sched.start()
+        time.sleep(0.5)
+        sched.stop()
+        self.assertGreater(sched.dropped, sched.steps)
+
+    async def test_step_errors_surface_on_the_main_thread(self):
+        def boom():
+            raise ValueError("engine blew up")
+        sched = FixedStepScheduler(boom, lambda: None, realtime=False)
+        sched.start()
+        sched._thread.join(2.0)
+        self.assertFalse(sched.running)
+        with self.assertRaises(RuntimeError):
+            sched.poll(lambda s: None)
@@ -0,0 +1,71 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: LicenseRef-NvidiaProprietary
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+
+
+
+import omni.kit.test
+
+from heptre.chem_sim_reactor.network import species_hash
+from heptre.chem_sim_reactor.smiles import parse_smiles, smiles_to_dict
+
+
+class TestSmiles(omni.kit.test.AsyncTestCase):
+    async def test_formulas_with_implicit_hydrogens(self):
+        cases = {
+            "CCO": "C2H6O", "O=C=O": "CO2", "O": "H2O", "C#N": "CHN", "CC(C)(C)O": "C4H10O",
+            "CC(=O)O": "C2H4O2", "FC(F)(F)Cl": "CClF3", "O=S(=O)(O)O": "H2O4S", "C%10CC%10": "C3H6",
+            "c1ccccc1": "C6H6", "c1ccncc1": "C5H5N", "c1ccoc1": "C4H4O", "c1ccsc1": "C4H4S",
+            "c1cc[nH]c1": "C4H5N", "Cn1cccc1": "C5H7N", "c1ccc2ccccc2c1": "C10H8",
+            "CC(=O)Oc1ccccc1C(=O)O": "C9H8O4", "C[C@H](N)C(=O)O": "C3H7NO2",
+        }
+        for smiles, formula in cases.items():
+            self.assertEqual(parse_smiles(smiles).formula, formula, smiles)
+
+    async def test_atoms_bonds_and_orders(self):
+        mol = parse_smiles("O=C=O", name="Carbon dioxide")
+        self.assertEqual(mol.name, "Carbon dioxide")
+        self.assertEqual([a.id for a in mol.atoms], ["a1", "a2", "a3"])
+        self.assertEqual([b.order for b in mol.bonds], [2, 2])
+
+        benzene = parse_smiles("c1ccccc1")
+        ring = [b for b in benzene.bonds if b.order == 1.5]
+        self.assertEqual(len(ring), 6)
+        self.assertTrue(all(a.element == "H" for a in benzene.atoms[6:]))
+        # hydrogens come after the heavy atoms and hang off their parent
+        self.assertEqual({(b.from_atom, b.to_atom) for b in benzene.bonds if b.order == 1},
+                         {(f"a{k + 1}", f"a{k + 7}") for k in range(6)})
+
+    async def test_charges_and_fragments(self):
+        ammonium = parse_smiles("[NH4+]")
+        self.assertEqual((ammonium.formula, ammonium.atoms[0].charge), ("H4N", 1))
+        nitro = parse_smiles("C[N+](=O)[O-]")
+        self.assertEqual([a.charge for a in nitro.atoms[:4]], [0, 1, 0, -1])
+        salt = parse_smiles("[Na+].[Cl-]")
+        self.assertEqual((len(salt.atoms), len(salt.bonds)), (2, 0))
+        self.assertEqual(parse_smiles("[Fe+++]").atoms[0].charge, 3)
+        self.assertEqual(parse_smiles("[Fe+3]").atoms[0].charge, 3)
+        d = smiles_to_dict("[O-]C")
+        self.assertEqual(d["atoms"][0]["charge"], -1)
+        self.assertNotIn("charge", d["atoms"][1])
+        self.assertEqual(d["smiles"], "[O-]C")
+
+    async def test_malformed_input_raises(self):
+        for bad in ("", "C1CC", "C(C", "C)", "C=", "X", "[Qq]", "1C", "C11"):
+            with self.assertRaises(ValueError, msg=bad):
+                parse_smiles(bad)
+
+    async def test_species_identity_matches_spelled_out_structures(self):
+        self.assertEqual(species_hash(smiles_to_dict("OCC")), species_hash(smiles_to_dict("CCO")))
+        self.assertNotEqual(species_hash(smiles_to_dict("COC")), species_hash(smiles_to_dict("CCO")))
+        self.assertEqual(species_hash(smiles_to_dict("C1=CC=CC=C1")), species_hash(smiles_to_dict("c1ccccc1")))
+        # the same molecule as LLM JSON without bond orders
+        spelled = {"atoms": [{"id": "x", "element": "O"}, {"id": "y", "element": "C"}, {"id": "z", "element": "O"}],
+                   "bonds": [{"from_atom": "x", "to_atom": "y"}, {"from_atom": "y", "to_atom": "z"}]}
+        self.assertEqual(species_hash(spelled), species_hash(smiles_to_dict("O=C=O")))
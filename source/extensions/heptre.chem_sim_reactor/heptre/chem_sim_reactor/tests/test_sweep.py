@@ -0,0 +1,53 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: LicenseRef-NvidiaProprietary
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+
+
+import csv
+import os
+import tempfile
+
+import omni.kit.test
+
+from heptre.chem_sim_reactor.sweep import condition_grid, run_sweep, write_results_csv
+
+REACTION = {"reaction": "2 H2 + O2 -> 2 H2O", "kinetics": {"A": 1e8, "Ea": 60000}}
+
+
+class TestSweep(omni.kit.test.AsyncTestCase):
+    async def test_grid_runs_temperature_fastest(self):
+        grid = condition_grid([20, 60, 100], [1, 5], [0.5])
+        self.assertEqual(len(grid), 6)
+        self.assertEqual([c.temperature_c for c in grid[:3]], [20, 60, 100])
+        self.assertEqual([c.pressure_atm for c in grid], [1, 1, 1, 5, 5, 5])
+
+    async def test_yield_rises_with_temperature_and_is_cached(self):
+        grid = condition_grid([20, 60, 100])
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = os.path.join(tmp, "cache")
+            records = run_sweep(REACTION, grid, workers=2, cache_dir=cache)
+            yields = [r["yield"] for r in records]
+            self.assertEqual(yields, sorted(yields))
+            self.assertGreater(yields[-1], 10 * yields[0])
+            self.assertEqual(len(os.listdir(cache)), 3)
+
+            again = run_sweep(REACTION, grid, workers=1, cache_dir=cache)
+            self.assertEqual(again, records)
+
+            path = os.path.join(tmp, "sweep.csv")
+            write_results_csv(path, records)
+            with open(path) as f:
+                rows = list(csv.DictReader(f))
+            self.assertEqual(len(rows), 3)
+            self.assertNotIn("extent", rows[0])
+
+    async def test_stochastic_points_do_not_depend_on_the_grid(self):
+        alone = run_sweep(REACTION, condition_grid([100]), method="stochastic", n_molecules=400, workers=1)
+        inside = run_sweep(REACTION, condition_grid([60, 100]), method="stochastic", n_molecules=400, workers=1)
+        self.assertEqual(alone[0]["extent"], inside[1]["extent"])
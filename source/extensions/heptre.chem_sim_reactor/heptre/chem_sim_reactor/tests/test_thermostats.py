@@ -0,0 +1,54 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: LicenseRef-NvidiaProprietary
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+
+
+import numpy as np
+import omni.kit.test
+
+from heptre.chem_sim_reactor.kinetics import ReactionConditions
+from heptre.chem_sim_reactor.particles import ParticleSystem
+from heptre.chem_sim_reactor.thermostats import BerendsenBarostat, BerendsenThermostat, make_thermostat
+
+from .test_md import _water_box
+
+
+class TestThermostats(omni.kit.test.AsyncTestCase):
+    async def test_md_thermostats_reach_target(self):
+        for kind in ("berendsen", "langevin"):
+            s = _water_box(n_side=3, spacing=5.0)
+            s.thermostat = make_thermostat(kind, temperature_k=400.0, tau=25.0)
+            s.step(1000)
+            temps = []
+            for _ in range(20):
+                s.step(25)
+                temps.append(s.temperature())
+            self.assertAlmostEqual(np.mean(temps), 400.0, delta=40.0, msg=kind)
+
+    async def test_target_follows_conditions(self):
+        conditions = ReactionConditions(temperature_c=25.0)
+        ps = ParticleSystem(["A"], 20.0, mode="ballistic", seed=0,
+                            thermostat=BerendsenThermostat(conditions=conditions, tau=1.0))
+        ps.add("A", 2000)
+        for _ in range(20):
+            ps.step(0.5)
+        self.assertAlmostEqual(ps.temperature(), 298.15, delta=3.0)
+        conditions.temperature_c = 100.0                     # slider moved mid-run
+        for _ in range(20):
+            ps.step(0.5)
+        self.assertAlmostEqual(ps.temperature(), 373.15, delta=3.0)
+        self.assertEqual(ps.temperature_k, 373.15)
+
+    async def test_barostat_reaches_target_pressure(self):
+        ps = ParticleSystem(["A"], 20.0, seed=0, barostat=BerendsenBarostat(100.0, tau=5.0, compressibility=0.01))
+        ps.add("A", 2000)
+        for _ in range(200):
+            ps.step(0.5)
+        self.assertAlmostEqual(ps.pressure_atm(), 100.0, delta=1.0)
+        self.assertTrue(np.all(ps.pos < ps.box))
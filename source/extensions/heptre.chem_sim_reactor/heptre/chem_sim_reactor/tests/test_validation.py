@@ -0,0 +1,82 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: LicenseRef-NvidiaProprietary
+#
+# NVIDIA CORPORATION, its affiliates and licensors retain all intellectual
+# property and proprietary rights in and to this material, related
+# documentation and any modifications thereto. Any use, reproduction,
+# disclosure or distribution of this material and related documentation
+# without an express license agreement from NVIDIA CORPORATION or
+# its affiliates is strictly prohibited.
+
+
+
+import json
+
+import omni.kit.test
+
+from heptre.chem_sim_reactor.generation import correction_prompt, match_structures, parse_llm_json
+from heptre.chem_sim_reactor.json_repair import repair_json
+from heptre.chem_sim_reactor.smiles import smiles_to_dict
+from heptre.chem_sim_reactor.validation import check_structure
+
+
+class TestJSONRepair(omni.kit.test.AsyncTestCase):
+    async def test_fences_prose_and_trailing_commas(self):
+        reply = 'Sure! Here it is:\n```json\n{"reactants": [{"name": "Water",},], "reaction": "x",}\n```\nEnjoy.'
+        self.assertEqual(parse_llm_json(reply), {"reactants": [{"name": "Water"}], "reaction": "x"})
+        # a fence with no newline after the language tag (the old pattern matched a literal "\\n")
+        self.assertEqual(parse_llm_json('```json{"a": 1}```'), {"a": 1})
+
+    async def test_truncated_reply_keeps_complete_values(self):
+        full = json.dumps({"compounds": [{"name": "A", "smiles": "CCO"}, {"name": "B", "smiles": "O=C=O"}]})
+        cut = full[:full.index("O=C")]                      # stopped inside B's SMILES
+        self.assertEqual(json.loads(repair_json(cut)), {"compounds": [{"name": "A", "smiles": "CCO"}, {"name": "B"}]})
+        self.assertEqual(json.loads(repair_json('{"a": 1, "b": 2')), {"a": 1, "b": 2})
+        self.assertEqual(json.loads(repair_json('{"a": 1, "b"')), {"a": 1})
+        self.assertEqual(json.loads(repair_json('{"a": "two\nlines"}')), {"a": "two\nlines"})
+        # valid JSON passes through untouched
+        self.assertEqual(repair_json(full), full)
+
+    async def test_hopeless_reply_still_raises(self):
+        with self.assertRaises(ValueError):
+            parse_llm_json("I cannot help with that.")
+
+
+class TestStructureCheck(omni.kit.test.AsyncTestCase):
+    async def test_sound_structure_passes(self):
+        self.assertEqual(check_structure(smiles_to_dict("CCO", "Ethanol")), [])
+        self.assertEqual(check_structure(smiles_to_dict("c1ccccc1", "Benzene")), [])
+
+    async def test_problems_are_reported(self):
+        water = {"formula": "H2O", "atoms": [{"id": "o", "element": "O"}, {"id": "h1", "element": "H"},
+                                             {"id": "h2", "element": "H"}],
+                 "bonds": [{"from_atom": "o", "to_atom": "h1"}, {"from_atom": "o", "to_atom": "h3"}]}
+        problems = check_structure(water)
+        self.assertEqual(len(problems), 1)
+        self.assertIn("h3", problems[0])
+
+        methane = smiles_to_dict("C", "Methane")
+        methane["bonds"].append({"from_atom": "a2", "to_atom": "a3"})          # H-H on top of C-H
+        problems = check_structure(methane, "CH3")
+        self.assertTrue(any("valence" in p for p in problems))
+        self.assertTrue(any("not CH3" in p for p in problems))
+
+    async def test_colours_are_fixed_in_place(self):
+        co2 = smiles_to_dict("O=C=O", "Carbon dioxide")
+        co2["atoms"][0]["color"] = "#123456"
+        self.assertEqual(check_structure(co2, fix_colors=False)[0][:9], "O atoms a")
+        self.assertEqual(check_structure(co2), [])
+        self.assertEqual({a["color"] for a in co2["atoms"] if a["element"] == "O"}, {"#FF0000"})
+
+    async def test_only_broken_molecules_are_asked_for_again(self):
+        batch = [{"name": "Ethanol", "formula": "C2H6O"}, {"name": "Carbon dioxide", "formula": "CO2"},
+                 {"name": "Water", "formula": "H2O"}]
+        reply = {"compounds": [{"name": "Ethanol", "formula": "C2H6O", "smiles": "CCO"},
+                               {"name": "Carbon dioxide", "formula": "CO2", "smiles": "O=C(=O"}]}
+        matched, missing = match_structures(batch, reply)
+        self.assertEqual(list(matched), ["Ethanol"])
+        self.assertEqual([sp["name"] for sp in missing], ["Carbon dioxide", "Water"])
+        prompt = correction_prompt(missing)
+        self.assertIn("- Carbon dioxide (CO2): SMILES 'O=C(=O' is invalid", prompt)
+        self.assertIn("- Water (H2O): it was missing from the reply", prompt)
+        self.assertNotIn("Ethanol (", prompt)
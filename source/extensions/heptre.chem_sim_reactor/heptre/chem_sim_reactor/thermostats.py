@@ -0,0 +1,120 @@
+# thermostats.py – temperature and pressure coupling for the MD and particle engines
+# ------------------------------------------------------------------ #
+import math
+from typing import Optional
+
+import numpy as np
+
+
+class Thermostat:
+    """
+    Base for the velocity thermostats. The target is either fixed or read
+    every step from a `ReactionConditions` – the object behind the
+    Temperature slider – so moving the slider retargets a running
+    simulation. `tau` is the coupling time in the engine's time unit
+    (fs for MD, ps for particles).
+
+    An engine passed to `apply(system, dt)` provides:
+        velocities              live velocity array, updated in place
+        temperature()           instantaneous kinetic temperature, K
+        thermal_sigma(T)        per-particle velocity std, broadcastable to `velocities`
+    """
+    def __init__(self, temperature_k: float = 298.15, tau: float = 100.0, *, conditions=None):
+        self.temperature_k = temperature_k
+        self.tau = tau
+        self.conditions = conditions
+
+    @property
+    def target_k(self) -> float:
+        return self.conditions.temperature_k if self.conditions is not None else self.temperature_k
+
+    def apply(self, system, dt: float):
+        raise NotImplementedError
+
+
+class BerendsenThermostat(Thermostat):
+    """Weak coupling: velocities scaled so T relaxes to the target with time constant tau."""
+    def apply(self, system, dt: float):
+        t = system.temperature()
+        if t <= 0.0:
+            return
+        lam = math.sqrt(max(0.0, 1.0 + dt / self.tau * (self.target_k / t - 1.0)))
+        v = system.velocities
+        v *= np.float32(min(max(lam, 0.8), 1.25))
+
+
+class LangevinThermostat(Thermostat):
+    """
+    Ornstein–Uhlenbeck velocity update with friction 1/tau: exact for the
+    friction and noise over dt, so it samples the canonical ensemble.
+    """
+    def __init__(self, temperature_k: float = 298.15, tau: float = 100.0, *, conditions=None,
+                 seed: Optional[int] = None):
+        super().__init__(temperature_k, tau, conditions=conditions)
+        self.rng = np.random.default_rng(seed)
+
+    def apply(self, system, dt: float):
+        v = system.velocities
+        c = math.exp(-dt / self.tau)
+        noise = self.rng.standard_normal(v.shape, dtype=np.float32)
+        noise *= system.thermal_sigma(self.target_k) * np.float32(math.sqrt(1.0 - c * c))
+        v *= np.float32(c)
+        v += noise
+
+
+class NoseHooverThermostat(Thermostat):
+    """
+    One Nosé–Hoover friction variable xi, driven by the temperature error:
+    dxi/dt = (T / T0 - 1) / tau². Unlike Berendsen it gives canonical
+    fluctuations; tau sets the period of the thermostat oscillation.
+    """
+    def __init__(self, temperature_k: float = 298.15, tau: float = 100.0, *, conditions=None):
+        super().__init__(temperature_k, tau, conditions=conditions)
+        self.xi = 0.0
+
+    def apply(self, system, dt: float):
+        self.xi += dt / (self.tau * self.tau) * (system.temperature() / self.target_k - 1.0)
+        v = system.velocities
+        v *= np.float32(math.exp(-self.xi * dt))
+
+
+THERMOSTATS = {
+    "berendsen": BerendsenThermostat,
+    "langevin": LangevinThermostat,
+    "nose-hoover": NoseHooverThermostat,
+}
+
+
+def make_thermostat(kind: str, **kwargs) -> Thermostat:
+    """Thermostat by name ("berendsen", "langevin", "nose-hoover")."""
+    try:
+        cls = THERMOSTATS[kind.lower()]
+    except KeyError:
+        raise ValueError(f"unknown thermostat {kind!r}") from None
+    return cls(**kwargs)
+
+
+class BerendsenBarostat:
+    """
+    Weak pressure coupling: every step the box and all coordinates are
+    scaled by mu = (1 - compressibility * dt / tau * (P0 - P))^(1/3), so P
+    relaxes to the target – fixed, or read live from `conditions` (the
+    Pressure slider). The default compressibility is liquid water's, in
+    1/atm; gas-phase boxes want roughly 1 / P0.
+
+    The engine provides `pressure_atm()` and `scale_box(mu)`.
+    """
+    def __init__(self, pressure_atm: float = 1.0, tau: float = 1000.0, compressibility: float = 4.6e-5, *,
+                 conditions=None):
+        self.pressure_atm = pressure_atm
+        self.tau = tau
+        self.compressibility = compressibility
+        self.conditions = conditions
+
+    @property
+    def target_atm(self) -> float:
+        return self.conditions.pressure_atm if self.conditions is not None else self.pressure_atm
+
+    def apply(self, system, dt: float):
+        mu3 = 1.0 - self.compressibility * dt / self.tau * (self.target_atm - system.pressure_atm())
+        system.scale_box(min(max(mu3, 0.97), 1.03) ** (1.0 / 3.0))
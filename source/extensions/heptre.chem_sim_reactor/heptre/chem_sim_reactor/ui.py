@@ -2,9 +2,19 @@ import omni.ui as ui
 from pathlib import Path
 import os
 import json
+import time
+import threading
 import carb
-from .chem_api import get_molecule_structure
-from .usd_writer import write_usd_from_reaction
+from .gpt_utils import stream_reaction
+from .usd_writer import (write_usd_from_reaction, write_md_from_reaction, md_system_from_reaction,
+                         write_field_from_reaction, write_molecule_usd, sanitize_prim_name,
+                         write_particle_instancer, apply_particle_snapshot, get_color_rgb)
+from .scheduler import FixedStepScheduler, defer_on_main_thread
+from .checkpoint import Checkpointer, latest_checkpoint, load_checkpoint
+from .kinetics import ReactionConditions
+from .thermostats import THERMOSTATS
+from .equilibrium import EquilibriumProblem, GibbsSolver, equilibrium_composition
+from .sweep import condition_grid, run_sweep, write_results_csv, write_sweep_usd
 
 from pxr import UsdGeom, Sdf
 from typing import Dict
@@ -50,6 +60,11 @@ class ChemSimUI:
         self.overlay_formula_label = None
         self.overlay_description_label = None
         self.overlay_process_label = None
+        self.conditions = ReactionConditions()
+        self.live_sim = None
+        self.live_checkpoints = None
+        self.equilibrium_label = None
+        self._equilibrium = None
         from .firebase_utils import start_background_sync
         start_background_sync()
 
@@ -81,11 +96,150 @@ class ChemSimUI:
             json_path = os.path.join(JSON_OUTPUT_DIR, selection)
             with open(json_path, "r") as f:
                 molecule_data = json.load(f)
-            write_usd_from_reaction(molecule_data, USD_OUTPUT_DIR, source_file_name=selection)
+            write_usd_from_reaction(molecule_data, USD_OUTPUT_DIR, source_file_name=selection,
+                                    conditions=self.conditions)
             self._reload_extension()
         except Exception as e:
             log_error(f"[ChemSimUI] ❌ Exception during Convert: {e}")
 
+    def _run_md_on_selected_json(self):
+        try:
+            selected_index = self.json_file_list.model.get_item_value_model().get_value_as_int()
+            all_files = self._get_json_files()
+            if selected_index >= len(all_files):
+                log_error("[ChemSimUI] ❌ Selected index is out of range.")
+                return
+            selection = all_files[selected_index]
+            with open(os.path.join(JSON_OUTPUT_DIR, selection), "r") as f:
+                molecule_data = json.load(f)
+            self._run_in_background("MD run", lambda: write_md_from_reaction(
+                molecule_data, USD_OUTPUT_DIR, source_file_name=selection, conditions=self.conditions))
+        except Exception as e:
+            log_error(f"[ChemSimUI] ❌ Exception during MD run: {e}")
+
+    def _run_field_on_selected_json(self):
+        try:
+            selected_index = self.json_file_list.model.get_item_value_model().get_value_as_int()
+            all_files = self._get_json_files()
+            if selected_index >= len(all_files):
+                log_error("[ChemSimUI] ❌ Selected index is out of range.")
+                return
+            selection = all_files[selected_index]
+            with open(os.path.join(JSON_OUTPUT_DIR, selection), "r") as f:
+                molecule_data = json.load(f)
+            self._run_in_background("field run", lambda: write_field_from_reaction(
+                molecule_data, USD_OUTPUT_DIR, source_file_name=selection, conditions=self.conditions))
+        except Exception as e:
+            log_error(f"[ChemSimUI] ❌ Exception during field run: {e}")
+
+    def _run_in_background(self, what: str, work):
+        """
+        Run `work()` on a worker thread so Kit keeps drawing while it runs,
+        then reload the panel back on the main thread.
+        """
+        def _worker():
+            try:
+                work()
+            except Exception as e:
+                log_error(f"[ChemSimUI] ❌ Exception during {what}: {e}")
+                return
+            defer_on_main_thread(self._reload_extension)
+
+        log_info(f"[ChemSimUI] ⏳ Running {what} in the background")
+        threading.Thread(target=_worker, name=f"chem_sim_reactor.{what}", daemon=True).start()
+
+    def _start_live_md_on_selected_json(self):
+        try:
+            self._stop_live_simulation()
+            selected_index = self.json_file_list.model.get_item_value_model().get_value_as_int()
+            all_files = self._get_json_files()
+            if selected_index >= len(all_files):
+                log_error("[ChemSimUI] ❌ Selected index is out of range.")
+                return
+            selection = all_files[selected_index]
+            folder = os.path.join(USD_OUTPUT_DIR, os.path.splitext(selection)[0])
+            os.makedirs(folder, exist_ok=True)
+
+            # resume from the last checkpoint so an extension reload doesn't throw the run away
+            ckpt_dir = os.path.join(folder, "checkpoints")
+            resume = latest_checkpoint(ckpt_dir)
+            if resume:
+                system = load_checkpoint(resume, self.conditions)
+                log_info(f"[ChemSimUI] ♻️ Resuming live MD from {resume} (step {system.n_steps})")
+            else:
+                with open(os.path.join(JSON_OUTPUT_DIR, selection), "r") as f:
+                    molecule_data = json.load(f)
+                system = md_system_from_reaction(molecule_data, self.conditions)
+            checkpoints = Checkpointer(ckpt_dir, every=2000)
+            self.live_checkpoints = (checkpoints, system)
+
+            def _step():
+                system.step(10)
+                checkpoints.maybe(system)
+
+            # a stage without time samples; the scheduler writes the default time every frame
+            live_path = os.path.join(folder, "md_live.usd")
+            write_particle_instancer(live_path, [], [None] * len(system.kinds), names=system.kinds,
+                                     colors=[get_color_rgb(e) for e in system.kinds])
+            ctx = omni.usd.get_context()
+            ctx.open_stage(live_path)
+            instancer = UsdGeom.PointInstancer(ctx.get_stage().GetPrimAtPath("/World/Particles"))
+
+            self.live_sim = FixedStepScheduler(_step, system.snapshot, dt_wall=1.0 / 60.0)
+            self.live_sim.subscribe(lambda snap: apply_particle_snapshot(instancer, snap),
+                                    on_error=lambda e: log_error(f"[ChemSimUI] ❌ Live MD stopped: {e.__cause__ or e}"))
+            self.live_sim.start()
+            log_info(f"[ChemSimUI] ▶️ Live MD: {system.n_atoms} atoms, 10 steps per 1/60 s tick")
+        except Exception as e:
+            log_error(f"[ChemSimUI] ❌ Exception starting live MD: {e}")
+
+    def _stop_live_simulation(self):
+        if self.live_sim is not None:
+            self.live_sim.stop()
+            log_info(f"[ChemSimUI] ⏹️ Live simulation stopped after {self.live_sim.steps} ticks "
+                     f"({self.live_sim.dropped} dropped)")
+            self.live_sim = None
+        if self.live_checkpoints is not None:
+            # the worker has stopped, so the final snapshot is consistent
+            checkpoints, system = self.live_checkpoints
+            self.live_checkpoints = None
+            checkpoints.submit(system)
+            checkpoints.close()
+            if checkpoints.error is not None:
+                log_error(f"[ChemSimUI] ❌ Checkpoint failed: {checkpoints.error}")
+            else:
+                log_info(f"[ChemSimUI] 💾 Checkpoint saved: {checkpoints.last_path}")
+
+    def _run_sweep_on_selected_json(self):
+        try:
+            selected_index = self.json_file_list.model.get_item_value_model().get_value_as_int()
+            all_files = self._get_json_files()
+            if selected_index >= len(all_files):
+                log_error("[ChemSimUI] ❌ Selected index is out of range.")
+                return
+            selection = all_files[selected_index]
+            with open(os.path.join(JSON_OUTPUT_DIR, selection), "r") as f:
+                molecule_data = json.load(f)
+            # the slider range, at the current pressure and concentration
+            grid = condition_grid([20.0 + 2.5 * i for i in range(33)],
+                                  [self.conditions.pressure_atm], [self.conditions.concentration])
+            folder = os.path.join(USD_OUTPUT_DIR, os.path.splitext(selection)[0])
+            os.makedirs(folder, exist_ok=True)
+
+            def _sweep():
+                # inline, not a process pool: inside Kit sys.executable is the Kit
+                # binary, so spawned workers would not start a plain Python
+                records = run_sweep(molecule_data, grid, workers=1,
+                                    cache_dir=os.path.join(USD_OUTPUT_DIR, ".sweep_cache"))
+                stem = os.path.join(folder, f"sweep_{int(time.time())}")
+                write_results_csv(stem + ".csv", records)
+                write_sweep_usd(stem + ".usd", records)
+                log_info(f"[ChemSimUI] ✅ Sweep: yield {records[0]['yield']:.2f} at 20 °C -> "
+                         f"{records[-1]['yield']:.2f} at 100 °C ({stem}.csv)")
+            self._run_in_background("sweep", _sweep)
+        except Exception as e:
+            log_error(f"[ChemSimUI] ❌ Exception during sweep: {e}")
+
     def _import_usd_file(self):
         log_info("[ChemSimUI] → Entered _import_usd_file")
         try:
@@ -112,10 +266,13 @@ class ChemSimUI:
             timeline.set_current_time(0)
             timeline.play()
 
-            # 💤 Allow time before capturing
-            import time
-            time.sleep(1.0)
+            # let playback run for a second before the overlay and capture, without blocking the main thread
+            defer_on_main_thread(lambda: self._finish_import(selection, usd_path), delay=1.0)
+        except Exception as e:
+            log_error(f"[ChemSimUI] ❌ Error importing USD file: {e}")
 
+    def _finish_import(self, selection, usd_path):
+        try:
             json_filename = selection.split("\\")[0]
             json_path = os.path.join(JSON_OUTPUT_DIR, f"{json_filename}.json")
             if not os.path.exists(json_path):
@@ -171,8 +328,9 @@ class ChemSimUI:
             return anims
         for sub in root.iterdir():
             if sub.is_dir():
-                for usd_file in sub.glob("reaction_anim_*.usd"):
-                    anims.append(str(usd_file.relative_to(root)))
+                for pattern in ("reaction_anim_*.usd", "md_traj_*.usd", "sweep_*.usd", "field_*.usd"):
+                    for usd_file in sub.glob(pattern):
+                        anims.append(str(usd_file.relative_to(root)))
         return sorted(anims)
 
     def color_rgb(self, name):
@@ -216,6 +374,11 @@ class ChemSimUI:
             ui.Label("Available JSON reaction results:")
             self.json_file_list = ui.ComboBox(0, *self._get_json_files())
             ui.Button("Convert Selected JSON to USD", clicked_fn=self._convert_json_to_usd)
+            ui.Button("Run MD on Selected JSON", clicked_fn=self._run_md_on_selected_json)
+            ui.Button("Reactor Field on Selected JSON", clicked_fn=self._run_field_on_selected_json)
+            with ui.HStack(height=0):
+                ui.Button("Live MD", clicked_fn=self._start_live_md_on_selected_json)
+                ui.Button("Stop Live", clicked_fn=self._stop_live_simulation)
             ui.Spacer(height=20)
             ui.Label("Available USD files:")
             self.usd_file_list = ui.ComboBox(0, *self._get_usd_files())
@@ -242,8 +405,21 @@ class ChemSimUI:
         if not prompt:
             log_warn("[ChemSimUI] Empty prompt. Skipping.")
             return
+        # generation takes seconds: run it on Kit's event loop instead of blocking the UI
+        asyncio.ensure_future(self._generate_reaction_json(prompt))
+
+    async def _generate_reaction_json(self, prompt):
         try:
-            result = get_molecule_structure(prompt)
+            # molecules arrive one by one while the reply is still streaming; show each right away
+            folder = os.path.join(USD_OUTPUT_DIR, prompt.replace(' ', '_'))
+            shown = 0
+            result = None
+            self._clear_preview()       # the last prompt's molecules sit on the same slots
+            async for role, m in stream_reaction(prompt):
+                if role == "reaction":
+                    result = m
+                elif self._preview_molecule(role, m, folder, shown):
+                    shown += 1
             os.makedirs(JSON_OUTPUT_DIR, exist_ok=True)
             output_path = os.path.join(JSON_OUTPUT_DIR, f"{prompt.replace(' ', '_')}.json")
             with open(output_path, "w") as f:
@@ -253,6 +429,28 @@ class ChemSimUI:
         except Exception as e:
             log_error(f"[ChemSimUI] Error in GPT backend call: {e}")
 
+    def _clear_preview(self):
+        stage = omni.usd.get_context().get_stage()
+        if stage is not None and stage.GetPrimAtPath("/World/Preview"):
+            stage.RemovePrim("/World/Preview")
+
+    def _preview_molecule(self, role, m, folder, slot, spacing=4.0):
+        """Write one molecule's USD and reference it into the open stage under /World/Preview, side by side."""
+        try:
+            path = write_molecule_usd(m, role, folder)
+            stage = omni.usd.get_context().get_stage()
+            if stage is None:
+                return False
+            prim_path = f"/World/Preview/{role}_{sanitize_prim_name(m.get('name') or role)}"
+            xform = UsdGeom.Xform.Define(stage, prim_path)
+            xform.GetPrim().GetReferences().AddReference(path)
+            UsdGeom.XformCommonAPI(xform).SetTranslate((slot * spacing, 0.0, 0.0))
+            log_info(f"[ChemSimUI] Previewing {role[:-1]} {m.get('name')}")
+            return True
+        except Exception as e:
+            log_warn(f"[ChemSimUI] Could not preview {m.get('name')}: {e}")
+            return False
+
     def _reload_extension(self):
         try:
             if self.overlay_window:
@@ -279,7 +477,60 @@ class ChemSimUI:
         with self.advanced_window.frame:
             with ui.VStack():
                 ui.Label("Advanced Rendering Options", style={"font_size": 18})
-                ui.Label("Simulation parameters (PhysX, visuals, etc.) coming soon...")
-                ui.FloatSlider(min=20, max=100, default=25, label="Temperature (°C)")
-                ui.FloatSlider(min=1, max=10, default=1, label="Pressure (atm)")
-                ui.FloatSlider(min=0, max=1, default=0.5, label="Reactant A Concentration")
+                ui.Label("Simulation parameters drive the kinetics, thermostat and barostat of every simulation.")
+                self._bind_slider(ui.FloatSlider(min=20, max=100, default=25, label="Temperature (°C)"),
+                                  "temperature_c")
+                self._bind_slider(ui.FloatSlider(min=1, max=10, default=1, label="Pressure (atm)"),
+                                  "pressure_atm")
+                self._bind_slider(ui.FloatSlider(min=0, max=1, default=0.5, label="Reactant A Concentration"),
+                                  "concentration")
+                with ui.HStack(height=0):
+                    ui.Label("MD Thermostat", width=120)
+                    self._bind_thermostat_combo(ui.ComboBox(0, *THERMOSTATS))
+                self.equilibrium_label = ui.Label("", word_wrap=True, height=0)
+                self._update_equilibrium()
+                ui.Button("Apply to Selected JSON", clicked_fn=self._convert_json_to_usd)
+                ui.Button("Temperature Sweep on Selected JSON", clicked_fn=self._run_sweep_on_selected_json)
+
+    def _bind_slider(self, slider, attr):
+        slider.model.set_value(getattr(self.conditions, attr))
+
+        def _on_change(model):
+            setattr(self.conditions, attr, model.get_value_as_float())
+            self._update_equilibrium()
+        slider.model.add_value_changed_fn(_on_change)
+        return slider
+
+    def _update_equilibrium(self):
+        """Re-solve the selected reaction's equilibrium for the current sliders (warm-started, < 1 ms)."""
+        if self.equilibrium_label is None:
+            return
+        try:
+            selected_index = self.json_file_list.model.get_item_value_model().get_value_as_int()
+            all_files = self._get_json_files()
+            if selected_index >= len(all_files):
+                self.equilibrium_label.text = ""
+                return
+            selection = all_files[selected_index]
+            if self._equilibrium is None or self._equilibrium[0] != selection:
+                with open(os.path.join(JSON_OUTPUT_DIR, selection), "r") as f:
+                    molecule_data = json.load(f)
+                self._equilibrium = (selection, molecule_data,
+                                     GibbsSolver(EquilibriumProblem.from_reaction(molecule_data)))
+            _, molecule_data, solver = self._equilibrium
+            x = equilibrium_composition(molecule_data, self.conditions, solver)
+            self.equilibrium_label.text = (
+                f"Equilibrium at {self.conditions.temperature_c:.1f} °C, {self.conditions.pressure_atm:.2f} atm: "
+                + ", ".join(f"{name} {frac:.1%}" for name, frac in x.items()))
+        except Exception as e:
+            self.equilibrium_label.text = f"Equilibrium unavailable: {e}"
+
+    def _bind_thermostat_combo(self, combo):
+        kinds = list(THERMOSTATS)
+        value = combo.model.get_item_value_model()
+        value.set_value(kinds.index(self.conditions.thermostat))
+
+        def _on_change(model):
+            self.conditions.thermostat = kinds[model.get_value_as_int()]
+        value.add_value_changed_fn(_on_change)
+        return combo
@@ -1,13 +1,19 @@
-from pxr import Usd, UsdGeom, Gf, UsdShade, Sdf
+from pxr import Usd, UsdGeom, Gf, UsdShade, Sdf, Vt
 from .Molecular import MolecularStructure, Atom, Bond
-from .reaction_anim_builder import build_reaction_animation
+from .reaction_anim_builder import build_reaction_animation, build_mechanism_animation, build_population_animation, MECHANISM_ROLES
 import re
-import os, math, carb, itertools
+import os, math, carb, itertools, time
+import numpy as np
 from collections import deque, defaultdict
 from .firebase_utils import upload_anim_and_update_db
+from .kinetics import reaction_progress
+from .stochastic import molecule_population
 # ---------- constants -----------------------------------------------------
 ATOM_RADIUS = 0.20
 BOND_RADIUS = 0.05
+# species colours for concentration fields – species names are not elements
+FIELD_PALETTE = [(0.12, 0.47, 0.71), (1.0, 0.50, 0.05), (0.17, 0.63, 0.17), (0.84, 0.15, 0.16),
+                 (0.58, 0.40, 0.74), (0.55, 0.34, 0.29), (0.89, 0.47, 0.76), (0.50, 0.50, 0.50)]
 from pxr import Sdf
 import os, pathlib
 
@@ -225,19 +231,169 @@ def generate_usd_file(mol, path):
     st.GetRootLayer().Save()
     carb.log_info(f"✔  {path}")
 
+
+def write_molecule_usd(m, role, folder):
+    """
+    USD of one reaction molecule (its stored JSON form) as
+    `<folder>/<role>_<name>.usd` – the same file `write_usd_from_reaction`
+    writes for it, so a streamed preview is reused by the full build.
+    """
+    os.makedirs(folder, exist_ok=True)
+    mol = MolecularStructure(m.get("name") or role, [Atom(**a) for a in m["atoms"]], [Bond(**b) for b in m["bonds"]])
+    path = os.path.join(folder, f"{role}_{sanitize_prim_name(mol.name)}.usd")
+    generate_usd_file(mol, path)
+    return path
+
+
+# ─── particle clouds ──────────────────────────────────────────────────────
+def write_particle_instancer(path, frames, prototypes, *, names=None, colors=None, sphere_radius=ATOM_RADIUS):
+    """
+    Write particle snapshots as ONE UsdGeom.PointInstancer with time-sampled
+    positions / protoIndices / ids (frame k -> time code k).
+
+    `frames` yields (positions (N, 3) float32, proto_indices (N,) int32,
+    ids (N,) int64) – exactly `ParticleSystem.snapshot()`. N may change
+    between frames. `prototypes[s]` is the molecule USD for species s, or
+    None for a plain sphere (tinted with `colors[s]` when given). Arrays go
+    to USD through Vt.*.FromNumpy, with no per-particle Python loop.
+    """
+    _prepare_fresh_layer(path)
+    st = Usd.Stage.CreateNew(path)
+    UsdGeom.SetStageUpAxis(st, UsdGeom.Tokens.y)
+    world = UsdGeom.Xform.Define(st, "/World")
+    st.SetDefaultPrim(world.GetPrim())
+
+    inst = UsdGeom.PointInstancer.Define(st, "/World/Particles")
+    UsdGeom.Scope.Define(st, "/World/Particles/Prototypes")
+    targets = []
+    for s, proto in enumerate(prototypes):
+        label = sanitize_prim_name(names[s]) if names else f"Species_{s}"
+        proto_path = f"/World/Particles/Prototypes/{label}"
+        if proto:
+            xf = UsdGeom.Xform.Define(st, proto_path)
+            xf.GetPrim().GetReferences().AddReference(str(proto))
+        else:
+            sphere = UsdGeom.Sphere.Define(st, proto_path)
+            sphere.CreateRadiusAttr(sphere_radius)
+            if colors:
+                sphere.CreateDisplayColorAttr([Gf.Vec3f(*colors[s])])
+        targets.append(Sdf.Path(proto_path))
+    inst.CreatePrototypesRel().SetTargets(targets)
+
+    pos_attr, idx_attr, id_attr = inst.CreatePositionsAttr(), inst.CreateProtoIndicesAttr(), inst.CreateIdsAttr()
+    n_frames = 0
+    for k, (positions, proto_indices, ids) in enumerate(frames):
+        pos_attr.Set(Vt.Vec3fArray.FromNumpy(np.ascontiguousarray(positions, dtype=np.float32)), k)
+        idx_attr.Set(Vt.IntArray.FromNumpy(np.ascontiguousarray(proto_indices, dtype=np.int32)), k)
+        id_attr.Set(Vt.Int64Array.FromNumpy(np.ascontiguousarray(ids, dtype=np.int64)), k)
+        n_frames = k + 1
+
+    st.SetStartTimeCode(0)
+    st.SetEndTimeCode(max(n_frames - 1, 0))
+    st.GetRootLayer().Save()
+    carb.log_info(f"✔  {path} ({n_frames} particle frames)")
+    return path
+
+
+def apply_particle_snapshot(instancer, snapshot):
+    """
+    Write one (positions, proto_indices, ids) snapshot to the default time of
+    a live PointInstancer – one with no time samples, e.g. from
+    `write_particle_instancer(path, [], ...)`. Main thread only.
+    """
+    positions, proto_indices, ids = snapshot
+    instancer.GetPositionsAttr().Set(Vt.Vec3fArray.FromNumpy(np.ascontiguousarray(positions, dtype=np.float32)))
+    instancer.GetProtoIndicesAttr().Set(Vt.IntArray.FromNumpy(np.ascontiguousarray(proto_indices, dtype=np.int32)))
+    instancer.GetIdsAttr().Set(Vt.Int64Array.FromNumpy(np.ascontiguousarray(ids, dtype=np.int64)))
+
+
+def write_field_points(path, frames, species, *, colors=None, cell_size=1.0, max_width=None):
+    """
+    Write downsampled concentration fields as ONE UsdGeom.Points cloud, a
+    point per (coarse) cell at fixed positions, time-sampled per frame
+    (frame k -> time code k):
+
+        primvars:<species>   per-point concentration, mol/L
+        primvars:displayColor  concentration-weighted mix of `colors`
+        widths                 cell_size * (c / c_max)^(1/3), so empty cells vanish
+
+    `frames` yields (S, X, Y, Z) arrays – `ReactionDiffusionGrid.frames()`.
+    """
+    _prepare_fresh_layer(path)
+    st = Usd.Stage.CreateNew(path)
+    UsdGeom.SetStageUpAxis(st, UsdGeom.Tokens.y)
+    world = UsdGeom.Xform.Define(st, "/World")
+    st.SetDefaultPrim(world.GetPrim())
+    points = UsdGeom.Points.Define(st, "/World/Field")
+    api = UsdGeom.PrimvarsAPI(points)
+
+    names = [sanitize_prim_name(n) for n in species]
+    palette = np.asarray(colors if colors else [FIELD_PALETTE[i % len(FIELD_PALETTE)] for i in range(len(species))],
+                         dtype=np.float32)
+    width_attr = points.CreateWidthsAttr()
+    points.SetWidthsInterpolation(UsdGeom.Tokens.vertex)
+    color_pv = api.CreatePrimvar("displayColor", Sdf.ValueTypeNames.Color3fArray, UsdGeom.Tokens.vertex)
+    field_pvs = [api.CreatePrimvar(n, Sdf.ValueTypeNames.FloatArray, UsdGeom.Tokens.vertex) for n in names]
+
+    n_frames, c_max = 0, None
+    for k, field in enumerate(frames):
+        S = field.shape[0]
+        flat = field.reshape(S, -1)
+        if k == 0:
+            grid = np.indices(field.shape[1:], dtype=np.float32).reshape(3, -1).T
+            points.CreatePointsAttr(Vt.Vec3fArray.FromNumpy(np.ascontiguousarray((grid + 0.5) * cell_size)))
+            # fixed scale from the first frame so widths are comparable across frames
+            c_max = max(float(flat.sum(axis=0).max()), 1e-30)
+        total = flat.sum(axis=0)
+        mix = (palette[:S].T @ flat / np.maximum(total, 1e-30)).T
+        widths = (max_width or cell_size) * np.cbrt(np.clip(total / c_max, 0.0, 1.0))
+        width_attr.Set(Vt.FloatArray.FromNumpy(widths.astype(np.float32)), k)
+        color_pv.Set(Vt.Vec3fArray.FromNumpy(np.ascontiguousarray(mix, dtype=np.float32)), k)
+        for s, pv in enumerate(field_pvs):
+            pv.Set(Vt.FloatArray.FromNumpy(np.ascontiguousarray(flat[s], dtype=np.float32)), k)
+        n_frames = k + 1
+
+    st.SetStartTimeCode(0)
+    st.SetEndTimeCode(max(n_frames - 1, 0))
+    st.GetRootLayer().Save()
+    carb.log_info(f"✔  {path} ({n_frames} field frames)")
+    return path
+
 import uuid  # Add to imports if not present
 import subprocess
 import os
 import sys
 
-def write_usd_from_reaction(js, out_dir="output", source_file_name="reaction.json"):
+def _equation_species_files(js, rx, folder):
+    """
+    Map equation species (formulas such as "C2H6O") to the molecule USDs of
+    the same side: by matching `formula`, else by position in the JSON list.
+    """
+    files = {}
+    for role, side in (("reactants", rx.reactants), ("products", rx.products)):
+        mols = [m for m in js.get(role, []) if m.get("name")]
+        for i, species in enumerate(side):
+            m = next((m for m in mols if (m.get("formula") or "").replace(" ", "") == species),
+                     mols[i] if i < len(mols) else None)
+            if m is not None:
+                files[species] = os.path.join(folder, f"{role}_{sanitize_prim_name(m['name'])}.usd")
+    return files
+
+def write_usd_from_reaction(js, out_dir="output", source_file_name="reaction.json", conditions=None,
+                            molecules=None):
+    """
+    `molecules`, together with `conditions`, switches a single-step reaction
+    to the stochastic view: about that many individual reactant molecules,
+    each appearing and disappearing as the simulated events consume and form them.
+    """
     folder = os.path.join(out_dir, os.path.splitext(source_file_name)[0])
     os.makedirs(folder, exist_ok=True)
 
     carb.log_info(f"💾 Writing molecular USDs to ➜ {folder}")
 
-    # 1. Write individual reactants/products USD files
-    for role in ("reactants", "products"):
+    # 1. Write individual reactants/products (and mechanism species) USD files
+    written = set()
+    for role in MECHANISM_ROLES:
         for m in js.get(role, []):
             carb.log_info(f"🔍 Processing {role}: {m.get('name', role)}")
 
@@ -248,7 +404,10 @@ def write_usd_from_reaction(js, out_dir="output", source_file_name="reaction.jso
                     [Atom(**a) for a in m["atoms"]],
                     [Bond(**b) for b in m["bonds"]]
                 )
+                if js.get("mechanism") and sanitize_prim_name(mol.name) in written:
+                    continue    # shared species: author once, reference everywhere
                 generate_usd_file(mol, os.path.join(folder, f"{role}_{sanitize_prim_name(mol.name)}.usd"))
+                written.add(sanitize_prim_name(mol.name))
             except Exception as e:
                 carb.log_error(f"❌ Error processing {role}: {e}")
                 continue
@@ -258,7 +417,22 @@ def write_usd_from_reaction(js, out_dir="output", source_file_name="reaction.jso
     carb.log_info(f"write_usd_from_reaction called with: {len(js.get('reactants', []))} reactants, {len(js.get('products', []))} products")
 
     try:
-        usd_path = build_reaction_animation(folder)
+        if js.get("mechanism"):
+            usd_path = build_mechanism_animation(folder, js["mechanism"])
+        elif molecules and conditions is not None:
+            rx, lifetimes = molecule_population(js, conditions, n_molecules=molecules, sim_time=10.0)
+            usd_path = build_population_animation(folder, _equation_species_files(js, rx, folder),
+                                                  lifetimes, t_end=10.0)
+        else:
+            progress = None
+            if conditions is not None:
+                try:
+                    progress = reaction_progress(js, conditions, n_frames=25)   # react_frames + 1
+                    carb.log_info(f"⚗️ Kinetics at {conditions.temperature_c:.0f} °C / {conditions.pressure_atm:.1f} atm: "
+                                  f"final extent {progress[-1]:.2f}")
+                except Exception as e:
+                    carb.log_warn(f"⚠️ Kinetics skipped, using default timing: {e}")
+            usd_path = build_reaction_animation(folder, progress=progress)
     except Exception as e:
         carb.log_error(f"⚠️ Animation or FBX export failed: {e}")
 
@@ -277,3 +451,73 @@ def write_usd_from_reaction(js, out_dir="output", source_file_name="reaction.jso
             carb.log_info(f"✅ Uploaded {file} to Firebase: {result}")
         else:
             carb.log_error(f"❌ Upload failed for {file}: {result}")
+
+
+def md_system_from_reaction(js, conditions=None, copies=27, barostat=True):
+    """
+    MDSystem over `copies` replicas of every reactant and product of `js`.
+    `conditions` set the start temperature and couple the run to a
+    thermostat (and, with `barostat`, a barostat) whose targets follow the
+    sliders while it runs.
+    """
+    from .md import MDSystem
+    from .thermostats import BerendsenBarostat, make_thermostat
+
+    mols = [MolecularStructure(m.get("name", role), [Atom(**a) for a in m["atoms"]], [Bond(**b) for b in m["bonds"]])
+            for role in ("reactants", "products") for m in js.get(role, [])]
+    temperature_k = conditions.temperature_k if conditions is not None else 298.15
+    coupling = {}
+    if conditions is not None:
+        coupling["thermostat"] = make_thermostat(conditions.thermostat, conditions=conditions)
+        if barostat:
+            coupling["barostat"] = BerendsenBarostat(conditions=conditions)
+    system = MDSystem.from_molecules(mols, copies=copies, temperature_k=temperature_k, **coupling)
+    carb.log_info(f"🧪 MD: {system.n_atoms} atoms in a {system.box:.0f} Å box at {temperature_k:.0f} K")
+    return system
+
+
+def write_field_from_reaction(js, out_dir="output", source_file_name="reaction.json", conditions=None,
+                              n=64, n_frames=120, steps_per_frame=5, downsample=2):
+    """
+    Run the continuum reaction-diffusion model of `js` on an n³ grid
+    (segregated feed, see `ReactionDiffusionGrid.from_reaction`) and write
+    the downsampled fields to `<folder>/field_<timestamp>.usd` as a point
+    cloud, one time sample per frame.
+    """
+    from .field import ReactionDiffusionGrid
+    folder = os.path.join(out_dir, os.path.splitext(source_file_name)[0])
+    os.makedirs(folder, exist_ok=True)
+    grid = ReactionDiffusionGrid.from_reaction(js, conditions, n=n)
+    dt = grid.stable_dt()
+    path = os.path.join(folder, f"field_{int(time.time())}.usd")
+    write_field_points(path, grid.frames(n_frames, steps_per_frame, dt, downsample), grid.model.species,
+                       cell_size=grid.spacing * downsample * 1000.0)      # mm
+    carb.log_info(f"✅ Field: {n}³ cells, {grid.n_steps} steps to t = {grid.time:.2f} s")
+    return path
+
+
+def write_md_from_reaction(js, out_dir="output", source_file_name="reaction.json", conditions=None,
+                           copies=27, n_frames=120, steps_per_frame=20, n_workers=1):
+    """
+    Run MD on `copies` replicas of every reactant and product of `js` and
+    stream the trajectory into `<folder>/md_traj_<timestamp>.usd`, one time
+    sample per frame. Atoms are instanced spheres coloured per element.
+    With `n_workers` > 1 the box is split into slabs over that many processes
+    (no barostat then: the decomposed box is fixed).
+    """
+    from .domain import SlabDecomposition
+    folder = os.path.join(out_dir, os.path.splitext(source_file_name)[0])
+    os.makedirs(folder, exist_ok=True)
+    system = md_system_from_reaction(js, conditions, copies, barostat=n_workers <= 1)
+
+    path = os.path.join(folder, f"md_traj_{int(time.time())}.usd")
+    colors = [get_color_rgb(e) for e in system.kinds]
+    if n_workers > 1:
+        with SlabDecomposition(system, n_workers) as run:
+            write_particle_instancer(path, run.trajectory(n_frames, steps_per_frame), [None] * len(system.kinds),
+                                     names=system.kinds, colors=colors)
+    else:
+        write_particle_instancer(path, system.trajectory(n_frames, steps_per_frame), [None] * len(system.kinds),
+                                 names=system.kinds, colors=colors)
+    carb.log_info(f"✅ MD trajectory: {system.n_steps} steps, {system.n_rebuilds} neighbour-list builds")
+    return path
@@ -0,0 +1,83 @@
+# validation.py – fast structural checks on molecules written by the LLM
+# ------------------------------------------------------------------ #
+from typing import Dict, List, Optional
+
+from .network import formula_counts, hill_formula
+from .smiles import AROMATIC_ORDER, ELEMENT_COLORS, VALENCES
+
+# highest normal valence per element; hydrogen isn't in the SMILES organic subset
+MAX_VALENCE = dict({e: max(v) for e, v in VALENCES.items()}, H=1)
+
+
+def check_structure(compound: dict, formula: Optional[str] = None, fix_colors: bool = True) -> List[str]:
+    """
+    Problems with an atoms/bonds structure, as short sentences the LLM can
+    act on; empty when it is sound. Checks, in one pass over atoms and bonds:
+
+        - atoms present, each with an element and a unique id
+        - every bond joins two distinct, existing atoms
+        - no atom exceeds its highest normal valence (plus |charge|);
+          aromatic bonds count one
+        - the atom counts match `formula` (default: the compound's own)
+        - atoms of one element share one colour
+
+    Colours are cosmetic, so with `fix_colors` an off-palette or
+    inconsistent colour is corrected in place instead of reported.
+    """
+    atoms = compound.get("atoms")
+    if not isinstance(atoms, list) or not atoms:
+        return ["it has no atoms"]
+    problems = []
+    elements: Dict[str, str] = {}
+    bonded: Dict[str, float] = {}
+    counts: Dict[str, int] = {}
+    colors: Dict[str, set] = {}
+    for atom in atoms:
+        aid, element = atom.get("id"), atom.get("element")
+        if not aid or not element:
+            problems.append(f"atom {atom} lacks an id or element")
+            continue
+        if aid in elements:
+            problems.append(f"atom id {aid} is used twice")
+        elements[aid] = element
+        bonded[aid] = 0.0
+        counts[element] = counts.get(element, 0) + 1
+        colors.setdefault(element, set()).add(str(atom.get("color", "")).upper())
+
+    for bond in compound.get("bonds") or []:
+        a, b = bond.get("from_atom"), bond.get("to_atom")
+        dangling = [x for x in (a, b) if x not in elements]
+        if dangling:
+            problems.append(f"bond {a}-{b} refers to missing atom {', '.join(map(str, dangling))}")
+            continue
+        if a == b:
+            problems.append(f"bond {a}-{b} joins an atom to itself")
+            continue
+        order = bond.get("order", 1)
+        order = 1 if order == AROMATIC_ORDER else order
+        bonded[a] += order
+        bonded[b] += order
+
+    charges = {atom.get("id"): abs(atom.get("charge", 0) or 0) for atom in atoms}
+    for aid, total in bonded.items():
+        limit = MAX_VALENCE.get(elements[aid])
+        if limit is not None and total > limit + charges.get(aid, 0):
+            problems.append(f"atom {aid} ({elements[aid]}) has {total:g} bonds, more than valence {limit}")
+
+    expected = formula_counts(formula or compound.get("formula") or "")
+    counts.pop("*", None)
+    if expected is not None and counts != expected:
+        problems.append(f"its atoms make {hill_formula(counts)}, not {hill_formula(expected)}")
+
+    for element, seen in colors.items():
+        want = ELEMENT_COLORS.get(element)
+        if (want is None and len(seen) <= 1) or seen == {want}:
+            continue
+        if fix_colors:
+            color = want or next(iter(sorted(seen)))
+            for atom in atoms:
+                if atom.get("element") == element:
+                    atom["color"] = color
+        else:
+            problems.append(f"{element} atoms are coloured {', '.join(sorted(seen))}, expected {want or 'one colour'}")
+    return problems
@@ -3,6 +3,7 @@ import omni.usd
 import omni.timeline
 import omni.kit.commands
 import omni.kit.actions.core
+import omni.kit.app
 from omni.kit.viewport.utility import get_active_viewport
 from pxr import UsdGeom, Gf
 import time
@@ -57,10 +58,12 @@ def capture_viewport_frame(frame_path, done_callback):
     omni.kit.actions.core.execute_action(
         "omni.kit.menu.edit", "capture_screenshot", callback
     )
-from omni.kit.app import get_app
+
 
 def defer_to_main_thread(func):
-    get_app().get_update_event_stream().create_subscription_to_push(lambda e: func())
+    # one-shot: the subscription is held until it fires, then released
+    from .scheduler import defer_on_main_thread
+    defer_on_main_thread(func)
 
 
 import carb
@@ -84,8 +87,6 @@ def _capture_frame_loop(frames, frame_dir, on_complete):
     capture_viewport_frame(os.path.join(frame_dir, f"frame_{frame:04d}.png"), after_capture)
 
 
-from omni.kit.app import get_app
-
 def safe_render_usd_frames(*args, **kwargs):
     render_usd_frames(*args, **kwargs)
 